@@ -1,9 +1,11 @@
 """
 Case Linker API - Skill 05 (Expert)
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from app.schemas.case_linker import (
-    CaseLinkRequest, CaseLinkResponse
+    CaseLinkRequest, CaseLinkResponse, BatchCaseLinkRequest, BatchCaseLinkResponse,
+    SuspectResolutionRequest, SuspectResolutionResponse,
+    CrimeCluster, CrimeClusterList
 )
 from app.services.case_linker_service import case_linker_service
 from app.core.security import get_current_admin_user as get_current_police_user
@@ -23,6 +25,18 @@ async def analyze_case_links(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analyze/batch", response_model=BatchCaseLinkResponse)
+async def analyze_case_links_batch(
+    request: BatchCaseLinkRequest,
+    current_user = Depends(get_current_police_user)
+):
+    """Analyze many cases (e.g. a whole beat) together: one merged graph, patterns across all of them"""
+    try:
+        return await case_linker_service.analyze_cases(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/test-analyze", response_model=CaseLinkResponse)
 async def test_case_link_analysis(
     current_user = Depends(get_current_police_user)
@@ -33,3 +47,43 @@ async def test_case_link_analysis(
         return await case_linker_service.analyze_case(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/resolve-suspects", response_model=SuspectResolutionResponse)
+async def resolve_suspects(
+    request: SuspectResolutionRequest,
+    current_user = Depends(get_current_police_user)
+):
+    """Merge spelling variants of the same suspect across FIRs into one identity in the case graph"""
+    try:
+        return await case_linker_service.resolve_suspects(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/clusters", response_model=CrimeClusterList)
+async def list_crime_clusters(
+    limit: int = Query(10, ge=1, le=100),
+    min_cases: int = Query(2, ge=1),
+    current_user = Depends(get_current_police_user)
+):
+    """Largest live clusters of cases joined through shared suspects or MOs (dashboard)"""
+    try:
+        return await case_linker_service.top_clusters(limit, min_cases)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/clusters/{node_id}", response_model=CrimeCluster)
+async def get_crime_cluster(
+    node_id: str,
+    current_user = Depends(get_current_police_user)
+):
+    """Cluster containing a case, suspect or MO"""
+    try:
+        cluster = await case_linker_service.cluster_of(node_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if cluster is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{node_id} is not in the case graph")
+    return cluster
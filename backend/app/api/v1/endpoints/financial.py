@@ -2,16 +2,21 @@
 Financial Analysis API - Skill 02
 Expert Implementation using Graph Algorithms
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.schemas.financial import (
-    FinancialAnalysisRequest, FinancialAnalysisResponse,
+    FinancialAnalysisRequest, FinancialAnalysisResponse, FinancialAppendRequest,
+    FinancialNetwork, NetworkPage, RiskLevel,
+    IdentifierLookupResponse, RepeatIdentifier,
     Transaction, Account, AnomalyAlert
 )
+from app.core.config import settings
 # UPDATED: Import the EXPERT service factory
 from app.services.police.financial import get_financial_service, FinancialService
+from app.services.police.statement_stream import detect_format
+from app.services.financial_service import financial_analyzer
 from app.core.security import get_current_admin_user
 
 router = APIRouter() # Prefix handled in router.py
@@ -30,6 +35,10 @@ async def analyze_financial_trail(
     - Money layering
     - Structuring/smurfing
     - Shell companies
+    
+    Detectors run cheapest first within the request's time/work budget
+    (time_budget_seconds, work_budget); if it runs out, the response has
+    complete=false and per-detector status in `detectors`.
     """
     try:
         return await service.analyze(request)
@@ -39,6 +48,182 @@ async def analyze_financial_trail(
             detail=f"Analysis failed: {str(e)}"
         )
 
+@router.post("/analyze/deep", response_model=FinancialAnalysisResponse)
+async def deep_financial_analysis(
+    request: FinancialAnalysisRequest,
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Full network scan with the NetworkX analyzer (Skill 02)
+    
+    Adds layering, high-value, rapid succession, unusual hours and shell
+    company detection. Each request runs in its own analysis session;
+    large cases are analysed in worker processes. The same time/work
+    budget applies as for /analyze.
+    """
+    try:
+        return await financial_analyzer.analyze_async(request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Analysis failed: {str(e)}"
+        )
+
+@router.get("/analyze/cache/stats")
+async def get_analysis_cache_stats(
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """Result cache occupancy and hit/miss counters for financial analyses"""
+    return service.cache_stats()
+
+@router.post("/analyze/{case_id}/transactions", response_model=FinancialAnalysisResponse)
+async def append_financial_transactions(
+    case_id: str,
+    request: FinancialAppendRequest,
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Append a new bank statement tranche to the case's transaction graph.
+    
+    Only edges and anomalies touched by the new transactions are
+    re-evaluated; transactions already ingested (same id) are skipped.
+    """
+    try:
+        return await service.append_transactions(case_id, request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Analysis failed: {str(e)}"
+        )
+
+@router.post("/analyze/{case_id}/statement", response_model=FinancialAnalysisResponse)
+async def upload_bank_statement(
+    case_id: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from file extension)"),
+    threshold_amount: float = Query(100000.0, gt=0),
+    append: bool = Query(False, description="Append to the existing case graph instead of replacing it"),
+    time_budget_seconds: Optional[float] = Query(None, gt=0, description="Detection time budget"),
+    work_budget: Optional[int] = Query(None, gt=0, description="Max nodes + edges visited by detectors"),
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Stream a bank statement export (CSV or NDJSON, one transaction per row)
+    into the case graph.
+    
+    Rows are parsed and validated in batches while the upload is read, so
+    peak memory does not grow with file size. Invalid rows are skipped and
+    reported in metrics (rows_rejected, rejected_samples). Detection runs
+    within the time/work budget once the upload has been read.
+    """
+    try:
+        fmt = detect_format(file.filename, format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    try:
+        return await service.ingest_statement(
+            case_id, file.file, fmt, threshold_amount, append=append,
+            time_budget_seconds=time_budget_seconds, work_budget=work_budget
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Analysis failed: {str(e)}"
+        )
+    finally:
+        await file.close()
+
+@router.get("/analyze/{case_id}/network", response_model=FinancialNetwork)
+async def get_network_overview(
+    case_id: str,
+    max_nodes: int = Query(settings.FINANCIAL_NETWORK_MAX_NODES, ge=1, le=10000),
+    max_edges: int = Query(settings.FINANCIAL_NETWORK_MAX_EDGES, ge=1, le=50000),
+    min_risk: RiskLevel = Query(RiskLevel.HIGH, description="Leaves below this risk are collapsed"),
+    min_amount: float = Query(0.0, ge=0, description="Hide edges moving less than this"),
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Bounded overview of the case's transaction network for the visualiser.
+    
+    Low-risk leaf accounts are collapsed into aggregate nodes and the most
+    important accounts are kept within the budget; fetch detail with
+    GET /analyze/{case_id}/network/{node_id}.
+    """
+    network = service.network_overview(case_id, max_nodes, max_edges, min_risk, min_amount)
+    if network is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No analysis for case {case_id}")
+    return network
+
+@router.get("/analyze/{case_id}/network/{node_id}", response_model=NetworkPage)
+async def expand_network_node(
+    case_id: str,
+    node_id: str,
+    direction: str = Query("both", pattern="^(in|out|both)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    min_amount: float = Query(0.0, ge=0),
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Expand one account (or aggregate node): a page of its counterparties,
+    largest amounts first. Follow next_offset for the next page.
+    """
+    try:
+        page = service.network_page(case_id, node_id, direction, offset, limit, min_amount)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown account {node_id}")
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No analysis for case {case_id}")
+    return page
+
+@router.get("/index/lookup", response_model=IdentifierLookupResponse)
+def lookup_identifier(
+    value: str = Query(..., min_length=1, description="Account number, device id or reference number"),
+    kind: Optional[str] = Query(None, pattern="^(account|device|reference)$"),
+    exclude_case_id: Optional[str] = Query(None, description="Leave out the case being investigated"),
+    limit: int = Query(100, ge=1, le=1000),
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Prior appearances of an identifier across all analysed cases (cross-case index).
+    
+    Matching ignores case and whitespace. Served from the index; no
+    statements need to be uploaded again.
+    """
+    try:
+        return service.prior_appearances(value, kind, exclude_case_id, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lookup failed: {str(e)}"
+        )
+
+@router.get("/analyze/{case_id}/repeat-identifiers", response_model=List[RepeatIdentifier])
+def get_repeat_identifiers(
+    case_id: str,
+    kind: Optional[str] = Query(None, pattern="^(account|device|reference)$"),
+    limit: int = Query(500, ge=1, le=5000),
+    service: FinancialService = Depends(get_financial_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Accounts, devices and reference numbers of this case that were also
+    seen in other cases (repeat-offender money mules), most shared first.
+    """
+    try:
+        return service.repeat_identifiers(case_id, kind, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lookup failed: {str(e)}"
+        )
+
 @router.post("/test-analyze")
 async def test_financial_analysis(
     service: FinancialService = Depends(get_financial_service),
@@ -11,6 +11,7 @@ from app.schemas.fir import (
 )
 # Import the EXPERT service factory
 from app.services.police.smart_fir import get_smart_fir_service, SmartFIRService
+from app.services.llm_gateway import get_llm_gateway
 from app.core.security import get_current_admin_user
 
 router = APIRouter() # Prefix is handled in api/v1/router.py
@@ -27,6 +28,8 @@ async def generate_fir(
     - Extracts entities (O(n) complexity)
     - Maps to BNS sections (Dict lookup)
     - Returns structured draft with confidence scores
+    - Responds with the regex-engine draft (enrichment_status=running);
+      the AI analysis replaces it in the background, see /fir/{fir_id}/enrichment
     """
     try:
         # The service now accepts the full request object
@@ -52,6 +55,22 @@ async def get_fir(
         )
     return fir
 
+@router.get("/fir/{fir_id}/enrichment", response_model=FIRResponse)
+async def wait_for_fir_enrichment(
+    fir_id: str,
+    timeout: float = Query(25.0, ge=0.0, le=60.0, description="Seconds to wait while the AI analysis is pending"),
+    service: SmartFIRService = Depends(get_smart_fir_service),
+    current_user = Depends(get_current_admin_user)
+):
+    """Long-poll: returns as soon as the FIR's AI analysis lands (or fails), else after `timeout`"""
+    fir = await service.wait_for_enrichment(fir_id, timeout)
+    if not fir:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="FIR not found"
+        )
+    return fir
+
 @router.put("/fir/{fir_id}", response_model=FIRResponse)
 async def update_fir(
     fir_id: str,
@@ -116,3 +135,10 @@ async def test_generate_fir(
     )
     
     return await service.generate_from_text(test_request)
+
+@router.get("/llm/stats")
+async def get_llm_stats(
+    current_user = Depends(get_current_admin_user)
+):
+    """LLM gateway state: circuit, in-flight calls, per-purpose latency and token counters"""
+    return get_llm_gateway().stats()
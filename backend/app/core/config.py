@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -21,6 +21,19 @@ class Settings(BaseSettings):
     
     # AI Keys
     OPENAI_API_KEY: str = ""
+    OPENAI_BASE_URL: Optional[str] = None  # e.g. http://127.0.0.1:8808/v1 for scripts/llm_stub_server.py
+
+    # LLM Gateway
+    LLM_MODEL: str = "gpt-4o"
+    LLM_MAX_CONCURRENCY: int = 8  # in-flight completions per worker
+    LLM_TIMEOUT: float = 60.0  # seconds per attempt
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5  # seconds; backoff is full jitter on base * 2^attempt
+    LLM_BREAKER_FAILURES: int = 5  # consecutive failures that open the circuit
+    LLM_BREAKER_RESET: float = 30.0  # seconds open before a trial call
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # least recently used entries evicted beyond this
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -39,5 +52,22 @@ class Settings(BaseSettings):
     MAX_DAILY_MINUTES: int = 330  # 5.5 hours
     LUNCH_BREAK_MINUTES: int = 60
 
+    # Financial Analysis
+    FINANCIAL_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    FINANCIAL_NETWORK_MAX_NODES: int = 500  # larger graphs are summarised in responses
+    FINANCIAL_NETWORK_MAX_EDGES: int = 2000
+    FINANCIAL_DETECTION_TIME_BUDGET: Optional[float] = 60.0  # seconds per request, None = unlimited
+    FINANCIAL_DETECTION_MAX_TIME_BUDGET: Optional[float] = 600.0  # cap on what a request may ask for
+    FINANCIAL_DETECTION_WORK_BUDGET: Optional[int] = None  # nodes + edges visited per request
+
+    # Case Linker
+    CASE_LINKER_CACHE_NODES: int = 100_000  # per-worker LRU of node adjacency lists
+    CASE_LINKER_MAX_FANOUT: int = 1000  # neighbours loaded per node; larger hubs are truncated
+    CASE_LINKER_MAX_NEIGHBOURHOOD: int = 5000  # nodes returned per analysis
+    CASE_LINKER_MAX_BATCH_NODES: int = 50_000  # nodes returned per batch analysis
+    CASE_SIMILARITY_MAX_CANDIDATES: int = 200  # LSH candidates scored per similar-case query
+    SUSPECT_RESOLUTION_THRESHOLD: float = 0.8  # combined match score needed to merge two mentions
+    SUSPECT_RESOLUTION_MAX_BLOCK: int = 200  # larger blocks (common names, shared plates) are not scored
+
 
 settings = Settings()
@@ -58,7 +58,7 @@ def init_db():
     Initialize database - create all tables
     Call this on application startup
     """
-    from app.models import user, audit  # Import all models here
+    from app.models import user, audit, financial_index, crime_graph, case_similarity, llm_cache  # Import all models here
     from app.models.case import Case
     Base.metadata.create_all(bind=engine)
 
@@ -66,12 +66,25 @@ def init_db():
     if settings.DATABASE_URL.startswith("sqlite"):
         from sqlalchemy import text
         with engine.connect() as conn:
-            try:
-                conn.execute(text("ALTER TABLE users ADD COLUMN date_of_birth TEXT"))
-                conn.commit()
-                print("Migration: added date_of_birth column to users")
-            except Exception:
-                pass  # Column already exists
+            for table, column in (("users", "date_of_birth"), ("cases", "enrichment_status"), ("cases", "draft_content")):
+                try:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} TEXT"))
+                    conn.commit()
+                    print(f"Migration: added {column} column to {table}")
+                except Exception:
+                    conn.rollback()  # Column already exists
+
+
+def dialect_insert(bind):
+    """
+    INSERT construct with on_conflict_do_update / on_conflict_do_nothing
+    for the bound database (SQLite or PostgreSQL)
+    """
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
 
 
 def get_db_session() -> Session:
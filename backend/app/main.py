@@ -10,6 +10,8 @@ from app.api.v1.router import api_router
 from app.core.config import settings
 from app.db.database import init_db
 from app.security import setup_rate_limiting
+from app.services.financial_service import financial_analyzer
+from app.services.police.smart_fir import get_smart_fir_service
 
 
 
@@ -30,12 +32,20 @@ async def lifespan(app: FastAPI):
     setup_rate_limiting(app)
     print("[STARTUP] Rate limiting configured")
     
+    # Finish AI enrichment of FIRs drafted before the last shutdown (claimed
+    # row by row, so each case is enriched by one worker only)
+    resumed = await get_smart_fir_service().resume_enrichment()
+    if resumed:
+        print(f"[STARTUP] Resumed AI enrichment for {resumed} FIRs")
+    
     print("[STARTUP] LegalOS 4.0 Ready!")
     
     yield
     
     # Shutdown
     print("[SHUTDOWN] Shutting down LegalOS 4.0...")
+    await get_smart_fir_service().release_enrichment()
+    financial_analyzer.shutdown()
 
 
 app = FastAPI(
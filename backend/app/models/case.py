@@ -28,6 +28,8 @@ class Case(Base):
     # AI Analysis (JSON)
     analysis_data = Column(JSON, nullable=True) # Stores analysis.json()
     confidence_score = Column(Float, default=0.0)
+    draft_content = Column(Text, nullable=True)  # latest FIR draft text (local, then LLM once enriched)
+    enrichment_status = Column(String, nullable=True)  # pending / running / enriched / failed (tiered Smart-FIR)
     
     # Meta
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,37 @@
+"""
+MinHash/LSH similar-case index (Skill 05)
+Per-case MinHash signatures and their LSH band buckets
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class CaseSignature(Base):
+    __tablename__ = "case_minhash_signatures"
+
+    case_id = Column(String, primary_key=True)  # cases.id
+    fir_number = Column(String, nullable=True, index=True)
+    signature = Column(LargeBinary, nullable=False)  # NUM_PERM little-endian uint32
+    shingles = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<CaseSignature({self.case_id}, shingles={self.shingles})>"
+
+
+class CaseLSHBucket(Base):
+    """
+    One row per (band, bucket) a case hashes into. Cases sharing a row in
+    any band are candidates; the primary key makes that an index lookup.
+    """
+    __tablename__ = "case_lsh_buckets"
+
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    case_id = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index('idx_lsh_case', 'case_id'),
+    )
@@ -0,0 +1,62 @@
+"""
+Crime graph store for the Case Linker (Skill 05)
+Cases, suspects and MOs as nodes; links stored as indexed adjacency rows
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class CrimeGraphNode(Base):
+    __tablename__ = "crime_graph_nodes"
+
+    id = Column(String(100), primary_key=True)  # FIR number, suspect id, MO id
+    type = Column(String(30), nullable=False)  # Case, Suspect, MO, ...
+    label = Column(String(255), nullable=False)
+    properties = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_crime_node_type_id', 'type', 'id'),  # per-type keyset scans
+        Index('idx_crime_node_updated', 'updated_at'),  # incremental component sync
+    )
+
+    def __repr__(self):
+        return f"<CrimeGraphNode({self.type}:{self.id})>"
+
+
+class CrimeGraphEdge(Base):
+    """
+    Undirected link stored once per endpoint, so the neighbours of any set
+    of nodes are one primary-key range scan (node_id IN ...).
+    """
+    __tablename__ = "crime_graph_adjacency"
+
+    node_id = Column(String(100), primary_key=True)
+    neighbour_id = Column(String(100), primary_key=True)
+
+    type = Column(String(30), nullable=False)  # Use PatternType
+    strength = Column(String(20), nullable=False)  # Use LinkStrength
+    properties = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_crime_edge_created', 'created_at'),  # incremental component sync
+    )
+
+    def __repr__(self):
+        return f"<CrimeGraphEdge({self.node_id}-{self.neighbour_id}, {self.type})>"
+
+
+class CrimeGraphState(Base):
+    """
+    Single row holding the graph version. Every change to existing nodes
+    or links bumps it, so each worker can tell when its cache is stale.
+    """
+    __tablename__ = "crime_graph_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,56 @@
+"""
+Cross-case identifier index for financial analyses (Skill 02)
+Inverted index: account number / device id / reference number -> cases that saw it
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class IdentifierKind:
+    ACCOUNT = "account"
+    DEVICE = "device"
+    REFERENCE = "reference"
+
+    ALL = (ACCOUNT, DEVICE, REFERENCE)
+
+
+class FinancialIdentifierSighting(Base):
+    """
+    One row per (identifier, case). Re-analysing a case updates its row in
+    place, so the table grows with distinct identifiers per case, not with
+    the number of analyses.
+    """
+    __tablename__ = "financial_identifier_sightings"
+
+    id = Column(Integer, primary_key=True)
+
+    kind = Column(String(20), nullable=False)  # Use IdentifierKind
+    value = Column(String(255), nullable=False)  # Normalised (see normalise_identifier)
+    case_id = Column(String(100), nullable=False)
+
+    # Latest analysis of the case that saw the identifier
+    analysis_id = Column(String(100), nullable=True)
+    analyses = Column(Integer, default=1, nullable=False)
+    transactions = Column(Integer, default=0, nullable=False)  # In the latest analysis
+
+    # Transaction dates the identifier was seen between (across analyses)
+    first_transaction = Column(DateTime, nullable=True)
+    last_transaction = Column(DateTime, nullable=True)
+
+    first_indexed = Column(DateTime, default=func.now(), nullable=False)
+    last_indexed = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('kind', 'value', 'case_id', name='uq_identifier_case'),
+        Index('idx_identifier_value', 'value', 'kind'),
+        Index('idx_identifier_case', 'case_id'),
+    )
+
+    def __repr__(self):
+        return f"<FinancialIdentifierSighting({self.kind}={self.value}, case={self.case_id})>"
+
+
+def normalise_identifier(value: str) -> str:
+    """Case- and whitespace-insensitive form used for storage and lookup"""
+    return "".join(value.split()).upper()
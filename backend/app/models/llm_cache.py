@@ -0,0 +1,34 @@
+"""
+LLM response cache (shared by Smart-FIR and Charge Sheet)
+One row per completed prompt, keyed by a hash of model, template version
+and normalised input
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 hex of the cache key parts
+    purpose = Column(String(50), nullable=False)  # smart_fir, chargesheet, ...
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(50), nullable=False)
+    content = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    size = Column(Integer, nullable=False)  # bytes of content, for size-based eviction
+    hits = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    last_used_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_llm_cache_expires', 'expires_at'),  # TTL sweep
+        Index('idx_llm_cache_last_used', 'last_used_at'),  # least-recently-used eviction
+    )
+
+    def __repr__(self):
+        return f"<LLMCacheEntry({self.purpose}:{self.key[:12]}, hits={self.hits})>"
@@ -43,6 +43,7 @@ class CrimeLink(BaseModel):
 class CrimeGraph(BaseModel):
     nodes: List[CrimeNode]
     links: List[CrimeLink]
+    truncated: bool = False  # hub fan-out or neighbourhood size limit reached
 
 
 class PatternAlert(BaseModel):
@@ -68,3 +69,87 @@ class CaseLinkResponse(BaseModel):
     graph: CrimeGraph
     patterns: List[PatternAlert]
     similar_cases: List[Dict[str, Any]]
+
+
+class BatchCaseLinkRequest(BaseModel):
+    case_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    include_similar_cases: bool = False  # one batched similar-case lookup for all cases
+    min_confidence: float = 0.6  # patterns below this confidence are left out
+
+
+class CaseLinkSummary(BaseModel):
+    """One requested case within a batch analysis"""
+    case_id: str
+    suspects: List[str]
+    modus_operandi: List[str]
+    linked_cases: List[str]  # cases sharing a suspect or MO with this one
+    pattern_ids: List[str]
+    similar_cases: List[Dict[str, Any]] = []
+
+
+class BatchCaseLinkResponse(BaseModel):
+    case_ids: List[str]
+    graph: CrimeGraph  # union of the neighbourhoods, each node and link once
+    patterns: List[PatternAlert]
+    cases: List[CaseLinkSummary]
+    elapsed_ms: float
+
+
+class SuspectMention(BaseModel):
+    """A suspect as written in one or more FIRs"""
+    id: Optional[str] = None  # graph node id; generated for mentions not in the graph
+    name: str = Field(..., min_length=1)
+    case_ids: List[str] = []
+    description: str = ""  # free text searched for phone numbers and vehicle plates
+    phones: List[str] = []
+    plates: List[str] = []
+
+
+class SuspectResolutionRequest(BaseModel):
+    mentions: List[SuspectMention] = []  # resolved together with the graph's suspects
+    include_graph: bool = True
+    persist: bool = True  # write merged identities into the case graph
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+
+
+class ResolvedSuspect(BaseModel):
+    id: str
+    label: str
+    mention_ids: List[str]
+    names: List[str]
+    aliases: List[str]
+    phones: List[str]
+    plates: List[str]
+    case_ids: List[str]
+    confidence: float  # weakest pairwise match that joined the identity
+    reasons: List[str]
+
+
+class SuspectResolutionResponse(BaseModel):
+    identities: List[ResolvedSuspect]
+    mentions: int
+    blocks: int
+    skipped_blocks: int  # blocks over the size limit, not compared
+    pairs_scored: int
+    pairs_naive: int  # comparisons an all-pairs pass would have made
+    persisted: bool
+    elapsed_ms: float
+
+
+class CrimeCluster(BaseModel):
+    """A connected component of the case graph"""
+    id: str  # smallest node id in the cluster
+    size: int
+    cases: int
+    suspects: int
+    mos: int
+    type_counts: Dict[str, int]
+    sample_cases: List[str]
+
+
+class CrimeClusterList(BaseModel):
+    clusters: List[CrimeCluster]
+    nodes: int  # nodes tracked
+    multi_node_clusters: int
+    graph_version: int
+    elapsed_ms: float
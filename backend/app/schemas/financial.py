@@ -96,6 +96,70 @@ class NetworkEdge(BaseModel):
 class FinancialNetwork(BaseModel):
     nodes: List[NetworkNode]
     edges: List[NetworkEdge]
+    # Level of detail: set when the graph was summarised for display
+    truncated: bool = False
+    hidden_nodes: int = 0
+    hidden_edges: int = 0
+    collapsed_nodes: int = 0
+
+
+class NetworkPage(BaseModel):
+    """One page of an account's neighbourhood ("expand this node")"""
+    account: str
+    direction: str  # in, out, both
+    nodes: List[NetworkNode]
+    edges: List[NetworkEdge]
+    total: int
+    offset: int
+    limit: int
+    next_offset: Optional[int] = None
+
+
+class DetectorStatus(str, Enum):
+    COMPLETE = "complete"
+    INCOMPLETE = "incomplete"  # stopped by the time/work budget; alerts so far are kept
+    SKIPPED = "skipped"  # budget already spent
+    FAILED = "failed"
+
+
+class DetectorRun(BaseModel):
+    """Cost report for one detector in an analysis"""
+    name: str
+    status: DetectorStatus
+    elapsed_ms: float = 0.0
+    alerts: int = 0
+    nodes_visited: int = 0
+    edges_visited: int = 0
+    error: Optional[str] = None
+
+
+class IdentifierAppearance(BaseModel):
+    """A case in which an account, device or reference number was seen"""
+    kind: str  # account, device, reference
+    value: str
+    case_id: str
+    analysis_id: Optional[str] = None  # latest analysis of the case
+    analyses: int
+    transactions: int
+    first_transaction: Optional[datetime] = None
+    last_transaction: Optional[datetime] = None
+    first_indexed: datetime
+    last_indexed: datetime
+
+
+class IdentifierLookupResponse(BaseModel):
+    value: str  # normalised
+    kind: Optional[str] = None
+    appearances: List[IdentifierAppearance]
+    total_cases: int
+    elapsed_ms: float
+
+
+class RepeatIdentifier(BaseModel):
+    """An identifier of one case that also appears in other cases"""
+    kind: str
+    value: str
+    other_cases: List[IdentifierAppearance]
 
 
 class InvestigationLead(BaseModel):
@@ -114,6 +178,17 @@ class FinancialAnalysisRequest(BaseModel):
     investigation_period_days: int = 90
     threshold_amount: float = 100000.0
     focus_areas: Optional[List[str]] = []
+    time_budget_seconds: Optional[float] = Field(None, gt=0)  # detection budget (default: server setting)
+    work_budget: Optional[int] = Field(None, gt=0)  # max nodes + edges visited by detectors
+
+
+class FinancialAppendRequest(BaseModel):
+    """New statement tranche for an existing case graph"""
+    transactions: List[Transaction]
+    accounts: Optional[List[Account]] = []
+    threshold_amount: float = 100000.0
+    time_budget_seconds: Optional[float] = Field(None, gt=0)
+    work_budget: Optional[int] = Field(None, gt=0)
 
 
 class FinancialAnalysisResponse(BaseModel):
@@ -126,6 +201,8 @@ class FinancialAnalysisResponse(BaseModel):
     metrics: Dict[str, Any]
     generated_at: datetime
     summary: str
+    complete: bool = True  # False if any detector ran out of budget or failed
+    detectors: List[DetectorRun] = []
 
 
 class TransactionPattern(BaseModel):
@@ -16,6 +16,13 @@ class FIRStatus(str, Enum):
     REJECTED = "rejected"
 
 
+class EnrichmentStatus(str, Enum):
+    PENDING = "pending"  # local regex draft stored, waiting for a worker to run the LLM analysis
+    RUNNING = "running"  # claimed by a worker, LLM analysis in flight
+    ENRICHED = "enriched"  # stored analysis is the LLM's
+    FAILED = "failed"  # LLM unavailable; the local analysis stands
+
+
 class CrimeSeverity(str, Enum):
     MINOR = "minor"
     MODERATE = "moderate"
@@ -71,6 +78,8 @@ class FIRResponse(BaseModel):
     reviewed_by: Optional[str] = None
     reviewed_at: Optional[datetime] = None
     confidence_score: float = Field(..., ge=0.0, le=1.0)
+    cached: bool = False  # LLM analysis replayed from the response cache
+    enrichment_status: Optional[EnrichmentStatus] = None
 
 
 class FIRUpdateRequest(BaseModel):
@@ -3,13 +3,23 @@ Case Linker Service - Skill 05
 Advanced crime pattern detection using NetworkX
 """
 import uuid
+import hashlib
+import time
 import networkx as nx
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional, Tuple
 from datetime import datetime
+from starlette.concurrency import run_in_threadpool
 from app.schemas.case_linker import (
     CrimeGraph, CrimeNode, CrimeLink, PatternAlert,
-    CaseLinkRequest, CaseLinkResponse, PatternType, LinkStrength
+    CaseLinkRequest, CaseLinkResponse, PatternType, LinkStrength,
+    SuspectResolutionRequest, SuspectResolutionResponse, ResolvedSuspect,
+    CrimeCluster, CrimeClusterList, BatchCaseLinkRequest, BatchCaseLinkResponse, CaseLinkSummary
 )
+from app.core.config import settings
+from app.services.crime_graph_store import CrimeGraphStore
+from app.services.crime_graph_components import Cluster, CrimeGraphComponents
+from app.services.case_similarity import CaseSimilarityIndex, get_case_similarity_index
+from app.services.suspect_resolution import Identity, Mention, MentionParser, SuspectResolver
 
 
 class CaseLinkerService:
@@ -17,55 +27,134 @@ class CaseLinkerService:
     Analyzes crime data to find hidden connections
     """
     
-    def __init__(self):
-        self.graph = nx.Graph()
-        # In a real app, this would load from DB
-        self._initialize_mock_graph()
+    def __init__(self, store: Optional[CrimeGraphStore] = None,
+                 similarity: Optional[CaseSimilarityIndex] = None):
+        # Case/suspect/MO graph in the application database, shared by all workers
+        self.store = store or CrimeGraphStore()
+        # MinHash/LSH index over stored complaints
+        self.similarity = similarity or get_case_similarity_index()
+        self.mention_parser = MentionParser()
+        # Union-find over every link: live clusters for serial-offender analysis
+        self.components = CrimeGraphComponents(self.store)
+        self._seeded = False
     
     def _initialize_mock_graph(self):
-        """Pre-load some dummy data for demo"""
-        # Cases
-        self.graph.add_node("FIR-2025-001", type="Case", label="Theft at Sector 4")
-        self.graph.add_node("FIR-2025-002", type="Case", label="Burglary at Sector 5")
-        self.graph.add_node("FIR-2025-003", type="Case", label="Snatching at Market")
-        
-        # Suspects
-        self.graph.add_node("SUS-001", type="Suspect", label="Raju 'Blade'")
-        self.graph.add_node("SUS-002", type="Suspect", label="Unknown Biker")
-        
-        # MOs
-        self.graph.add_node("MO-001", type="MO", label="Night time entry")
-        self.graph.add_node("MO-002", type="MO", label="Bike borne snatching")
+        """Seed dummy data for demo into an empty graph store"""
+        if self._seeded:
+            return
+        self._seeded = True
+        if not self.store.is_empty():
+            return
+        self.store.add_nodes([
+            # Cases
+            ("FIR-2025-001", "Case", "Theft at Sector 4", None),
+            ("FIR-2025-002", "Case", "Burglary at Sector 5", None),
+            ("FIR-2025-003", "Case", "Snatching at Market", None),
+            
+            # Suspects
+            ("SUS-001", "Suspect", "Raju 'Blade'", None),
+            ("SUS-002", "Suspect", "Unknown Biker", None),
+            
+            # MOs
+            ("MO-001", "MO", "Night time entry", None),
+            ("MO-002", "MO", "Bike borne snatching", None),
+        ])
         
         # Links
-        self.graph.add_edge("FIR-2025-001", "SUS-001", type=PatternType.RECURRING_SUSPECT, strength=LinkStrength.HIGH)
-        self.graph.add_edge("FIR-2025-002", "SUS-001", type=PatternType.RECURRING_SUSPECT, strength=LinkStrength.MEDIUM)
+        self.store.add_links([
+            ("FIR-2025-001", "SUS-001", PatternType.RECURRING_SUSPECT, LinkStrength.HIGH, None),
+            ("FIR-2025-002", "SUS-001", PatternType.RECURRING_SUSPECT, LinkStrength.MEDIUM, None),
+            
+            ("FIR-2025-001", "MO-001", PatternType.MODUS_OPERANDI, LinkStrength.CONFIRMED, None),
+            ("FIR-2025-002", "MO-001", PatternType.MODUS_OPERANDI, LinkStrength.CONFIRMED, None),
+            
+            ("FIR-2025-003", "MO-002", PatternType.MODUS_OPERANDI, LinkStrength.HIGH, None),
+            ("FIR-2025-003", "SUS-002", PatternType.RECURRING_SUSPECT, LinkStrength.LOW, None),
+        ])
+
+    def _neighbourhood(self, case_id: str):
+        self._initialize_mock_graph()
         
-        self.graph.add_edge("FIR-2025-001", "MO-001", type=PatternType.MODUS_OPERANDI, strength=LinkStrength.CONFIRMED)
-        self.graph.add_edge("FIR-2025-002", "MO-001", type=PatternType.MODUS_OPERANDI, strength=LinkStrength.CONFIRMED)
+        # If case not in graph, add main node essentially
+        self.store.ensure_node(case_id, "Case", f"Investigation {case_id}")
         
-        self.graph.add_edge("FIR-2025-003", "MO-002", type=PatternType.MODUS_OPERANDI, strength=LinkStrength.HIGH)
-        self.graph.add_edge("FIR-2025-003", "SUS-002", type=PatternType.RECURRING_SUSPECT, strength=LinkStrength.LOW)
+        # 2-hop neighbours: one indexed fetch per hop, hot nodes from the LRU
+        return self.store.neighbourhood(case_id, hops=2)
 
     async def analyze_case(self, request: CaseLinkRequest) -> CaseLinkResponse:
         """Analyze a specific case for links"""
         case_id = request.case_id
         
-        # If case not in graph, add main node essentially
-        if case_id not in self.graph:
-            self.graph.add_node(case_id, type="Case", label=f"Investigation {case_id}")
-            
         # 1. Traversal Analysis (2-hop neighbors)
-        subgraph_nodes = set([case_id])
-        file_neighbors = list(self.graph.neighbors(case_id))
-        subgraph_nodes.update(file_neighbors)
+        subgraph, truncated = await run_in_threadpool(self._neighbourhood, case_id)
         
-        for n in file_neighbors:
-            subgraph_nodes.update(self.graph.neighbors(n))
+        # 2. Build Response Graph
+        graph = self._graph_response(subgraph, truncated)
             
-        subgraph = self.graph.subgraph(subgraph_nodes)
+        # 3. Detect Patterns
+        patterns = self._detect_patterns(subgraph, case_id)
         
-        # 2. Build Response Graph
+        # 4. Find Similar Cases
+        similar_cases = await run_in_threadpool(self._find_similar_cases, case_id)
+        
+        return CaseLinkResponse(
+            case_id=case_id,
+            graph=graph,
+            patterns=patterns,
+            similar_cases=similar_cases
+        )
+
+    async def analyze_cases(self, request: BatchCaseLinkRequest) -> BatchCaseLinkResponse:
+        """
+        Analyze many cases in one pass: their neighbourhoods are fetched
+        together and merged, so shared suspects, MOs and cases are loaded,
+        returned and checked for patterns once.
+        """
+        started = time.perf_counter()
+        case_ids = list(dict.fromkeys(request.case_ids))
+        subgraph, truncated = await run_in_threadpool(self._neighbourhoods, case_ids)
+        graph = self._graph_response(subgraph, truncated)
+        patterns = [alert for alert in self._detect_patterns(subgraph, None)
+                    if alert.confidence_score >= request.min_confidence]
+        similar = (await run_in_threadpool(self._find_similar_cases_many, case_ids)
+                   if request.include_similar_cases else {})
+
+        patterns_by_case: Dict[str, List[str]] = {}
+        for alert in patterns:
+            for linked in alert.linked_cases:
+                patterns_by_case.setdefault(linked, []).append(alert.id)
+
+        cases = []
+        for case_id in case_ids:
+            neighbours = [(n, subgraph.nodes[n].get("type")) for n in subgraph.neighbors(case_id)]
+            shared = [n for n, t in neighbours if t in ("Suspect", "MO")]
+            linked = dict.fromkeys(other for n in shared for other in subgraph.neighbors(n)
+                                   if other != case_id and subgraph.nodes[other].get("type") == "Case")
+            cases.append(CaseLinkSummary(
+                case_id=case_id,
+                suspects=[n for n, t in neighbours if t == "Suspect" and not self._is_merged(subgraph, n)],
+                modus_operandi=[n for n, t in neighbours if t == "MO"],
+                linked_cases=list(linked),
+                pattern_ids=patterns_by_case.get(case_id, []),
+                similar_cases=similar.get(case_id, [])
+            ))
+
+        return BatchCaseLinkResponse(
+            case_ids=case_ids,
+            graph=graph,
+            patterns=patterns,
+            cases=cases,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+
+    def _neighbourhoods(self, case_ids: List[str]):
+        self._initialize_mock_graph()
+        self.store.ensure_nodes((case_id, "Case", f"Investigation {case_id}", None) for case_id in case_ids)
+        limit = min(settings.CASE_LINKER_MAX_BATCH_NODES, self.store.max_neighbourhood * len(case_ids))
+        return self.store.neighbourhoods(case_ids, hops=2, max_nodes=limit)
+
+    @staticmethod
+    def _graph_response(subgraph: nx.Graph, truncated: bool) -> CrimeGraph:
         nodes = []
         links = []
         
@@ -86,35 +175,31 @@ class CaseLinkerService:
                 description=f"Linked via {data.get('type')}",
                 confidence_score=0.85 # Mock score
             ))
-            
-        # 3. Detect Patterns
-        patterns = self._detect_patterns(subgraph, case_id)
-        
-        # 4. Find Similar Cases
-        similar_cases = self._find_similar_cases(case_id)
-        
-        return CaseLinkResponse(
-            case_id=case_id,
-            graph=CrimeGraph(nodes=nodes, links=links),
-            patterns=patterns,
-            similar_cases=similar_cases
-        )
+
+        return CrimeGraph(nodes=nodes, links=links, truncated=truncated)
     
-    def _detect_patterns(self, subgraph: nx.Graph, focal_case: str) -> List[PatternAlert]:
+    @staticmethod
+    def _is_merged(subgraph: nx.Graph, node: str) -> bool:
+        """A suspect mention whose resolved identity is also in the subgraph"""
+        identity = subgraph.nodes[node].get("merged_into")
+        return identity is not None and identity in subgraph
+
+    def _detect_patterns(self, subgraph: nx.Graph, focal_case: Optional[str]) -> List[PatternAlert]:
         """Detect automated patterns in subgraph"""
         alerts = []
         
-        # Check for Common Suspect
-        suspects = [n for n, d in subgraph.nodes(data=True) if d.get("type") == "Suspect"]
+        # Check for Common Suspect (a merged mention is reported through its identity)
+        suspects = [n for n, d in subgraph.nodes(data=True)
+                    if d.get("type") == "Suspect" and not self._is_merged(subgraph, n)]
         for suspect in suspects:
             degree = subgraph.degree(suspect)
             if degree >= 2:
                 alerts.append(PatternAlert(
                     id=str(uuid.uuid4()),
                     pattern_type=PatternType.RECURRING_SUSPECT,
-                    title=f"Serial Offender Detected: {self.graph.nodes[suspect].get('label')}",
+                    title=f"Serial Offender Detected: {subgraph.nodes[suspect].get('label')}",
                     description=f"Suspect linked to {degree} cases in this cluster",
-                    linked_cases=[n for n in subgraph.neighbors(suspect) if self.graph.nodes[n].get("type") == "Case"],
+                    linked_cases=[n for n in subgraph.neighbors(suspect) if subgraph.nodes[n].get("type") == "Case"],
                     suspects_involved=[suspect],
                     confidence_score=0.9,
                     detected_at=datetime.now(),
@@ -129,9 +214,9 @@ class CaseLinkerService:
                 alerts.append(PatternAlert(
                     id=str(uuid.uuid4()),
                     pattern_type=PatternType.MODUS_OPERANDI,
-                    title=f"MO Pattern: {self.graph.nodes[mo].get('label')}",
+                    title=f"MO Pattern: {subgraph.nodes[mo].get('label')}",
                     description=f"Distinctive MO observed in multiple investigations",
-                    linked_cases=[n for n in subgraph.neighbors(mo) if self.graph.nodes[n].get("type") == "Case"],
+                    linked_cases=[n for n in subgraph.neighbors(mo) if subgraph.nodes[n].get("type") == "Case"],
                     suspects_involved=[],
                     confidence_score=0.75,
                     detected_at=datetime.now(),
@@ -140,13 +225,143 @@ class CaseLinkerService:
                 
         return alerts
 
-    def _find_similar_cases(self, case_id: str) -> List[Dict]:
-        """Find cases with similar attributes (e.g. text similarity)"""
-        # Mock implementation
-        return [
-            {"id": "FIR-2024-889", "similarity": 0.88, "reason": "Same location type"},
-            {"id": "FIR-2024-912", "similarity": 0.76, "reason": "Similar time of day"}
-        ]
+    def _find_similar_cases(self, case_id: str, k: int = 10) -> List[Dict]:
+        """Find cases with similar complaint text and entities (MinHash/LSH)"""
+        return self.similarity.similar_cases(case_id, k=k)
+
+    def _find_similar_cases_many(self, case_ids: List[str], k: int = 10) -> Dict[str, List[Dict]]:
+        """_find_similar_cases for a batch, in one set of LSH lookups"""
+        return self.similarity.similar_cases_many(case_ids, k=k)
+
+    async def top_clusters(self, limit: int = 10, min_cases: int = 2) -> CrimeClusterList:
+        """Largest connected groups of cases, read from the component tracker"""
+        return await run_in_threadpool(self._top_clusters, limit, min_cases)
+
+    def _top_clusters(self, limit: int, min_cases: int) -> CrimeClusterList:
+        started = time.perf_counter()
+        self._initialize_mock_graph()
+        clusters = self.components.top_clusters(limit, min_cases)
+        stats = self.components.stats()
+        return CrimeClusterList(
+            clusters=[self._cluster_response(c) for c in clusters],
+            nodes=stats["nodes"],
+            multi_node_clusters=stats["clusters"],
+            graph_version=stats["version"],
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+
+    async def cluster_of(self, node_id: str) -> Optional[CrimeCluster]:
+        """Cluster containing a case, suspect or MO; None if the node is not in the graph"""
+        self._initialize_mock_graph()
+        cluster = await run_in_threadpool(self.components.cluster_of, node_id)
+        return self._cluster_response(cluster) if cluster else None
+
+    @staticmethod
+    def _cluster_response(cluster: Cluster) -> CrimeCluster:
+        return CrimeCluster(
+            id=cluster.anchor,
+            size=cluster.size,
+            cases=cluster.case_count,
+            suspects=cluster.counts.get("Suspect", 0),
+            mos=cluster.counts.get("MO", 0),
+            type_counts={t: n for t, n in cluster.counts.items() if n},
+            sample_cases=cluster.cases
+        )
+
+    async def resolve_suspects(self, request: SuspectResolutionRequest) -> SuspectResolutionResponse:
+        """Merge suspect mentions that refer to the same person across FIRs"""
+        return await run_in_threadpool(self._resolve_suspects, request)
+
+    def _resolve_suspects(self, request: SuspectResolutionRequest) -> SuspectResolutionResponse:
+        started = time.perf_counter()
+        mentions, previous = self._graph_mentions() if request.include_graph else ([], {})
+        for m in request.mentions:
+            mention_id = m.id or "MENTION-" + hashlib.sha1(
+                "|".join([m.name, *m.case_ids]).encode()).hexdigest()[:12].upper()
+            mentions.append(self.mention_parser.parse(mention_id, m.name, m.case_ids, m.description,
+                                                      m.phones, m.plates))
+        resolver = SuspectResolver() if request.threshold is None else SuspectResolver(threshold=request.threshold)
+        identities, stats = resolver.resolve(mentions)
+        for ident in identities:
+            # Keep the node id of an identity written by an earlier run
+            earlier = sorted({previous[m.id] for m in ident.mentions if m.id in previous})
+            if earlier:
+                ident.id = earlier[0]
+        if request.persist and identities:
+            self._persist_identities(identities)
+        return SuspectResolutionResponse(
+            identities=[ResolvedSuspect(
+                id=ident.id,
+                label=ident.label,
+                mention_ids=[m.id for m in ident.mentions],
+                names=sorted({m.name for m in ident.mentions}),
+                aliases=sorted({a for m in ident.mentions for a in m.aliases}),
+                phones=sorted({p for m in ident.mentions for p in m.phones}),
+                plates=sorted({p for m in ident.mentions for p in m.plates}),
+                case_ids=ident.case_ids,
+                confidence=ident.confidence,
+                reasons=ident.reasons
+            ) for ident in identities],
+            mentions=stats.mentions,
+            blocks=stats.blocks,
+            skipped_blocks=stats.skipped_blocks,
+            pairs_scored=stats.pairs_scored,
+            pairs_naive=stats.pairs_naive,
+            persisted=request.persist and bool(identities),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+
+    def _graph_mentions(self) -> Tuple[List[Mention], Dict[str, str]]:
+        """
+        Suspect nodes as mentions (their cases are the RECURRING_SUSPECT
+        neighbours), and the identity an earlier run resolved each one to
+        """
+        self._initialize_mock_graph()
+        mentions, previous = [], {}
+        for batch in self.store.iter_nodes("Suspect"):
+            for node_id, entry in batch:
+                props = entry.node or {}
+                if props.get("resolved"):
+                    for mention_id in props.get("resolved_from", []):
+                        previous[mention_id] = min(previous.get(mention_id, node_id), node_id)
+                    continue
+                cases = [link.neighbour for link in entry.links if link.type == PatternType.RECURRING_SUSPECT]
+                mentions.append(self.mention_parser.parse(
+                    node_id, props.get("label", node_id), cases, props.get("description", ""),
+                    props.get("phones", []), props.get("plates", [])
+                ))
+        return mentions, previous
+
+    def _persist_identities(self, identities: List[Identity]):
+        """
+        One resolved Suspect node per identity, linked to every case its
+        mentions appear in. Mention nodes already in the graph keep their
+        links and are marked merged_into the identity, so pattern detection
+        counts the person once.
+        """
+        merged_into = {m.id: ident.id for ident in identities for m in ident.mentions}
+        nodes, links = [], []
+        for mention_id, entry in self.store.adjacency(merged_into).items():
+            props = entry.node or {}
+            if props.get("type") != "Suspect" or props.get("resolved"):
+                continue
+            extra = {k: v for k, v in props.items() if k not in ("type", "label")}
+            nodes.append((mention_id, "Suspect", props.get("label", mention_id),
+                          {**extra, "merged_into": merged_into[mention_id]}))
+        for ident in identities:
+            nodes.append((ident.id, "Suspect", ident.label, {
+                "resolved": True,
+                "resolved_from": [m.id for m in ident.mentions],
+                "aliases": sorted({a for m in ident.mentions for a in m.aliases}),
+                "phones": sorted({p for m in ident.mentions for p in m.phones}),
+                "plates": sorted({p for m in ident.mentions for p in m.plates}),
+                "confidence": ident.confidence,
+            }))
+            strength = LinkStrength.HIGH if ident.confidence >= 0.9 else LinkStrength.MEDIUM
+            links.extend((case_id, ident.id, PatternType.RECURRING_SUSPECT, strength,
+                          {"resolved": True, "reasons": ident.reasons}) for case_id in ident.case_ids)
+        self.store.add_nodes(nodes)
+        self.store.add_links(links)
 
 
 # Singleton
@@ -3,17 +3,18 @@ Charge Sheet Service - Skill 06
 Automates the creation of the Final Report under BNSS using OpenAI
 """
 import uuid
-import json
-import openai
 from datetime import datetime
 from typing import List, Optional, Dict
-from app.core.config import settings
 from app.schemas.chargesheet import (
     ChargeSheet, ChargeSheetCreate, ChargeSheetUpdate,
     ChargeSheetStatus, AccusedDetails, OffenseSection,
     WitnessSummary, EvidenceSummary
 )
 from app.services.police.smart_fir import get_smart_fir_service
+from app.services.llm_gateway import get_llm_gateway
+
+# Bump whenever the prompt below changes: cached answers are keyed by it
+CHARGESHEET_PROMPT_VERSION = "chargesheet-v1"
 
 class ChargeSheetService:
     """
@@ -22,10 +23,7 @@ class ChargeSheetService:
     
     def __init__(self):
         self.repository: Dict[str, ChargeSheet] = {}
-        api_key = settings.OPENAI_API_KEY
-        if not api_key:
-            print("WARNING: OPENAI_API_KEY not set. Charge Sheet generation will fail.")
-        self.client = openai.OpenAI(api_key=api_key)
+        self.llm = get_llm_gateway()
         
     async def generate_draft(self, fir_id: str, user: dict) -> ChargeSheet:
         """
@@ -46,6 +44,7 @@ class ChargeSheetService:
             fir_context = f"FIR ID: {fir_id} (Details not found, generate generic template)"
 
         # 2. Generate content via OpenAI
+        cached = False
         try:
             system_prompt = """You are an expert Public Prosecutor and Police IO. 
             Draft a Charge Sheet (Final Report) under BNSS based on the provided FIR context.
@@ -59,17 +58,11 @@ class ChargeSheetService:
             - evidence_list: List of {description, seizure_memo_ref}.
             """
             
-            completion = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Context:\n{fir_context}"}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3
-            )
-            
-            data = json.loads(completion.choices[0].message.content)
+            result = await self.llm.complete_json(system_prompt, f"Context:\n{fir_context}",
+                                                  purpose="chargesheet", temperature=0.3,
+                                                  prompt_version=CHARGESHEET_PROMPT_VERSION)
+            data = result.json()
+            cached = result.cached
             
             # Map JSON to Objects
             offenses = [OffenseSection(**o) for o in data.get("offenses", [])]
@@ -114,7 +107,8 @@ class ChargeSheetService:
             investigating_officer=user.get("full_name", "Unknown IO"),
             status=ChargeSheetStatus.DRAFT,
             created_at=datetime.now(),
-            updated_at=datetime.now()
+            updated_at=datetime.now(),
+            metadata={"llm_cached": cached}
         )
         
         self.repository[draft_id] = draft
@@ -0,0 +1,165 @@
+"""
+Crime Graph Components - Skill 27
+Live connected components of the case graph for serial-offender analysis
+
+Cases joined through shared suspects or MOs form one cluster. Links are
+only ever added, so the clusters are kept in a union-find structure:
+each new link is one union, and membership and size are a find away. Each
+cluster root also carries its type counts, its case ids and its smallest
+node id (a stable cluster id). A lazily-pruned heap keyed by case count
+serves the largest clusters without touching the graph.
+
+The first read scans the node and link tables once. Later reads check the
+graph version and, if anything changed, fold in only the rows written
+since the last sync, whichever worker wrote them.
+"""
+import heapq
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.services.crime_graph_store import CrimeGraphStore
+from app.services.disjoint_set import DisjointSet
+
+# Re-read rows this far behind the last sync: a transaction that commits
+# after the sync may carry a slightly older timestamp. Unions are idempotent.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+@dataclass
+class Cluster:
+    """Aggregates kept on a union-find root"""
+    anchor: str  # smallest node id, the cluster id
+    size: int = 1
+    counts: Dict[str, int] = field(default_factory=dict)
+    cases: List[str] = field(default_factory=list)
+
+    @property
+    def case_count(self) -> int:
+        return self.counts.get("Case", 0)
+
+
+class CrimeGraphComponents:
+    def __init__(self, store: CrimeGraphStore):
+        self.store = store
+        self._sets = DisjointSet[str]()
+        self._types: Dict[str, str] = {}
+        self._clusters: Dict[str, Cluster] = {}  # root -> aggregates, multi-node clusters only
+        self._heap: List[Tuple[int, int, str, str]] = []  # (-cases, -size, anchor, root), stale entries skipped
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._synced_at: Optional[datetime] = None
+
+    # ── Maintenance ──
+
+    def sync(self):
+        """Fold in links and node types written since the last sync (everything on first use)"""
+        version, now = self.store.clock()
+        with self._lock:
+            if version == self._version:
+                return
+            since = self._synced_at - SYNC_OVERLAP if self._synced_at else None
+            for batch in self.store.scan_node_types(since):
+                for node_id, node_type in batch:
+                    self._set_type(node_id, node_type)
+            for batch in self.store.scan_links(since):
+                for u, v in batch:
+                    self._union(u, v)
+            self._version, self._synced_at = version, now
+
+    def _cluster(self, root: str) -> Cluster:
+        cluster = self._clusters.get(root)
+        if cluster is None:
+            node_type = self._types.get(root)
+            cluster = Cluster(anchor=root, counts={node_type: 1} if node_type else {},
+                              cases=[root] if node_type == "Case" else [])
+        return cluster
+
+    def _set_type(self, node_id: str, node_type: str):
+        old = self._types.get(node_id)
+        if old == node_type:
+            return
+        self._sets.add(node_id)
+        self._types[node_id] = node_type
+        root = self._sets.find(node_id)
+        cluster = self._clusters.get(root)
+        if cluster is None:
+            return  # singleton: aggregates are derived from its type on demand
+        if old:
+            cluster.counts[old] -= 1
+            if old == "Case":
+                cluster.cases.remove(node_id)
+        cluster.counts[node_type] = cluster.counts.get(node_type, 0) + 1
+        if node_type == "Case":
+            cluster.cases.append(node_id)
+        self._push(root, cluster)
+
+    def _union(self, u: str, v: str):
+        ru, rv = self._sets.find(u), self._sets.find(v)
+        if ru == rv:
+            return
+        a, b = self._cluster(ru), self._cluster(rv)
+        self._clusters.pop(ru, None)
+        self._clusters.pop(rv, None)
+        root = self._sets.union(ru, rv)
+        big, small = (a, b) if len(a.cases) >= len(b.cases) else (b, a)
+        big.cases.extend(small.cases)  # small-to-large: O(n log n) copying in total
+        for node_type, count in small.counts.items():
+            big.counts[node_type] = big.counts.get(node_type, 0) + count
+        big.size = a.size + b.size
+        big.anchor = min(a.anchor, b.anchor)
+        self._clusters[root] = big
+        self._push(root, big)
+
+    def _push(self, root: str, cluster: Cluster):
+        heapq.heappush(self._heap, (-cluster.case_count, -cluster.size, cluster.anchor, root))
+        if len(self._heap) > 4 * len(self._clusters) + 64:
+            # Mostly stale: rebuild from the live clusters
+            self._heap = [(-c.case_count, -c.size, c.anchor, r) for r, c in self._clusters.items()]
+            heapq.heapify(self._heap)
+
+    def _live(self, entry: Tuple[int, int, str, str]) -> bool:
+        cluster = self._clusters.get(entry[3])
+        return cluster is not None and (-cluster.case_count, -cluster.size, cluster.anchor) == entry[:3]
+
+    # ── Reads ──
+    # Results are copies carrying at most `sample` of the cluster's case ids
+
+    @staticmethod
+    def _snapshot(cluster: Cluster, sample: int) -> Cluster:
+        return replace(cluster, counts=dict(cluster.counts), cases=cluster.cases[:sample])
+
+    def cluster_of(self, node_id: str, sample: int = 20) -> Optional[Cluster]:
+        """Cluster containing node_id (a one-node cluster if it has no links); None if unknown"""
+        self.sync()
+        with self._lock:
+            if node_id not in self._sets:
+                return None
+            return self._snapshot(self._cluster(self._sets.find(node_id)), sample)
+
+    def same_cluster(self, a: str, b: str) -> bool:
+        self.sync()
+        with self._lock:
+            return a in self._sets and b in self._sets and self._sets.find(a) == self._sets.find(b)
+
+    def top_clusters(self, limit: int = 10, min_cases: int = 2, sample: int = 20) -> List[Cluster]:
+        """Largest clusters by case count, then size; pops stale heap entries on the way"""
+        self.sync()
+        with self._lock:
+            taken = []
+            while self._heap and len(taken) < limit:
+                entry = heapq.heappop(self._heap)
+                if not self._live(entry):
+                    continue
+                if -entry[0] < min_cases:
+                    heapq.heappush(self._heap, entry)
+                    break
+                taken.append(entry)
+            for entry in taken:
+                heapq.heappush(self._heap, entry)
+            return [self._snapshot(self._clusters[entry[3]], sample) for entry in taken]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"nodes": len(self._sets), "clusters": len(self._clusters), "version": self._version or 0}
@@ -0,0 +1,543 @@
+"""
+Crime Graph Store - Skill 05
+Durable case/suspect/MO graph with indexed neighbourhood queries
+
+Nodes and links live in the application database, so every worker sees
+the same graph and nothing is lost on restart. Each link is stored once
+per endpoint (crime_graph_adjacency), so the neighbours of a whole BFS
+frontier come back from one primary-key range query. A version row in
+the database is bumped in the same transaction as every change.
+
+Each worker caches adjacency lists in an immutable, versioned
+GraphSnapshot. Readers pick up the current snapshot once and read it for
+the whole request without locking. A published snapshot is never changed;
+every change publishes a replacement with a compare-and-swap on the
+snapshot reference, whose lock covers only the identity check and the
+assignment (no I/O, no copying), so nobody waits on a disk flush or on
+another reader's work:
+- Writers commit first, then swap in a snapshot without the entries they
+  touched. A reader that sees the new version before the swap starts an
+  empty snapshot for it, which is also correct.
+- Rows a reader loads on a cache miss are collected for the request and
+  published once as a new small layer, and only if the version read after
+  the load still matches the snapshot, so a snapshot never holds rows from
+  another version.
+"""
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import networkx as nx
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal, dialect_insert
+from app.models.crime_graph import CrimeGraphNode, CrimeGraphEdge, CrimeGraphState
+from app.schemas.case_linker import PatternType, LinkStrength
+
+QUERY_CHUNK = 500  # ids per IN (...) list
+
+
+@dataclass(frozen=True)
+class Link:
+    neighbour: str
+    type: PatternType
+    strength: LinkStrength
+    properties: Optional[Dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class Adjacency:
+    """One node with its links; node is None for ids known only from links"""
+    node: Optional[Dict[str, Any]]
+    created: Optional[datetime]
+    links: Tuple[Link, ...]
+    truncated: bool = False  # more than max_fanout links
+
+
+Layer = Mapping[str, Adjacency]
+
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+    """
+    Adjacency cache for one graph version, read-only once built, so it is
+    safe to read without a lock. Each generation is a stack of read-only
+    layers, newest first, so publishing a request's rows never copies the
+    whole cache: a new layer absorbs the newer layers no bigger than twice
+    its size, which keeps O(log n) layers and copies each entry O(log n)
+    times. Two generations approximate an LRU: readers publish hits in
+    `old` into `young` of the next snapshot, and when `young` is full it
+    becomes `old`.
+    """
+    version: Optional[int]
+    young: Tuple[Layer, ...] = ()
+    old: Tuple[Layer, ...] = ()
+    young_size: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "young_size", sum(len(layer) for layer in self.young))
+
+    def lookup(self, node_id: str) -> Tuple[Optional[Adjacency], bool]:
+        """(entry, found in young)"""
+        for layer in self.young:
+            entry = layer.get(node_id)
+            if entry is not None:
+                return entry, True
+        for layer in self.old:
+            entry = layer.get(node_id)
+            if entry is not None:
+                return entry, False
+        return None, False
+
+    def get(self, node_id: str) -> Optional[Adjacency]:
+        return self.lookup(node_id)[0]
+
+    def with_reads(self, reads: Dict[str, Adjacency], max_young: int) -> "GraphSnapshot":
+        """This snapshot plus rows loaded or promoted at its version"""
+        if self.young_size + len(reads) > max_young:
+            return GraphSnapshot(self.version, (MappingProxyType(dict(reads)),), self.young)
+        layer, layers = dict(reads), list(self.young)
+        while layers and len(layers[0]) <= 2 * len(layer):
+            merged = dict(layers.pop(0))
+            merged.update(layer)
+            layer = merged
+        return GraphSnapshot(self.version, (MappingProxyType(layer), *layers), self.old)
+
+    def without(self, version: int, touched: Set[str]) -> "GraphSnapshot":
+        """This snapshot carried over to the next version; only layers holding touched ids are copied"""
+        def strip(layers: Tuple[Layer, ...]) -> Tuple[Layer, ...]:
+            kept = []
+            for layer in layers:
+                if any(node_id in layer for node_id in touched):
+                    layer = MappingProxyType({k: v for k, v in layer.items() if k not in touched})
+                if layer:
+                    kept.append(layer)
+            return tuple(kept)
+        return GraphSnapshot(version, strip(self.young), strip(self.old))
+
+    def __len__(self) -> int:
+        return self.young_size + sum(len(layer) for layer in self.old)
+
+
+class _ReadCounters:
+    """Cache hits and misses of one thread; only that thread writes them"""
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+def _chunks(ids: List[str]) -> Iterable[List[str]]:
+    for lo in range(0, len(ids), QUERY_CHUNK):
+        yield ids[lo:lo + QUERY_CHUNK]
+
+
+class CrimeGraphStore:
+    """
+    Reads return networkx graphs of bounded neighbourhoods; the full graph
+    is never loaded. Writes go straight to the database.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 cache_nodes: int = settings.CASE_LINKER_CACHE_NODES,
+                 max_fanout: int = settings.CASE_LINKER_MAX_FANOUT,
+                 max_neighbourhood: int = settings.CASE_LINKER_MAX_NEIGHBOURHOOD):
+        self.session_factory = session_factory
+        self.cache_nodes = cache_nodes
+        self.max_fanout = max_fanout
+        self.max_neighbourhood = max_neighbourhood
+        self._snapshot = GraphSnapshot(None)
+        self._swap_lock = threading.Lock()  # held only to compare and assign self._snapshot
+        self._tables_ready = False
+        self._local = threading.local()
+        self._counters: List[_ReadCounters] = []
+        self._counters_lock = threading.Lock()
+
+    def _session(self) -> Session:
+        db = self.session_factory()
+        if not self._tables_ready:
+            # Also usable from scripts that never ran init_db()
+            bind = db.get_bind()
+            for model in (CrimeGraphNode, CrimeGraphEdge, CrimeGraphState):
+                model.__table__.create(bind=bind, checkfirst=True)
+                for index in model.__table__.indexes:  # added after the table was first created
+                    index.create(bind=bind, checkfirst=True)
+            self._tables_ready = True
+        return db
+
+    # ── Writes ──
+
+    def add_nodes(self, nodes: Iterable[Tuple[str, str, str, Optional[Dict[str, Any]]]]):
+        """Insert or update (id, type, label, properties) nodes"""
+        rows = [{"id": n, "type": t, "label": label, "properties": props or None}
+                for n, t, label, props in nodes]
+        if not rows:
+            return
+        db = self._session()
+        try:
+            table = CrimeGraphNode.__table__
+            stmt = dialect_insert(db.get_bind())(table)
+            stmt = stmt.on_conflict_do_update(index_elements=["id"], set_={
+                "type": stmt.excluded.type,
+                "label": stmt.excluded.label,
+                "properties": stmt.excluded.properties,
+                "updated_at": func.now(),
+            })
+            db.execute(stmt, rows)
+            self._commit_change(db, {row["id"] for row in rows})
+        finally:
+            db.close()
+
+    def add_node(self, node_id: str, type: str, label: str, **properties):
+        self.add_nodes([(node_id, type, label, properties)])
+
+    def ensure_node(self, node_id: str, type: str, label: str, **properties) -> bool:
+        """
+        Insert the node unless it exists (links included). A brand-new node
+        cannot be in any cached adjacency list, so caches stay valid.
+        Returns True if it was created.
+        """
+        return self.ensure_nodes([(node_id, type, label, properties)]) == 1
+
+    def ensure_nodes(self, nodes: Iterable[Tuple[str, str, str, Optional[Dict[str, Any]]]]) -> int:
+        """ensure_node() for many (id, type, label, properties) at once; returns the number created"""
+        nodes = list(nodes)
+        known = self.adjacency(n[0] for n in nodes)
+        rows = [{"id": n, "type": t, "label": label, "properties": props or None}
+                for n, t, label, props in nodes if n not in known]
+        if not rows:
+            return 0
+        db = self._session()
+        try:
+            table = CrimeGraphNode.__table__
+            stmt = dialect_insert(db.get_bind())(table).on_conflict_do_nothing(index_elements=["id"])
+            result = db.execute(stmt, rows)
+            db.commit()
+            return max(result.rowcount, 0)
+        finally:
+            db.close()
+
+    def add_links(self, links: Iterable[Tuple[str, str, PatternType, LinkStrength, Optional[Dict[str, Any]]]]):
+        """Insert or update undirected (source, target, type, strength, properties) links"""
+        rows = []
+        for u, v, link_type, strength, props in links:
+            common = {"type": PatternType(link_type).value, "strength": LinkStrength(strength).value,
+                      "properties": props or None}
+            rows.append({"node_id": u, "neighbour_id": v, **common})
+            rows.append({"node_id": v, "neighbour_id": u, **common})
+        if not rows:
+            return
+        db = self._session()
+        try:
+            table = CrimeGraphEdge.__table__
+            stmt = dialect_insert(db.get_bind())(table)
+            stmt = stmt.on_conflict_do_update(index_elements=["node_id", "neighbour_id"], set_={
+                "type": stmt.excluded.type,
+                "strength": stmt.excluded.strength,
+                "properties": stmt.excluded.properties,
+            })
+            db.execute(stmt, rows)
+            self._commit_change(db, {row["node_id"] for row in rows})
+        finally:
+            db.close()
+
+    def add_link(self, u: str, v: str, type: PatternType, strength: LinkStrength, **properties):
+        self.add_links([(u, v, type, strength, properties)])
+
+    def _commit_change(self, db: Session, touched: Set[str]):
+        """Bump the graph version with the change, commit, then publish a snapshot without the touched entries"""
+        state = CrimeGraphState.__table__
+        if db.execute(update(state).where(state.c.id == 1).values(version=state.c.version + 1)).rowcount == 0:
+            db.execute(dialect_insert(db.get_bind())(state).on_conflict_do_nothing(), [{"id": 1, "version": 1}])
+        version = db.execute(select(state.c.version).where(state.c.id == 1)).scalar()
+        before = self._snapshot
+        db.commit()
+        while True:
+            current = self._snapshot
+            if current.version is not None and version == current.version + 1:
+                # Nobody else wrote in between: carry over everything untouched
+                replacement = current.without(version, touched)
+            elif current.version == version and before.version == version - 1:
+                # A reader started this version before the swap: add what carries over behind its rows
+                carried = before.without(version, touched)
+                replacement = GraphSnapshot(version, current.young + carried.young, current.old + carried.old)
+            elif current.version is None or version > current.version:
+                replacement = GraphSnapshot(version)
+            else:
+                return  # a later writer already moved on past this version
+            if self._swap(current, replacement):
+                return
+
+    def _swap(self, expected: GraphSnapshot, replacement: GraphSnapshot) -> bool:
+        """Compare-and-swap of the published snapshot"""
+        with self._swap_lock:
+            if self._snapshot is not expected:
+                return False
+            self._snapshot = replacement
+            return True
+
+    def _advance(self, version: int) -> GraphSnapshot:
+        """Snapshot for a version read from the database"""
+        fresh = GraphSnapshot(version)
+        while True:
+            current = self._snapshot
+            if current.version == version:
+                return current
+            if current.version is not None and version < current.version:
+                return fresh  # the read raced a newer publish: a private snapshot keeps this reader consistent
+            if self._swap(current, fresh):
+                return fresh
+
+    def _publish_reads(self, snapshot: GraphSnapshot, reads: Dict[str, Adjacency]):
+        """
+        Publish rows a reader loaded or promoted at snapshot's version as a
+        new layer; dropped if a write has moved the version on since
+        """
+        if not reads or snapshot.version is None:
+            return
+        while True:
+            current = self._snapshot
+            if current.version != snapshot.version:
+                return
+            if self._swap(current, current.with_reads(reads, self.cache_nodes // 2)):
+                return
+
+    def _read_counters(self) -> _ReadCounters:
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = self._local.counters = _ReadCounters()
+            with self._counters_lock:  # once per thread
+                self._counters.append(counters)
+        return counters
+
+    # ── Reads ──
+
+    def version(self) -> int:
+        db = self._session()
+        try:
+            state = CrimeGraphState.__table__
+            return db.execute(select(state.c.version).where(state.c.id == 1)).scalar() or 0
+        finally:
+            db.close()
+
+    def clock(self) -> Tuple[int, datetime]:
+        """(graph version, database time) read together"""
+        db = self._session()
+        try:
+            state = CrimeGraphState.__table__
+            version = db.execute(select(state.c.version).where(state.c.id == 1)).scalar() or 0
+            return version, db.execute(select(func.now())).scalar()
+        finally:
+            db.close()
+
+    def sync(self) -> GraphSnapshot:
+        """Snapshot for the current graph version; a new, empty one if another worker changed it"""
+        version = self.version()
+        current = self._snapshot
+        return current if current.version == version else self._advance(version)
+
+    def is_empty(self) -> bool:
+        db = self._session()
+        try:
+            return db.execute(select(CrimeGraphNode.__table__.c.id).limit(1)).first() is None
+        finally:
+            db.close()
+
+    def iter_nodes(self, node_type: str, batch_size: int = 1000) -> Iterable[List[Tuple[str, Adjacency]]]:
+        """
+        Every node of one type with its adjacency, in id-ordered batches
+        (keyset pagination on the primary key). Bypasses the LRU so a full
+        scan does not evict the hot neighbourhoods.
+        """
+        n = CrimeGraphNode.__table__
+        after = ""
+        while True:
+            db = self._session()
+            try:
+                ids = list(db.execute(select(n.c.id).where(n.c.type == node_type, n.c.id > after)
+                                      .order_by(n.c.id).limit(batch_size)).scalars())
+            finally:
+                db.close()
+            if not ids:
+                return
+            loaded, _ = self._load(ids)
+            yield [(node_id, loaded[node_id]) for node_id in ids if node_id in loaded]
+            after = ids[-1]
+
+    def scan_node_types(self, since: Optional[datetime] = None,
+                        batch_size: int = 50_000) -> Iterable[List[Tuple[str, str]]]:
+        """(id, type) of every node, or of those updated at or after `since`, streamed in batches"""
+        n = CrimeGraphNode.__table__
+        query = select(n.c.id, n.c.type)
+        if since is not None:
+            query = query.where(n.c.updated_at >= since)
+        return self._stream(query, batch_size)
+
+    def scan_links(self, since: Optional[datetime] = None,
+                   batch_size: int = 50_000) -> Iterable[List[Tuple[str, str]]]:
+        """Each link once as (u, v) with u < v, or those created at or after `since`, streamed in batches"""
+        e = CrimeGraphEdge.__table__
+        query = select(e.c.node_id, e.c.neighbour_id).where(e.c.node_id < e.c.neighbour_id)
+        if since is not None:
+            query = query.where(e.c.created_at >= since)
+        return self._stream(query, batch_size)
+
+    def _stream(self, query, batch_size: int) -> Iterable[List[Tuple]]:
+        db = self._session()
+        try:
+            for batch in db.execute(query.execution_options(yield_per=batch_size)).partitions():
+                yield [tuple(row) for row in batch]
+        finally:
+            db.close()
+
+    def adjacency(self, node_ids: Iterable[str], snapshot: Optional[GraphSnapshot] = None,
+                  reads: Optional[Dict[str, Adjacency]] = None) -> Dict[str, Adjacency]:
+        """
+        Adjacency of each known id (unknown ids are left out), from the
+        given (default: current) snapshot first. Misses are loaded; they and
+        hits in the old generation are collected in `reads` for the caller
+        to publish with _publish_reads(), or published here without one.
+        """
+        snap = snapshot or self._snapshot
+        pending = {} if reads is None else reads
+        found: Dict[str, Adjacency] = {}
+        missing: List[str] = []
+        for node_id in dict.fromkeys(node_ids):
+            entry, young = snap.lookup(node_id)
+            if entry is None:
+                missing.append(node_id)
+                continue
+            if not young:
+                pending[node_id] = entry  # promoted to young in the next snapshot
+            found[node_id] = entry
+        counters = self._read_counters()
+        counters.hits += len(found)
+        counters.misses += len(missing)
+        if missing:
+            loaded, version = self._load(missing)
+            if version == snap.version:
+                pending.update(loaded)
+            found.update(loaded)
+        if reads is None:
+            self._publish_reads(snap, pending)
+        return found
+
+    def _load(self, node_ids: List[str]) -> Tuple[Dict[str, Adjacency], int]:
+        """
+        Two indexed queries per chunk: node rows, then at most max_fanout + 1
+        links each. Also returns the graph version read after the rows.
+        """
+        nodes: Dict[str, Tuple[Dict[str, Any], datetime]] = {}
+        links: Dict[str, List[Link]] = {}
+        n, e = CrimeGraphNode.__table__, CrimeGraphEdge.__table__
+        state = CrimeGraphState.__table__
+        db = self._session()
+        try:
+            for chunk in _chunks(node_ids):
+                query = select(n.c.id, n.c.type, n.c.label, n.c.properties, n.c.created_at).where(n.c.id.in_(chunk))
+                for row in db.execute(query):
+                    nodes[row.id] = ({"type": row.type, "label": row.label, **(row.properties or {})}, row.created_at)
+                rank = func.row_number().over(partition_by=e.c.node_id, order_by=e.c.neighbour_id).label("rank")
+                ranked = select(e.c.node_id, e.c.neighbour_id, e.c.type, e.c.strength,
+                                e.c.properties, rank).where(e.c.node_id.in_(chunk)).subquery()
+                query = select(ranked).where(ranked.c.rank <= self.max_fanout + 1)
+                for row in db.execute(query):
+                    links.setdefault(row.node_id, []).append(Link(
+                        neighbour=row.neighbour_id,
+                        type=PatternType(row.type),
+                        strength=LinkStrength(row.strength),
+                        properties=row.properties
+                    ))
+            version = db.execute(select(state.c.version).where(state.c.id == 1)).scalar() or 0
+        finally:
+            db.close()
+        loaded = {}
+        for node_id in node_ids:
+            node_links = links.get(node_id, [])
+            if node_id in nodes or node_links:
+                node, created = nodes.get(node_id, (None, None))
+                loaded[node_id] = Adjacency(
+                    node=node,
+                    created=created,
+                    links=tuple(node_links[:self.max_fanout]),
+                    truncated=len(node_links) > self.max_fanout
+                )
+        return loaded, version
+
+    def neighbourhood(self, node_id: str, hops: int = 2) -> Tuple[nx.Graph, bool]:
+        """
+        Induced subgraph of everything within `hops` links of node_id, as
+        (graph, truncated). Each hop is one batched fetch of the frontier's
+        adjacency; truncated is set when a hub's fan-out or the
+        neighbourhood size limit cut the expansion short.
+        """
+        return self.neighbourhoods([node_id], hops)
+
+    def neighbourhoods(self, node_ids: Iterable[str], hops: int = 2,
+                       max_nodes: Optional[int] = None) -> Tuple[nx.Graph, bool]:
+        """
+        One induced subgraph over the union of the neighbourhoods of several
+        nodes. The BFS runs from all of them at once, so a node shared by
+        many neighbourhoods is fetched and added once.
+        """
+        snapshot = self.sync()
+        reads: Dict[str, Adjacency] = {}
+        limit = max_nodes or self.max_neighbourhood
+        frontier = list(dict.fromkeys(node_ids))
+        seen = set(frontier)
+        truncated = False
+        adjacency: Dict[str, Adjacency] = {}
+        for _ in range(hops):
+            adjacency.update(self.adjacency(frontier, snapshot, reads))
+            following = []
+            for current in frontier:
+                entry = adjacency.get(current)
+                if entry is None:
+                    continue
+                truncated = truncated or entry.truncated
+                for link in entry.links:
+                    if link.neighbour in seen:
+                        continue
+                    if len(seen) >= limit:
+                        truncated = True
+                        break
+                    seen.add(link.neighbour)
+                    following.append(link.neighbour)
+            frontier = following
+        # The last frontier's own rows supply node attributes and links among its members
+        adjacency.update(self.adjacency(frontier, snapshot, reads))
+        self._publish_reads(snapshot, reads)
+
+        # Nodes in creation order (ids known only from links last), so links
+        # and neighbour lists come out in the same order on every worker
+        def created(node: str):
+            entry = adjacency.get(node)
+            stamp = entry.created if entry else None
+            return stamp is None, stamp or datetime.min, node
+
+        order = sorted(seen, key=created)
+        graph = nx.Graph()
+        for current in order:
+            entry = adjacency.get(current)
+            graph.add_node(current, **(entry.node if entry and entry.node else {}))
+        for current in order:
+            entry = adjacency.get(current)
+            for link in entry.links if entry else ():
+                if link.neighbour in seen and not graph.has_edge(current, link.neighbour):
+                    graph.add_edge(current, link.neighbour, type=link.type, strength=link.strength,
+                                   **(link.properties or {}))
+        return graph, truncated
+
+    def cache_stats(self) -> Dict[str, int]:
+        snap = self._snapshot
+        with self._counters_lock:
+            counters = list(self._counters)
+        return {"entries": len(snap), "max_entries": self.cache_nodes,
+                "layers": len(snap.young) + len(snap.old),
+                "hits": sum(c.hits for c in counters), "misses": sum(c.misses for c in counters),
+                "version": snap.version or 0}
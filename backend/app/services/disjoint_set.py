@@ -0,0 +1,56 @@
+"""
+Disjoint Set - Skill 05
+Union-find with union by size and path halving
+"""
+from typing import Dict, Generic, Hashable, List, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+class DisjointSet(Generic[T]):
+    """find/union in O(alpha(n)) amortised; items are added on first use"""
+
+    def __init__(self):
+        self.parent: Dict[T, T] = {}
+        self.size: Dict[T, int] = {}
+
+    def __contains__(self, item: T) -> bool:
+        return item in self.parent
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self, item: T) -> T:
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+        return item
+
+    def find(self, item: T) -> T:
+        parent = self.parent
+        if item not in parent:
+            return self.add(item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: T, b: T) -> T:
+        """Merge the sets of a and b; returns the surviving root"""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size.pop(rb)
+        return ra
+
+    def set_size(self, item: T) -> int:
+        return self.size[self.find(item)]
+
+    def groups(self) -> Dict[T, List[T]]:
+        out: Dict[T, List[T]] = {}
+        for item in self.parent:
+            out.setdefault(self.find(item), []).append(item)
+        return out
@@ -0,0 +1,320 @@
+"""
+Columnar Transaction Frame - Skill 02
+NumPy-backed transaction storage and time-window detectors
+
+Transactions are held as parallel arrays instead of pydantic objects:
+- ts:      int64 wall-clock microseconds since 1970-01-01 (statement local time)
+- amount:  int64 paise
+- src/dst: int32 interned account codes
+- channel: int16 interned channel codes
+
+Window detectors run as a stable sort followed by vectorised two-pointer
+passes, so no per-row Python work happens after the frame is built.
+"""
+import math
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.financial import Transaction
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROS = timedelta(microseconds=1)
+
+MICROS_PER_HOUR = 3_600_000_000
+MICROS_PER_DAY = 24 * MICROS_PER_HOUR
+PAISE_PER_RUPEE = 100
+
+
+def to_micros(dt: datetime) -> int:
+    """Wall-clock microseconds since epoch (timezone offset is ignored)"""
+    return (dt.replace(tzinfo=None) - _EPOCH) // _MICROS
+
+
+def from_micros(ts: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(ts))
+
+
+def to_paise(amount: float) -> int:
+    return int(round(amount * PAISE_PER_RUPEE))
+
+
+class TransactionFrameBuilder:
+    """
+    Append-only builder that accumulates rows into compact typed arrays.
+    Accepts pydantic Transactions or raw field values (for streaming parsers).
+
+    Rows may arrive in any time order. A time index of sorted runs (newest
+    first; a new run absorbs the newer runs no bigger than twice its size,
+    so there are O(log n) of them) answers window queries with one
+    searchsorted per run, so a window can be taken without building the
+    whole frame.
+    """
+
+    def __init__(self):
+        self._ts = array('q')
+        self._amount = array('q')
+        self._src = array('i')
+        self._dst = array('i')
+        self._channel = array('h')
+        self.ids: List[str] = []
+        self.accounts: List[str] = []
+        self.channels: List[str] = []
+        self._account_codes: Dict[str, int] = {}
+        self._channel_codes: Dict[str, int] = {}
+        self._runs: List[Tuple[np.ndarray, np.ndarray]] = []  # (sorted ts, rows), newest first
+        self._indexed = 0  # rows covered by _runs
+
+    def _intern_account(self, account: str) -> int:
+        code = self._account_codes.get(account)
+        if code is None:
+            code = len(self.accounts)
+            self._account_codes[account] = code
+            self.accounts.append(account)
+        return code
+
+    def _intern_channel(self, channel: str) -> int:
+        code = self._channel_codes.get(channel)
+        if code is None:
+            code = len(self.channels)
+            self._channel_codes[channel] = code
+            self.channels.append(channel)
+        return code
+
+    def append_row(self, txn_id: str, date: datetime, amount: float,
+                   from_account: str, to_account: str, channel: str):
+        self.ids.append(txn_id)
+        self._ts.append(to_micros(date))
+        self._amount.append(to_paise(amount))
+        self._src.append(self._intern_account(from_account))
+        self._dst.append(self._intern_account(to_account))
+        self._channel.append(self._intern_channel(channel))
+
+    def append(self, txn: Transaction):
+        self.append_row(txn.id, txn.date, txn.amount, txn.from_account, txn.to_account, txn.channel)
+
+    def extend(self, transactions: Iterable[Transaction]):
+        for txn in transactions:
+            self.append(txn)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "TransactionFrameBuilder":
+        clone = TransactionFrameBuilder()
+        clone._ts, clone._amount = array('q', self._ts), array('q', self._amount)
+        clone._src, clone._dst = array('i', self._src), array('i', self._dst)
+        clone._channel = array('h', self._channel)
+        clone.ids, clone.accounts, clone.channels = list(self.ids), list(self.accounts), list(self.channels)
+        clone._account_codes, clone._channel_codes = dict(self._account_codes), dict(self._channel_codes)
+        clone._runs, clone._indexed = list(self._runs), self._indexed  # runs are never modified in place
+        return clone
+
+    def timestamps(self, start: int = 0) -> np.ndarray:
+        """ts of rows start.. (a copy)"""
+        return np.frombuffer(self._ts, dtype=np.int64)[start:].copy()
+
+    def _index_tail(self):
+        if self._indexed == len(self):
+            return
+        ts = self.timestamps(self._indexed)
+        rows = np.arange(self._indexed, len(self), dtype=np.int64)
+        self._indexed = len(self)
+        while self._runs and len(self._runs[0][0]) <= 2 * len(ts):
+            run_ts, run_rows = self._runs.pop(0)
+            ts, rows = np.concatenate((run_ts, ts)), np.concatenate((run_rows, rows))
+        order = np.argsort(ts, kind="stable")
+        self._runs.insert(0, (ts[order], rows[order]))
+
+    def rows_between(self, lo: int, hi: int) -> np.ndarray:
+        """Row indices with lo <= ts <= hi, ascending"""
+        self._index_tail()
+        parts = [rows[np.searchsorted(ts, lo, "left"):np.searchsorted(ts, hi, "right")]
+                 for ts, rows in self._runs]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def take(self, rows: np.ndarray) -> "TransactionFrame":
+        """Frame of a row subset, without building the whole frame"""
+        return TransactionFrame(
+            ts=np.frombuffer(self._ts, dtype=np.int64)[rows],
+            amount=np.frombuffer(self._amount, dtype=np.int64)[rows],
+            src=np.frombuffer(self._src, dtype=np.int32)[rows],
+            dst=np.frombuffer(self._dst, dtype=np.int32)[rows],
+            channel=np.frombuffer(self._channel, dtype=np.int16)[rows],
+            ids=[self.ids[i] for i in rows],
+            accounts=self.accounts,
+            channels=self.channels,
+        )
+
+    def build(self) -> "TransactionFrame":
+        return TransactionFrame(
+            ts=np.frombuffer(self._ts, dtype=np.int64).copy(),
+            amount=np.frombuffer(self._amount, dtype=np.int64).copy(),
+            src=np.frombuffer(self._src, dtype=np.int32).copy(),
+            dst=np.frombuffer(self._dst, dtype=np.int32).copy(),
+            channel=np.frombuffer(self._channel, dtype=np.int16).copy(),
+            ids=self.ids,
+            accounts=self.accounts,
+            channels=self.channels,
+        )
+
+
+@dataclass
+class TransactionFrame:
+    """Immutable columnar view of a transaction set"""
+    ts: np.ndarray
+    amount: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    channel: np.ndarray
+    ids: List[str]
+    accounts: List[str]
+    channels: List[str]
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Transaction]) -> "TransactionFrame":
+        builder = TransactionFrameBuilder()
+        builder.extend(transactions)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.amount.nbytes + self.src.nbytes + self.dst.nbytes + self.channel.nbytes
+
+    def take(self, rows: np.ndarray) -> "TransactionFrame":
+        """Row subset (account and channel codes are unchanged)"""
+        return TransactionFrame(
+            ts=self.ts[rows], amount=self.amount[rows], src=self.src[rows], dst=self.dst[rows],
+            channel=self.channel[rows], ids=[self.ids[i] for i in rows],
+            accounts=self.accounts, channels=self.channels,
+        )
+
+    def rupees(self, rows) -> List[float]:
+        return (self.amount[rows] / PAISE_PER_RUPEE).tolist()
+
+    def total_rupees(self, rows=None) -> float:
+        paise = self.amount if rows is None else self.amount[rows]
+        return int(paise.sum()) / PAISE_PER_RUPEE
+
+    def first_seen_as_sender(self) -> np.ndarray:
+        """Row index where each account code first appears as sender (len(self) if never)"""
+        first = np.full(len(self.accounts), len(self), dtype=np.int64)
+        codes, idx = np.unique(self.src, return_index=True)
+        first[codes] = idx
+        return first
+
+    def accounts_in_order(self, rows: np.ndarray, limit: Optional[int] = None) -> List[str]:
+        """Distinct sender/receiver accounts of rows, in order of first appearance"""
+        interleaved = np.column_stack((self.src[rows], self.dst[rows])).ravel()
+        codes, idx = np.unique(interleaved, return_index=True)
+        ordered = codes[np.argsort(idx, kind="stable")]
+        if limit is not None:
+            ordered = ordered[:limit]
+        return [self.accounts[c] for c in ordered]
+
+
+@dataclass
+class WindowHit:
+    """Rows (original indices, original order) flagged by a window detector"""
+    account: str
+    rows: np.ndarray
+
+
+def _group_starts(*keys: np.ndarray) -> np.ndarray:
+    """Start offsets of runs of equal keys in already-sorted arrays"""
+    n = len(keys[0])
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+
+def detect_structuring(frame: TransactionFrame, low_paise: int, high_paise: int,
+                       min_count: int = 3) -> List[WindowHit]:
+    """
+    Sender-days with at least min_count transactions in [low, high) paise.
+    Hits are ordered by sender first appearance, then day first appearance.
+    """
+    if len(frame) == 0:
+        return []
+    day = frame.ts // MICROS_PER_DAY
+    order = np.lexsort((day, frame.src))  # stable: original order kept within groups
+    src_sorted = frame.src[order]
+    day_sorted = day[order]
+    starts = _group_starts(src_sorted, day_sorted)
+
+    in_band = (frame.amount >= low_paise) & (frame.amount < high_paise)
+    band_counts = np.add.reduceat(in_band[order].astype(np.int64), starts)
+    qualifying = np.flatnonzero(band_counts >= min_count)
+    if len(qualifying) == 0:
+        return []
+
+    ends = np.append(starts[1:], len(order))
+    first_sender_row = frame.first_seen_as_sender()
+    group_src = src_sorted[starts[qualifying]]
+    group_first_row = order[starts[qualifying]]
+    ranking = np.lexsort((group_first_row, first_sender_row[group_src]))
+
+    hits = []
+    for g in qualifying[ranking]:
+        rows = order[starts[g]:ends[g]]
+        hits.append(WindowHit(account=frame.accounts[src_sorted[starts[g]]], rows=rows[in_band[rows]]))
+    return hits
+
+
+def detect_rapid_succession(frame: TransactionFrame, window_micros: int = MICROS_PER_HOUR,
+                            min_count: int = 5, lookahead: int = 10) -> List[WindowHit]:
+    """
+    First window per sender holding min_count transactions within window_micros.
+    Only the next `lookahead` transactions after the window start are counted.
+    """
+    n = len(frame)
+    if n < min_count:
+        return []
+    order = np.lexsort((frame.ts, frame.src))
+    src_sorted = frame.src[order]
+    ts_sorted = frame.ts[order]
+    starts = _group_starts(src_sorted)
+    group_end = np.repeat(np.append(starts[1:], n), np.diff(np.append(starts, n)))
+
+    # Two-pointer check: row i opens a qualifying window iff the row
+    # min_count-1 ahead is in the same sender run and within the window.
+    k = min_count - 1
+    candidates = np.zeros(n, dtype=bool)
+    ahead_in_run = np.arange(n - k) + k < group_end[:n - k]
+    candidates[:n - k] = ahead_in_run & (ts_sorted[k:] <= ts_sorted[:n - k] + window_micros)
+    flagged = np.flatnonzero(candidates)
+    if len(flagged) == 0:
+        return []
+
+    # One hit per sender: first qualifying window in its time-sorted run
+    flagged = flagged[_group_starts(src_sorted[flagged])]
+    first_sender_row = frame.first_seen_as_sender()
+    flagged = flagged[np.argsort(first_sender_row[src_sorted[flagged]], kind="stable")]
+
+    hits = []
+    for i in flagged:
+        stop = min(i + lookahead, group_end[i])
+        window_stop = i + int(np.searchsorted(ts_sorted[i:stop], ts_sorted[i] + window_micros, side="right"))
+        hits.append(WindowHit(account=frame.accounts[src_sorted[i]], rows=order[i:window_stop]))
+    return hits
+
+
+def unusual_hour_rows(frame: TransactionFrame, start_hour: int = 6, end_hour: int = 22) -> np.ndarray:
+    """Rows whose wall-clock hour is before start_hour or after end_hour"""
+    hour = (frame.ts // MICROS_PER_HOUR) % 24
+    return np.flatnonzero((hour < start_hour) | (hour > end_hour))
+
+
+def high_value_rows(frame: TransactionFrame, min_amount: float) -> np.ndarray:
+    """Rows with amount >= min_amount rupees"""
+    return np.flatnonzero(frame.amount >= math.ceil(min_amount * PAISE_PER_RUPEE))
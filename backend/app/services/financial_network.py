@@ -0,0 +1,234 @@
+"""
+Network Level of Detail - Skill 02
+Bounded overviews and paged neighbourhoods for the financial graph visualiser
+
+Large cases have tens of thousands of accounts; sending every node and
+edge produces multi-MB payloads the browser cannot render. NetworkView
+serves the graph in levels of detail:
+- overview(): a bounded summary. Edges below min_amount are hidden,
+  low-risk leaf accounts (one counterparty, below min_risk, not named in
+  any alert) collapse into one aggregate node per counterparty and
+  direction, and if the budget is still exceeded the most important
+  accounts are kept (alerted first, then by risk, then by money moved).
+- page(): one account's counterparties, largest amounts first, a page at
+  a time ("expand this node"). Aggregate node ids expand to their hub.
+
+Payload objects are only built for the nodes and edges actually returned.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from app.schemas.financial import FinancialNetwork, NetworkNode, NetworkEdge, NetworkPage, RiskLevel
+
+RISK_RANK = {RiskLevel.LOW: 0, RiskLevel.MEDIUM: 1, RiskLevel.HIGH: 2, RiskLevel.CRITICAL: 3}
+AGGREGATE = "aggregate"
+IN, OUT, BOTH = "in", "out", "both"
+DIRECTIONS = (IN, OUT, BOTH)
+MIN_GROUP = 2  # a single leaf is shown as itself
+SAMPLE_MEMBERS = 5
+
+Pair = Tuple[str, str]
+
+
+@dataclass
+class EdgeSummary:
+    """Totals for one (src, dst) pair, field-compatible with EdgeAggregate"""
+    transactions: int = 0
+    total_amount: float = 0.0
+    first_transaction: Optional[datetime] = None
+    last_transaction: Optional[datetime] = None
+
+    def merge(self, other: Any):
+        self.transactions += other.transactions
+        self.total_amount += other.total_amount
+        if other.first_transaction is not None and (
+                self.first_transaction is None or other.first_transaction < self.first_transaction):
+            self.first_transaction = other.first_transaction
+        if other.last_transaction is not None and (
+                self.last_transaction is None or other.last_transaction > self.last_transaction):
+            self.last_transaction = other.last_transaction
+
+
+def aggregate_id(hub: str, direction: str) -> str:
+    return f"{AGGREGATE}:{direction}:{hub}"
+
+
+def parse_aggregate_id(node_id: str) -> Optional[Tuple[str, str]]:
+    """(hub, direction) for an aggregate node id, None for an account"""
+    prefix, _, rest = node_id.partition(":")
+    direction, _, hub = rest.partition(":")
+    if prefix != AGGREGATE or direction not in DIRECTIONS or not hub:
+        return None
+    return hub, direction
+
+
+class NetworkView:
+    """
+    Level-of-detail access to one transaction graph.
+    edges maps (src, dst) to an EdgeAggregate-like object (transactions,
+    total_amount, first_transaction, last_transaction); make_node and
+    make_edge build payload objects. focus accounts (named in alerts) are
+    never collapsed and are kept first when the budget is tight.
+    """
+
+    def __init__(self, nodes: Iterable[str], edges: Mapping[Pair, Any],
+                 make_node: Callable[[str], NetworkNode],
+                 make_edge: Callable[[str, str, Any], NetworkEdge],
+                 risk: Callable[[str], RiskLevel], focus: Iterable[str] = (),
+                 succ: Optional[Mapping[str, Iterable[str]]] = None,
+                 pred: Optional[Mapping[str, Iterable[str]]] = None):
+        self.nodes = list(nodes)
+        self.edges = edges
+        self.make_node = make_node
+        self.make_edge = make_edge
+        self.risk = risk
+        self.focus = set(focus)
+        self._known = set(self.nodes)
+        if succ is None or pred is None:
+            succ, pred = defaultdict(list), defaultdict(list)
+            for u, v in edges:
+                succ[u].append(v)
+                pred[v].append(u)
+        self.succ, self.pred = succ, pred
+
+    def full(self) -> FinancialNetwork:
+        return FinancialNetwork(
+            nodes=[self.make_node(n) for n in self.nodes],
+            edges=[self.make_edge(u, v, agg) for (u, v), agg in self.edges.items()]
+        )
+
+    def bounded(self, max_nodes: int, max_edges: int) -> FinancialNetwork:
+        """Everything if it fits the budget, the overview otherwise"""
+        if len(self.nodes) <= max_nodes and len(self.edges) <= max_edges:
+            return self.full()
+        return self.overview(max_nodes, max_edges)
+
+    def _rank(self, node: str) -> int:
+        return RISK_RANK.get(self.risk(node), 0)
+
+    def overview(self, max_nodes: int, max_edges: int, min_risk: RiskLevel = RiskLevel.HIGH,
+                 min_amount: float = 0.0) -> FinancialNetwork:
+        kept = {pair: agg for pair, agg in self.edges.items() if agg.total_amount >= min_amount}
+        neighbours: Dict[str, Set[str]] = defaultdict(set)
+        throughput: Dict[str, float] = defaultdict(float)
+        for (u, v), agg in kept.items():
+            neighbours[u].add(v)
+            neighbours[v].add(u)
+            throughput[u] += agg.total_amount
+            throughput[v] += agg.total_amount
+
+        # Low-risk leaves grouped by (hub, direction seen from the hub)
+        floor = RISK_RANK[min_risk]
+        groups: Dict[Pair, List[str]] = defaultdict(list)
+        for node in self.nodes:
+            adj = neighbours.get(node)
+            if not adj or len(adj) != 1 or node in self.focus or self._rank(node) >= floor:
+                continue
+            hub = next(iter(adj))
+            if len(neighbours[hub]) == 1:
+                continue  # an isolated pair: nothing to collapse into
+            pays, paid = (hub, node) in kept, (node, hub) in kept
+            groups[(hub, BOTH if pays and paid else OUT if pays else IN)].append(node)
+        groups = {key: members for key, members in groups.items() if len(members) >= MIN_GROUP}
+        collapsed = {m for members in groups.values() for m in members}
+
+        # Budget: rank accounts and aggregates together
+        units = [(n in self.focus, self._rank(n), throughput.get(n, 0.0), n, None)
+                 for n in self.nodes if n not in collapsed and (n in neighbours or n in self.focus)]
+        for (hub, direction), members in groups.items():
+            amount = sum(kept[(hub, m) if (hub, m) in kept else (m, hub)].total_amount for m in members)
+            units.append((False, max(self._rank(m) for m in members), amount, hub, direction))
+        if len(units) > max_nodes:
+            units.sort(key=lambda u: u[:3], reverse=True)
+            units = units[:max_nodes]
+        shown = {u[3] for u in units if u[4] is None}
+        shown_groups = [(u[3], u[4]) for u in units if u[4] is not None and u[3] in shown]
+
+        # Edges between shown accounts plus one or two summary edges per aggregate,
+        # each with the number of original edges it stands for
+        edges: List[Tuple[str, str, Any, int]] = [
+            (u, v, agg, 1) for (u, v), agg in kept.items() if u in shown and v in shown
+        ]
+        for hub, direction in shown_groups:
+            agg_node = aggregate_id(hub, direction)
+            out_sum, in_sum = EdgeSummary(), EdgeSummary()
+            out_count = in_count = 0
+            for m in groups[(hub, direction)]:
+                if (hub, m) in kept:
+                    out_sum.merge(kept[(hub, m)])
+                    out_count += 1
+                if (m, hub) in kept:
+                    in_sum.merge(kept[(m, hub)])
+                    in_count += 1
+            if out_count:
+                edges.append((hub, agg_node, out_sum, out_count))
+            if in_count:
+                edges.append((agg_node, hub, in_sum, in_count))
+        if len(edges) > max_edges:
+            order = sorted(range(len(edges)), reverse=True, key=lambda i: (
+                edges[i][0] in self.focus or edges[i][1] in self.focus, edges[i][2].total_amount))
+            edges = [edges[i] for i in sorted(order[:max_edges])]
+
+        nodes = [self.make_node(n) for n in self.nodes if n in shown]
+        nodes.extend(self._aggregate_node(hub, direction, groups[(hub, direction)])
+                     for hub, direction in shown_groups)
+        collapsed_shown = sum(len(groups[g]) for g in shown_groups)
+        hidden_nodes = len(self.nodes) - len(shown) - collapsed_shown
+        hidden_edges = len(self.edges) - sum(e[3] for e in edges)
+        return FinancialNetwork(
+            nodes=nodes,
+            edges=[self.make_edge(u, v, agg) for u, v, agg, _ in edges],
+            truncated=bool(hidden_nodes or hidden_edges or collapsed_shown),
+            hidden_nodes=hidden_nodes,
+            hidden_edges=hidden_edges,
+            collapsed_nodes=collapsed_shown
+        )
+
+    def _aggregate_node(self, hub: str, direction: str, members: List[str]) -> NetworkNode:
+        risk = max((self.risk(m) for m in members), key=lambda r: RISK_RANK.get(r, 0))
+        return NetworkNode(
+            id=aggregate_id(hub, direction),
+            label=f"{len(members)} accounts",
+            type=AGGREGATE,
+            risk_level=risk,
+            properties={
+                "hub": hub,
+                "direction": direction,
+                "members": len(members),
+                "sample": members[:SAMPLE_MEMBERS]
+            }
+        )
+
+    def page(self, node_id: str, direction: str = BOTH, offset: int = 0, limit: int = 50,
+             min_amount: float = 0.0) -> NetworkPage:
+        """
+        One page of node_id's counterparties, largest amounts first.
+        An aggregate id pages through its hub in the aggregate's direction.
+        Raises KeyError for unknown accounts.
+        """
+        parsed = parse_aggregate_id(node_id)
+        account, direction = parsed if parsed else (node_id, direction)
+        if account not in self._known:
+            raise KeyError(account)
+        pairs: List[Pair] = []
+        if direction in (OUT, BOTH):
+            pairs.extend((account, v) for v in self.succ.get(account, ()))
+        if direction in (IN, BOTH):
+            pairs.extend((u, account) for u in self.pred.get(account, ()))
+        pairs = [p for p in pairs if self.edges[p].total_amount >= min_amount]
+        pairs.sort(key=lambda p: (-self.edges[p].total_amount, p))
+        window = pairs[offset:offset + limit]
+
+        others = dict.fromkeys(v if u == account else u for u, v in window)
+        return NetworkPage(
+            account=account,
+            direction=direction,
+            nodes=[self.make_node(n) for n in others],
+            edges=[self.make_edge(u, v, self.edges[(u, v)]) for u, v in window],
+            total=len(pairs),
+            offset=offset,
+            limit=limit,
+            next_offset=offset + limit if offset + limit < len(pairs) else None
+        )
@@ -0,0 +1,119 @@
+"""
+Detector Pipeline - Skill 02
+Time- and work-budgeted, anytime anomaly detection
+
+Detectors are registered with a relative cost and run cheapest first
+against one WorkBudget per request (a deadline and/or a cap on nodes +
+edges visited). Long-running detectors call budget.charge() as they
+work and stop as soon as it returns False, keeping the alerts found so
+far; the pipeline marks them incomplete and skips whatever is left, so
+a pathological graph degrades the result instead of pinning a worker.
+A detector that raises is reported as failed; the others still run.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from app.core.config import settings
+from app.schemas.financial import DetectorRun, DetectorStatus
+
+logger = logging.getLogger("LegalOS.Financial")
+
+
+class WorkBudget:
+    """
+    Shared by all detectors of one request. charge() only reads the clock
+    every CHECK_EVERY calls, so it is cheap enough for inner loops.
+    """
+    CHECK_EVERY = 256
+
+    def __init__(self, seconds: Optional[float] = None, max_work: Optional[int] = None):
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds if seconds is not None else None
+        self.max_work = max_work
+        self.nodes = 0
+        self.edges = 0
+        self.exhausted = False
+        self._ticks = 0
+
+    def charge(self, nodes: int = 0, edges: int = 0) -> bool:
+        """Record work; False once the budget is spent (stop and keep partial results)"""
+        self.nodes += nodes
+        self.edges += edges
+        if self.exhausted:
+            return False
+        if self.max_work is not None and self.nodes + self.edges > self.max_work:
+            self.exhausted = True
+        else:
+            self._ticks += 1
+            if self._ticks >= self.CHECK_EVERY:
+                self._ticks = 0
+                self.check()
+        return not self.exhausted
+
+    def check(self) -> bool:
+        """Read the clock now; False once the deadline has passed"""
+        if not self.exhausted and self.deadline is not None and time.monotonic() > self.deadline:
+            self.exhausted = True
+        return not self.exhausted
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+def request_budget(seconds: Optional[float] = None, max_work: Optional[int] = None) -> WorkBudget:
+    """
+    Budget for one analysis request: the requested limits, or the
+    configured defaults, never above the configured maximum time.
+    """
+    seconds = seconds if seconds is not None else settings.FINANCIAL_DETECTION_TIME_BUDGET
+    if seconds is not None and settings.FINANCIAL_DETECTION_MAX_TIME_BUDGET is not None:
+        seconds = min(seconds, settings.FINANCIAL_DETECTION_MAX_TIME_BUDGET)
+    max_work = max_work if max_work is not None else settings.FINANCIAL_DETECTION_WORK_BUDGET
+    return WorkBudget(seconds, max_work)
+
+
+@dataclass
+class Detector:
+    name: str
+    run: Callable[[], None]  # reads the request's WorkBudget from its owner
+    cost: int  # relative cost; lower runs first
+
+
+class DetectorPipeline:
+    """Runs detectors cheapest first (stable for equal cost) against one budget"""
+
+    def __init__(self, detectors: List[Detector]):
+        self.detectors = sorted(detectors, key=lambda d: d.cost)
+
+    def run(self, budget: WorkBudget, count_alerts: Callable[[], int]) -> List[DetectorRun]:
+        reports = []
+        for detector in self.detectors:
+            if not budget.check():
+                reports.append(DetectorRun(name=detector.name, status=DetectorStatus.SKIPPED))
+                continue
+            nodes, edges, alerts = budget.nodes, budget.edges, count_alerts()
+            started = time.perf_counter()
+            error = None
+            try:
+                detector.run()
+                status = DetectorStatus.INCOMPLETE if budget.exhausted else DetectorStatus.COMPLETE
+            except Exception as e:
+                logger.exception("Financial detector %s failed", detector.name)
+                status, error = DetectorStatus.FAILED, f"{type(e).__name__}: {e}"
+            reports.append(DetectorRun(
+                name=detector.name,
+                status=status,
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+                alerts=count_alerts() - alerts,
+                nodes_visited=budget.nodes - nodes,
+                edges_visited=budget.edges - edges,
+                error=error
+            ))
+        return reports
+
+
+def is_complete(reports: List[DetectorRun]) -> bool:
+    return all(r.status == DetectorStatus.COMPLETE for r in reports)
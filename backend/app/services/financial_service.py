@@ -2,50 +2,179 @@
 Financial Analyzer Service - Skill 02
 NetworkX-based financial crime detection
 """
+import asyncio
+import multiprocessing
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+
 import networkx as nx
-from datetime import datetime, timedelta
-from typing import List, Dict, Set, Tuple
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import List, Dict, Set, Tuple, Optional
 from collections import defaultdict
 
 from app.schemas.financial import (
     Transaction, Account, AnomalyAlert, AnomalyType, RiskLevel,
     NetworkNode, NetworkEdge, FinancialNetwork, InvestigationLead,
     FinancialAnalysisRequest, FinancialAnalysisResponse,
-    TransactionPattern
+    TransactionPattern, DetectorRun, DetectorStatus
+)
+from app.core.config import settings
+from app.services.financial_flow import layered_bfs, layering_flow, BOTTLENECK
+from app.services.financial_anf import reach_counts, csr_from_edges, screen_at_distance, DEFAULT_BITS
+from app.services.financial_temporal import (
+    find_temporal_cycles, group_by_loop, loop_evidence, DEFAULT_WINDOW_HOURS, DEFAULT_MAX_ACCOUNTS
+)
+from app.services.financial_network import NetworkView, EdgeSummary
+from app.services.financial_pipeline import (
+    WorkBudget, Detector, DetectorPipeline, request_budget, is_complete
+)
+from app.services.financial_frame import (
+    TransactionFrame, MICROS_PER_HOUR, to_paise, from_micros,
+    detect_structuring, detect_rapid_succession, unusual_hour_rows, high_value_rows
 )
 
 
-class FinancialAnalyzer:
+# Presentation order of alerts (the order the detectors were originally run in)
+ANOMALY_ORDER = {
+    anomaly_type: i for i, anomaly_type in enumerate([
+        AnomalyType.CIRCULAR_TRADING, AnomalyType.LAYERING, AnomalyType.STRUCTURING,
+        AnomalyType.HIGH_VALUE, AnomalyType.RAPID_SUCCESSION, AnomalyType.UNUSUAL_HOURS,
+        AnomalyType.SHELL_COMPANY
+    ])
+}
+
+
+class GraphAnalysisContext:
     """
-    Advanced financial crime detection using network analysis
+    Graph-derived tables computed once per analysis and shared by all detectors.
+
+    Cycle enumeration, SCC decomposition, degree and throughput tables are
+    built from the transaction graph a single time; the account -> alerts
+    index is built once detection has finished.
+    """
+    
+    def __init__(self, graph: nx.DiGraph, max_cycle_length: Optional[int] = None,
+                 budget: Optional[WorkBudget] = None):
+        self.graph = graph
+        self.max_cycle_length = max_cycle_length
+        self.budget = budget
+        
+        # Strongly connected components: a node can only sit on a cycle if its
+        # SCC has more than one member or it has a self-loop.
+        self.sccs: List[Set[str]] = list(nx.strongly_connected_components(graph))
+        self.scc_index: Dict[str, int] = {}
+        self.cyclic_nodes: Set[str] = set()
+        for idx, component in enumerate(self.sccs):
+            for node in component:
+                self.scc_index[node] = idx
+            if len(component) > 1:
+                self.cyclic_nodes.update(component)
+        self.cyclic_nodes.update(n for n, _ in nx.selfloop_edges(graph))
+        
+        # Degree and throughput tables
+        self.in_degree: Dict[str, int] = dict(graph.in_degree())
+        self.out_degree: Dict[str, int] = dict(graph.out_degree())
+        self.in_flow: Dict[str, float] = {
+            node: sum(graph[u][node].get('weight', 0) for u in graph.predecessors(node))
+            for node in graph.nodes()
+        }
+        self.out_flow: Dict[str, float] = {
+            node: sum(graph[node][v].get('weight', 0) for v in graph.successors(node))
+            for node in graph.nodes()
+        }
+        
+        self._cycles: Optional[List[List[str]]] = None
+        self._cycle_members: Optional[Set[str]] = None
+        self._alert_index: Optional[Dict[str, List[AnomalyAlert]]] = None
+    
+    @property
+    def cycles(self) -> List[List[str]]:
+        """Simple cycles (bounded by max_cycle_length), enumerated once or until the budget runs out"""
+        if self._cycles is None:
+            self._cycles = []
+            for cycle in nx.simple_cycles(self.graph, length_bound=self.max_cycle_length):
+                self._cycles.append(cycle)
+                if self.budget is not None and not self.budget.charge(nodes=len(cycle)):
+                    break
+        return self._cycles
+    
+    def in_cycle(self, node: str) -> bool:
+        """Check whether node lies on any (bounded-length) cycle"""
+        if self.max_cycle_length is None:
+            return node in self.cyclic_nodes
+        if self._cycle_members is None:
+            self._cycle_members = {n for cycle in self.cycles for n in cycle}
+        return node in self._cycle_members
+    
+    def throughput(self, node: str) -> float:
+        """Total money flowing through node"""
+        return max(self.in_flow.get(node, 0), self.out_flow.get(node, 0))
+    
+    def index_alerts(self, anomalies: List[AnomalyAlert]):
+        """Build the account -> alerts index once detection is complete"""
+        index = defaultdict(list)
+        for alert in anomalies:
+            for account in set(alert.affected_accounts):
+                index[account].append(alert)
+        self._alert_index = dict(index)
+    
+    def alerts_for(self, account: str) -> List[AnomalyAlert]:
+        if self._alert_index is None:
+            return []
+        return self._alert_index.get(account, [])
+    
+    def risk_for(self, account: str) -> RiskLevel:
+        """Highest of CRITICAL/HIGH raised against account, LOW otherwise"""
+        risk = RiskLevel.LOW
+        for alert in self.alerts_for(account):
+            if alert.risk_level == RiskLevel.CRITICAL:
+                return RiskLevel.CRITICAL
+            if alert.risk_level == RiskLevel.HIGH:
+                risk = RiskLevel.HIGH
+        return risk
+
+
+class FinancialAnalysisSession:
+    """
+    One analysis run. All per-request state (graph, frame, alerts, leads)
+    lives here, so sessions never share mutable state and can run in
+    parallel threads or worker processes.
     """
     
-    def __init__(self, threshold_amount: float = 100000.0):
+    def __init__(self, request: FinancialAnalysisRequest, threshold_amount: float = 100000.0,
+                 max_cycle_length: Optional[int] = None, layering_mode: str = BOTTLENECK,
+                 cycle_window_hours: Optional[float] = DEFAULT_WINDOW_HOURS,
+                 reach_sketch_bits: Optional[int] = DEFAULT_BITS):
         self.threshold = threshold_amount
+        self.max_cycle_length = max_cycle_length
+        self.layering_mode = layering_mode
+        self.cycle_window_hours = cycle_window_hours
+        self.reach_sketch_bits = reach_sketch_bits
+        self.budget = request_budget(request.time_budget_seconds, request.work_budget)
+        self.reports: List[DetectorRun] = []
+        self.case_id = request.case_id
+        self.transactions = request.transactions
+        self.accounts = {acc.account_number: acc for acc in request.accounts}
         self.graph = nx.DiGraph()
+        self.frame: Optional[TransactionFrame] = None
+        self.ctx: Optional[GraphAnalysisContext] = None
         self.anomalies = []
         self.leads = []
     
-    def analyze(self, request: FinancialAnalysisRequest) -> FinancialAnalysisResponse:
+    def run(self) -> FinancialAnalysisResponse:
         """
         Complete financial analysis pipeline
         """
-        self.case_id = request.case_id
-        self.transactions = request.transactions
-        self.accounts = {acc.account_number: acc for acc in request.accounts}
+        # Step 1: Build transaction network and shared analytics context
+        self._prepare()
         
-        # Step 1: Build transaction network
-        self._build_network()
+        # Step 2: Detect anomalies, cheapest first within the request's budget
+        self.reports = self._pipeline().run(self.budget, lambda: len(self.anomalies))
+        self.anomalies.sort(key=lambda a: ANOMALY_ORDER.get(a.type, len(ANOMALY_ORDER)))
         
-        # Step 2: Detect anomalies
-        self._detect_circular_trading()
-        self._detect_layering()
-        self._detect_structuring()
-        self._detect_high_value()
-        self._detect_rapid_succession()
-        self._detect_unusual_hours()
-        self._detect_shell_companies()
+        self.ctx.index_alerts(self.anomalies)
         
         # Step 3: Generate leads
         self._generate_leads()
@@ -55,17 +184,45 @@ class FinancialAnalyzer:
         metrics = self._calculate_metrics()
         summary = self._generate_summary()
         
+        analysis_uuid = str(uuid.uuid4())
         return FinancialAnalysisResponse(
-            case_id=request.case_id,
-            analysis_id=str(uuid.uuid4()),
+            id=analysis_uuid,
+            case_id=self.case_id,
+            analysis_id=analysis_uuid,
             network=network,
             anomalies=self.anomalies,
             leads=self.leads,
             metrics=metrics,
             generated_at=datetime.now(),
-            summary=summary
+            summary=summary,
+            complete=is_complete(self.reports),
+            detectors=self.reports
         )
     
+    def _prepare(self):
+        self.frame = TransactionFrame.from_transactions(self.transactions)
+        self._build_network()
+        self.ctx = GraphAnalysisContext(self.graph, self.max_cycle_length, self.budget)
+    
+    def _pipeline(self) -> DetectorPipeline:
+        """
+        Detectors with rough relative costs: vectorised row scans first,
+        then per-account scans, cycle search, and the per-source layering
+        search last. Static cycle enumeration also feeds in_cycle() when
+        cycles are length-bounded, which makes the shell check expensive.
+        """
+        static_cycles = self.cycle_window_hours is None or self.max_cycle_length is not None
+        return DetectorPipeline([
+            Detector("circular_trading", self._detect_circular_trading, cost=5 if static_cycles else 4),
+            Detector("layering", self._detect_layering, cost=6),
+            Detector("structuring", self._detect_structuring, cost=2),
+            Detector("high_value", self._detect_high_value, cost=1),
+            Detector("rapid_succession", self._detect_rapid_succession, cost=2),
+            Detector("unusual_hours", self._detect_unusual_hours, cost=1),
+            Detector("shell_companies", self._detect_shell_companies,
+                     cost=5 if self.max_cycle_length is not None else 3),
+        ])
+    
     def _build_network(self):
         """Build directed graph from transactions"""
         for txn in self.transactions:
@@ -93,34 +250,60 @@ class FinancialAnalyzer:
                 )
     
     def _detect_circular_trading(self):
-        """Detect money circulating in loops"""
-        try:
-            cycles = list(nx.simple_cycles(self.graph))
+        """Detect money circulating in loops (time-respecting unless cycle_window_hours is None)"""
+        if self.cycle_window_hours is not None:
+            self._detect_temporal_loops()
+            return
+        for cycle in self.ctx.cycles:
+            if len(cycle) >= 3:  # Minimum 3 nodes for meaningful cycle
+                # Calculate total amount in cycle
+                cycle_amount = self._calculate_cycle_amount(cycle)
+                
+                if cycle_amount > self.threshold:
+                    alert = AnomalyAlert(
+                        id=str(uuid.uuid4()),
+                        type=AnomalyType.CIRCULAR_TRADING,
+                        risk_level=RiskLevel.HIGH,
+                        title="Circular Trading Pattern Detected",
+                        description=f"Money circulating in loop: {' → '.join(cycle)}",
+                        affected_accounts=cycle,
+                        amount_involved=cycle_amount,
+                        evidence={
+                            "cycle_length": len(cycle),
+                            "cycle_path": cycle
+                        },
+                        detected_at=datetime.now(),
+                        confidence_score=0.85
+                    )
+                    self.anomalies.append(alert)
+    
+    def _detect_temporal_loops(self):
+        """Loops whose payments move forward in time and close within the window"""
+        window = int(self.cycle_window_hours * MICROS_PER_HOUR)
+        loops = find_temporal_cycles(
+            self.frame, window, min_accounts=3,
+            max_accounts=self.max_cycle_length or DEFAULT_MAX_ACCOUNTS,
+            budget=self.budget
+        )
+        for instances in group_by_loop(loops).values():
+            cycle = instances[0].accounts
+            cycle_amount = round(sum(c.total_amount for c in instances), 2)
             
-            for cycle in cycles:
-                if len(cycle) >= 3:  # Minimum 3 nodes for meaningful cycle
-                    # Calculate total amount in cycle
-                    cycle_amount = self._calculate_cycle_amount(cycle)
-                    
-                    if cycle_amount > self.threshold:
-                        alert = AnomalyAlert(
-                            id=str(uuid.uuid4()),
-                            type=AnomalyType.CIRCULAR_TRADING,
-                            risk_level=RiskLevel.HIGH,
-                            title="Circular Trading Pattern Detected",
-                            description=f"Money circulating in loop: {' → '.join(cycle)}",
-                            affected_accounts=cycle,
-                            amount_involved=cycle_amount,
-                            evidence={
-                                "cycle_length": len(cycle),
-                                "cycle_path": cycle
-                            },
-                            detected_at=datetime.now(),
-                            confidence_score=0.85
-                        )
-                        self.anomalies.append(alert)
-        except Exception as e:
-            pass  # Handle graph cycles error
+            if cycle_amount > self.threshold:
+                alert = AnomalyAlert(
+                    id=str(uuid.uuid4()),
+                    type=AnomalyType.CIRCULAR_TRADING,
+                    risk_level=RiskLevel.HIGH,
+                    title="Circular Trading Pattern Detected",
+                    description=f"Money circulating in loop: {' → '.join(cycle)} "
+                                f"({len(instances)} time-ordered loop(s) within {self.cycle_window_hours:g}h)",
+                    affected_accounts=cycle,
+                    amount_involved=cycle_amount,
+                    evidence=loop_evidence(instances, self.cycle_window_hours),
+                    detected_at=datetime.now(),
+                    confidence_score=0.90
+                )
+                self.anomalies.append(alert)
     
     def _calculate_cycle_amount(self, cycle: List[str]) -> float:
         """Calculate total amount flowing in cycle"""
@@ -134,14 +317,17 @@ class FinancialAnalyzer:
     
     def _detect_layering(self):
         """Detect complex layering (5+ hops)"""
-        for node in self.graph.nodes():
-            # Find all nodes reachable within 5 hops
-            lengths = nx.single_source_shortest_path_length(self.graph, node, cutoff=5)
-            distant_nodes = [n for n, dist in lengths.items() if dist >= 5]
+        hops = 5
+        for node in self._layering_candidates(hops, min_distant=3):
+            # Accounts exactly 5 hops away, via one layered BFS
+            reach = layered_bfs(self.graph, node, hops)
+            if not self.budget.charge(nodes=len(reach.level_of)):
+                break
+            distant_nodes = reach.at(hops)
             
             if len(distant_nodes) >= 3:  # Multiple long paths
-                # Calculate total flow through these paths
-                total_flow = self._calculate_flow_to_nodes(node, distant_nodes)
+                # Hop-bounded flow over the layered shortest-path DAG
+                total_flow = layering_flow(self.graph, reach, hops, mode=self.layering_mode)
                 
                 if total_flow > self.threshold * 2:
                     alert = AnomalyAlert(
@@ -154,149 +340,125 @@ class FinancialAnalyzer:
                         amount_involved=total_flow,
                         evidence={
                             "source_account": node,
-                            "hops": 5,
-                            "destination_count": len(distant_nodes)
+                            "hops": hops,
+                            "destination_count": len(distant_nodes),
+                            "flow_model": self.layering_mode
                         },
                         detected_at=datetime.now(),
                         confidence_score=0.80
                     )
                     self.anomalies.append(alert)
     
-    def _calculate_flow_to_nodes(self, source: str, targets: List[str]) -> float:
-        """Calculate total flow from source to target nodes"""
-        total = 0
-        for target in targets:
-            try:
-                paths = list(nx.all_simple_paths(self.graph, source, target, cutoff=5))
-                for path in paths[:5]:  # Limit to 5 paths
-                    path_amount = self._calculate_path_amount(path)
-                    total += path_amount
-            except:
-                continue
-        return total
-    
-    def _calculate_path_amount(self, path: List[str]) -> float:
-        """Calculate minimum amount along a path"""
-        amounts = []
-        for i in range(len(path) - 1):
-            if self.graph.has_edge(path[i], path[i + 1]):
-                amounts.append(self.graph[path[i]][path[i + 1]].get('weight', 0))
-        return min(amounts) if amounts else 0
+    def _layering_candidates(self, hops: int, min_distant: int) -> List[str]:
+        """
+        Sources that may have min_distant accounts exactly `hops` away.
+        A HyperLogLog reach sketch (a few linear passes over all edges)
+        drops accounts whose neighbourhood is too small and stops growing
+        earlier, so the exact BFS and flow only run where they can matter.
+        reach_sketch_bits=None checks every account.
+        """
+        nodes = list(self.graph.nodes())
+        if self.reach_sketch_bits is None or not nodes:
+            return nodes
+        offsets, targets = csr_from_edges(nodes, self.graph.edges())
+        if not self.budget.charge(nodes=len(nodes) * hops, edges=len(targets) * hops):
+            return []
+        counts = reach_counts(offsets, targets, hops, bits=self.reach_sketch_bits)
+        flagged = screen_at_distance(counts, hops, min_distant, bits=self.reach_sketch_bits)
+        return [node for node, keep in zip(nodes, flagged.tolist()) if keep]
     
     def _detect_structuring(self):
         """Detect structuring (just below reporting threshold)"""
         reporting_threshold = 100000  # INR
-        structuring_window = 7  # days
         
-        # Group transactions by account and date
-        account_daily = defaultdict(lambda: defaultdict(list))
-        
-        for txn in self.transactions:
-            day_key = txn.date.strftime("%Y-%m-%d")
-            account_daily[txn.from_account][day_key].append(txn)
+        # Sender-day groups with 3+ transactions in the 80k-100k band
+        if not self.budget.charge(edges=len(self.frame)):
+            return
+        hits = detect_structuring(
+            self.frame,
+            low_paise=to_paise(80000),
+            high_paise=to_paise(reporting_threshold),
+            min_count=3
+        )
         
-        # Check for structuring patterns
-        for account, daily_txns in account_daily.items():
-            for day, txns in daily_txns.items():
-                # Check multiple transactions just below threshold
-                below_threshold = [t for t in txns if 80000 <= t.amount < reporting_threshold]
-                
-                if len(below_threshold) >= 3:  # 3+ structured transactions
-                    total_structured = sum(t.amount for t in below_threshold)
-                    
-                    alert = AnomalyAlert(
-                        id=str(uuid.uuid4()),
-                        type=AnomalyType.STRUCTURING,
-                        risk_level=RiskLevel.HIGH,
-                        title="Structuring/Smurfing Detected",
-                        description=f"{len(below_threshold)} transactions just below reporting threshold",
-                        affected_accounts=[account],
-                        amount_involved=total_structured,
-                        evidence={
-                            "transaction_count": len(below_threshold),
-                            "individual_amounts": [t.amount for t in below_threshold],
-                            "threshold": reporting_threshold
-                        },
-                        detected_at=datetime.now(),
-                        confidence_score=0.90
-                    )
-                    self.anomalies.append(alert)
+        for hit in hits:
+            amounts = self.frame.rupees(hit.rows)
+            
+            alert = AnomalyAlert(
+                id=str(uuid.uuid4()),
+                type=AnomalyType.STRUCTURING,
+                risk_level=RiskLevel.HIGH,
+                title="Structuring/Smurfing Detected",
+                description=f"{len(amounts)} transactions just below reporting threshold",
+                affected_accounts=[hit.account],
+                amount_involved=self.frame.total_rupees(hit.rows),
+                evidence={
+                    "transaction_count": len(amounts),
+                    "individual_amounts": amounts,
+                    "threshold": reporting_threshold
+                },
+                detected_at=datetime.now(),
+                confidence_score=0.90
+            )
+            self.anomalies.append(alert)
     
     def _detect_high_value(self):
         """Flag high-value transactions"""
-        for txn in self.transactions:
-            if txn.amount >= self.threshold * 5:  # 5x threshold
-                alert = AnomalyAlert(
-                    id=str(uuid.uuid4()),
-                    type=AnomalyType.HIGH_VALUE,
-                    risk_level=RiskLevel.MEDIUM,
-                    title="High-Value Transaction",
-                    description=f"Transaction of ₹{txn.amount:,.2f} detected",
-                    affected_accounts=[txn.from_account, txn.to_account],
-                    amount_involved=txn.amount,
-                    evidence={
-                        "transaction_id": txn.id,
-                        "date": txn.date.isoformat(),
-                        "channel": txn.channel
-                    },
-                    detected_at=datetime.now(),
-                    confidence_score=0.95
-                )
-                self.anomalies.append(alert)
+        frame = self.frame
+        if not self.budget.charge(edges=len(frame)):
+            return
+        for row in high_value_rows(frame, self.threshold * 5):  # 5x threshold
+            amount = frame.total_rupees(row)
+            alert = AnomalyAlert(
+                id=str(uuid.uuid4()),
+                type=AnomalyType.HIGH_VALUE,
+                risk_level=RiskLevel.MEDIUM,
+                title="High-Value Transaction",
+                description=f"Transaction of ₹{amount:,.2f} detected",
+                affected_accounts=[frame.accounts[frame.src[row]], frame.accounts[frame.dst[row]]],
+                amount_involved=amount,
+                evidence={
+                    "transaction_id": frame.ids[row],
+                    "date": from_micros(frame.ts[row]).isoformat(),
+                    "channel": frame.channels[frame.channel[row]]
+                },
+                detected_at=datetime.now(),
+                confidence_score=0.95
+            )
+            self.anomalies.append(alert)
     
     def _detect_rapid_succession(self):
         """Detect rapid-fire transactions"""
-        # Group by account and sort by time
-        account_txns = defaultdict(list)
-        for txn in self.transactions:
-            account_txns[txn.from_account].append(txn)
-        
-        for account, txns in account_txns.items():
-            txns.sort(key=lambda x: x.date)
-            
-            # Check for 5+ transactions within 1 hour
-            for i in range(len(txns) - 4):
-                window_start = txns[i].date
-                window_end = window_start + timedelta(hours=1)
-                
-                rapid_txns = [t for t in txns[i:i+10] if t.date <= window_end]
-                
-                if len(rapid_txns) >= 5:
-                    total_amount = sum(t.amount for t in rapid_txns)
-                    
-                    alert = AnomalyAlert(
-                        id=str(uuid.uuid4()),
-                        type=AnomalyType.RAPID_SUCCESSION,
-                        risk_level=RiskLevel.HIGH,
-                        title="Rapid Succession Transactions",
-                        description=f"{len(rapid_txns)} transactions within 1 hour",
-                        affected_accounts=[account],
-                        amount_involved=total_amount,
-                        evidence={
-                            "transaction_count": len(rapid_txns),
-                            "time_window": "1 hour",
-                            "first_txn": rapid_txns[0].date.isoformat()
-                        },
-                        detected_at=datetime.now(),
-                        confidence_score=0.88
-                    )
-                    self.anomalies.append(alert)
-                    break  # One alert per account is enough
+        # 5+ transactions from one account within 1 hour; one alert per account
+        if not self.budget.charge(edges=len(self.frame)):
+            return
+        for hit in detect_rapid_succession(self.frame, window_micros=MICROS_PER_HOUR, min_count=5):
+            alert = AnomalyAlert(
+                id=str(uuid.uuid4()),
+                type=AnomalyType.RAPID_SUCCESSION,
+                risk_level=RiskLevel.HIGH,
+                title="Rapid Succession Transactions",
+                description=f"{len(hit.rows)} transactions within 1 hour",
+                affected_accounts=[hit.account],
+                amount_involved=self.frame.total_rupees(hit.rows),
+                evidence={
+                    "transaction_count": len(hit.rows),
+                    "time_window": "1 hour",
+                    "first_txn": from_micros(self.frame.ts[hit.rows[0]]).isoformat()
+                },
+                detected_at=datetime.now(),
+                confidence_score=0.88
+            )
+            self.anomalies.append(alert)
     
     def _detect_unusual_hours(self):
         """Detect transactions outside business hours"""
-        unusual_count = 0
-        unusual_amount = 0
-        accounts_involved = set()
-        
-        for txn in self.transactions:
-            hour = txn.date.hour
-            # Define unusual hours: before 6 AM or after 10 PM
-            if hour < 6 or hour > 22:
-                unusual_count += 1
-                unusual_amount += txn.amount
-                accounts_involved.add(txn.from_account)
-                accounts_involved.add(txn.to_account)
+        # Define unusual hours: before 6 AM or after 10 PM
+        if not self.budget.charge(edges=len(self.frame)):
+            return
+        rows = unusual_hour_rows(self.frame, start_hour=6, end_hour=22)
+        unusual_count = len(rows)
+        unusual_amount = self.frame.total_rupees(rows)
         
         if unusual_count >= 5 and unusual_amount > self.threshold:
             alert = AnomalyAlert(
@@ -305,7 +467,7 @@ class FinancialAnalyzer:
                 risk_level=RiskLevel.MEDIUM,
                 title="Unusual Hours Activity",
                 description=f"{unusual_count} transactions outside business hours",
-                affected_accounts=list(accounts_involved)[:10],
+                affected_accounts=self.frame.accounts_in_order(rows, limit=10),
                 amount_involved=unusual_amount,
                 evidence={
                     "transaction_count": unusual_count,
@@ -320,50 +482,30 @@ class FinancialAnalyzer:
         """Detect potential shell company indicators"""
         # Look for accounts with high in-degree and out-degree but low balance
         for node in self.graph.nodes():
-            in_degree = self.graph.in_degree(node)
-            out_degree = self.graph.out_degree(node)
+            in_degree = self.ctx.in_degree[node]
+            out_degree = self.ctx.out_degree[node]
+            if not self.budget.charge(nodes=1):
+                break
             
             # Shell company pattern: Many connections, circular flow
-            if in_degree >= 10 and out_degree >= 10:
-                # Check if it's part of circular trading
-                try:
-                    cycles = list(nx.simple_cycles(self.graph))
-                    node_in_cycles = any(node in cycle for cycle in cycles)
-                    
-                    if node_in_cycles:
-                        total_throughput = self._calculate_node_throughput(node)
-                        
-                        alert = AnomalyAlert(
-                            id=str(uuid.uuid4()),
-                            type=AnomalyType.SHELL_COMPANY,
-                            risk_level=RiskLevel.CRITICAL,
-                            title="Potential Shell Company Activity",
-                            description=f"Account shows shell company patterns: high connectivity with circular flows",
-                            affected_accounts=[node],
-                            amount_involved=total_throughput,
-                            evidence={
-                                "incoming_connections": in_degree,
-                                "outgoing_connections": out_degree,
-                                "circular_flow": True
-                            },
-                            detected_at=datetime.now(),
-                            confidence_score=0.70
-                        )
-                        self.anomalies.append(alert)
-                except:
-                    continue
-    
-    def _calculate_node_throughput(self, node: str) -> float:
-        """Calculate total money flowing through node"""
-        incoming = sum(
-            self.graph[u][node].get('weight', 0)
-            for u in self.graph.predecessors(node)
-        )
-        outgoing = sum(
-            self.graph[node][v].get('weight', 0)
-            for v in self.graph.successors(node)
-        )
-        return max(incoming, outgoing)
+            if in_degree >= 10 and out_degree >= 10 and self.ctx.in_cycle(node):
+                alert = AnomalyAlert(
+                    id=str(uuid.uuid4()),
+                    type=AnomalyType.SHELL_COMPANY,
+                    risk_level=RiskLevel.CRITICAL,
+                    title="Potential Shell Company Activity",
+                    description=f"Account shows shell company patterns: high connectivity with circular flows",
+                    affected_accounts=[node],
+                    amount_involved=self.ctx.throughput(node),
+                    evidence={
+                        "incoming_connections": in_degree,
+                        "outgoing_connections": out_degree,
+                        "circular_flow": True
+                    },
+                    detected_at=datetime.now(),
+                    confidence_score=0.70
+                )
+                self.anomalies.append(alert)
     
     def _generate_leads(self):
         """Generate investigation leads from anomalies"""
@@ -400,61 +542,48 @@ class FinancialAnalyzer:
         return actions.get(anomaly_type, "Conduct detailed investigation")
     
     def _build_network_response(self) -> FinancialNetwork:
-        """Build network visualization data"""
-        nodes = []
-        edges = []
+        """Build network visualization data (summarised for large cases)"""
+        now = datetime.now()  # Would track actual first/last
+        edges = {
+            (u, v): EdgeSummary(data.get('transactions', 0), data.get('weight', 0), now, now)
+            for u, v, data in self.graph.edges(data=True)
+        }
         
-        # Build nodes
-        for node_id in self.graph.nodes():
+        def make_node(node_id: str) -> NetworkNode:
             account = self.accounts.get(node_id)
-            risk = RiskLevel.LOW
-            
-            # Determine risk from anomalies
-            for alert in self.anomalies:
-                if node_id in alert.affected_accounts:
-                    if alert.risk_level == RiskLevel.CRITICAL:
-                        risk = RiskLevel.CRITICAL
-                        break
-                    elif alert.risk_level == RiskLevel.HIGH and risk != RiskLevel.CRITICAL:
-                        risk = RiskLevel.HIGH
-            
-            nodes.append(NetworkNode(
+            return NetworkNode(
                 id=node_id,
                 label=account.account_holder if account else node_id[:10],
                 type="account",
-                risk_level=risk,
+                risk_level=self.ctx.risk_for(node_id),
                 properties={
                     "holder": account.account_holder if account else "Unknown",
                     "bank": account.bank_name if account else "Unknown"
                 }
-            ))
+            )
         
-        # Build edges
-        for u, v, data in self.graph.edges(data=True):
-            edges.append(NetworkEdge(
+        def make_edge(u: str, v: str, agg: EdgeSummary) -> NetworkEdge:
+            return NetworkEdge(
                 source=u,
                 target=v,
-                weight=data.get('weight', 0),
-                transactions=data.get('transactions', 0),
-                total_amount=data.get('weight', 0),
-                first_transaction=datetime.now(),  # Would track actual first/last
-                last_transaction=datetime.now()
-            ))
+                weight=agg.total_amount,
+                transactions=agg.transactions,
+                total_amount=agg.total_amount,
+                first_transaction=agg.first_transaction,
+                last_transaction=agg.last_transaction
+            )
         
-        return FinancialNetwork(nodes=nodes, edges=edges)
+        focus = {acc for alert in self.anomalies for acc in alert.affected_accounts}
+        view = NetworkView(self.graph.nodes(), edges, make_node, make_edge, self.ctx.risk_for,
+                           focus=focus, succ=self.graph.succ, pred=self.graph.pred)
+        return view.bounded(settings.FINANCIAL_NETWORK_MAX_NODES, settings.FINANCIAL_NETWORK_MAX_EDGES)
     
     def _calculate_metrics(self) -> Dict:
         """Calculate analysis metrics"""
-        total_volume = sum(t.amount for t in self.transactions)
-        unique_accounts = len(set(
-            [t.from_account for t in self.transactions] +
-            [t.to_account for t in self.transactions]
-        ))
-        
         return {
-            "total_transactions": len(self.transactions),
-            "total_volume": total_volume,
-            "unique_accounts": unique_accounts,
+            "total_transactions": len(self.frame),
+            "total_volume": self.frame.total_rupees(),
+            "unique_accounts": len(self.frame.accounts),
             "network_density": nx.density(self.graph),
             "anomalies_detected": len(self.anomalies),
             "critical_alerts": len([a for a in self.anomalies if a.risk_level == RiskLevel.CRITICAL]),
@@ -463,10 +592,7 @@ class FinancialAnalyzer:
     
     def _is_high_risk(self, node: str) -> bool:
         """Check if node is high risk based on anomalies"""
-        for alert in self.anomalies:
-            if node in alert.affected_accounts and alert.risk_level in [RiskLevel.CRITICAL, RiskLevel.HIGH]:
-                return True
-        return False
+        return self.ctx.risk_for(node) in (RiskLevel.CRITICAL, RiskLevel.HIGH)
     
     def _generate_summary(self) -> str:
         """Generate human-readable summary"""
@@ -496,8 +622,81 @@ class FinancialAnalyzer:
         if self.leads:
             parts.append(f"\nGenerated {len(self.leads)} investigation leads.")
         
+        unfinished = [r.name for r in self.reports if r.status in (DetectorStatus.INCOMPLETE, DetectorStatus.SKIPPED)]
+        failed = [r.name for r in self.reports if r.status == DetectorStatus.FAILED]
+        if unfinished:
+            parts.append(f"\nPartial results: {', '.join(unfinished)} did not finish within the analysis budget.")
+        if failed:
+            parts.append(f"\nDetector errors: {', '.join(failed)}.")
+        
         return "\n".join(parts)
 
 
-# Singleton
+def _run_session(config: Tuple, request: FinancialAnalysisRequest) -> FinancialAnalysisResponse:
+    """Worker-process entry point (module level so it can be pickled)"""
+    return FinancialAnalysisSession(request, *config).run()
+
+
+class FinancialAnalyzer:
+    """
+    Advanced financial crime detection using network analysis
+    
+    Holds configuration only: every analyze() call runs in a fresh
+    FinancialAnalysisSession with the request's threshold_amount, so one
+    instance is safe to share between concurrent requests. analyze_async()
+    keeps the event loop free by running small cases in the threadpool and
+    heavy ones (process_threshold transactions or more) in a pool of worker
+    processes.
+    """
+    
+    def __init__(self, max_cycle_length: Optional[int] = None,
+                 layering_mode: str = BOTTLENECK, cycle_window_hours: Optional[float] = DEFAULT_WINDOW_HOURS,
+                 reach_sketch_bits: Optional[int] = DEFAULT_BITS,
+                 process_threshold: int = 20000, max_workers: Optional[int] = None):
+        self.max_cycle_length = max_cycle_length
+        self.layering_mode = layering_mode
+        self.cycle_window_hours = cycle_window_hours
+        self.reach_sketch_bits = reach_sketch_bits
+        self.process_threshold = process_threshold
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+    
+    def config_for(self, request: FinancialAnalysisRequest) -> Tuple:
+        """Session arguments after the request, in FinancialAnalysisSession order"""
+        return (request.threshold_amount, self.max_cycle_length, self.layering_mode, self.cycle_window_hours,
+                self.reach_sketch_bits)
+    
+    def session(self, request: FinancialAnalysisRequest) -> FinancialAnalysisSession:
+        return FinancialAnalysisSession(request, *self.config_for(request))
+    
+    def analyze(self, request: FinancialAnalysisRequest) -> FinancialAnalysisResponse:
+        """Run a complete analysis synchronously in the calling thread"""
+        return self.session(request).run()
+    
+    async def analyze_async(self, request: FinancialAnalysisRequest) -> FinancialAnalysisResponse:
+        """Run a complete analysis without blocking the event loop"""
+        if len(request.transactions) >= self.process_threshold:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._process_pool(), _run_session, self.config_for(request), request)
+        return await run_in_threadpool(self.analyze, request)
+    
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a threaded server process is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+    
+    def shutdown(self):
+        """Stop worker processes (called on application shutdown)"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Singleton (stateless: safe to share across requests)
 financial_analyzer = FinancialAnalyzer()
@@ -0,0 +1,274 @@
+"""
+Synthetic Money-Laundering Ledger - Skill 02
+Seeded generator of background traffic with planted laundering patterns
+
+Background traffic is generated column-wise (NumPy) straight into a
+TransactionFrame, so 10M-row ledgers fit in a few hundred MB. Background
+payments only flow from lower to higher account codes, which keeps the
+background acyclic: every cycle in the ledger is a planted one unless
+back_edge_rate is raised. Background amounts stay below the 80k
+structuring band.
+
+Planted patterns (ground truth for recall):
+- ring:      3-6 accounts paying each other in a loop, in time order
+- layering:  source -> 4 intermediaries -> 3-4 accounts exactly 5 hops away
+- smurfing:  4-8 payments of 85k-99.9k between one pair on one day
+- shell:     hub with 12+ distinct payers and payees and a loop back to it
+Pattern accounts receive funding from background accounts but never pay
+back into them, so patterns cannot overlap each other.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, List, Sequence
+
+import numpy as np
+
+from app.schemas.financial import Transaction, TransactionType
+from app.services.financial_frame import (
+    TransactionFrame, MICROS_PER_DAY, MICROS_PER_HOUR, PAISE_PER_RUPEE, to_micros, from_micros
+)
+
+RING = "ring"
+LAYERING = "layering"
+SMURFING = "smurfing"
+SHELL = "shell"
+PATTERN_KINDS = (RING, LAYERING, SMURFING, SHELL)
+
+CHANNELS = ["NEFT", "RTGS", "IMPS", "UPI", "Cash"]
+_MICROS_PER_MINUTE = MICROS_PER_HOUR // 60
+
+
+@dataclass
+class PlantedPattern:
+    """
+    Ground truth for one planted pattern. accounts[0] is the account a
+    detector is expected to name: ring members are in payment order,
+    smurfing is [sender, receiver], layering starts with the source and
+    shell is [hub].
+    """
+    kind: str
+    accounts: List[str]
+    amount: float
+
+
+class SyntheticIds(Sequence):
+    """Transaction ids derived from the row number (no per-row strings kept)"""
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.n))]
+        i = int(i)
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return f"SYN{i:09d}"
+
+
+@dataclass
+class SyntheticLedger:
+    """Generated ledger: columnar rows (sorted by time) plus planted ground truth"""
+    seed: int
+    frame: TransactionFrame
+    patterns: List[PlantedPattern] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def planted(self, kind: str) -> List[PlantedPattern]:
+        return [p for p in self.patterns if p.kind == kind]
+
+    def iter_transactions(self, start: int = 0, stop: int = None) -> Iterator[Transaction]:
+        """Materialise rows as pydantic Transactions, lazily"""
+        f = self.frame
+        stop = len(f) if stop is None else min(stop, len(f))
+        for row in range(start, stop):
+            yield Transaction(
+                id=f.ids[row],
+                date=from_micros(f.ts[row]),
+                amount=int(f.amount[row]) / PAISE_PER_RUPEE,
+                from_account=f.accounts[f.src[row]],
+                to_account=f.accounts[f.dst[row]],
+                description="synthetic",
+                type=TransactionType.TRANSFER,
+                channel=f.channels[f.channel[row]]
+            )
+
+    def transactions(self) -> List[Transaction]:
+        return list(self.iter_transactions())
+
+
+class _PatternPlanter:
+    """Accumulates planted rows; times are micros, amounts rupees"""
+
+    def __init__(self, rng: np.random.Generator, first_code: int, span_micros: int,
+                 start_micros: int, background_accounts: int):
+        self.rng = rng
+        self.first_code = first_code
+        self.next_code = first_code
+        self.span = span_micros
+        self.start = start_micros
+        self.background = background_accounts
+        self.names: List[str] = []
+        self.rows: List[tuple] = []  # (ts, paise, src, dst)
+        self.patterns: List[PlantedPattern] = []
+
+    def account(self, name: str) -> int:
+        code = self.next_code
+        self.next_code += 1
+        self.names.append(name)
+        return code
+
+    def name(self, code: int) -> str:
+        return self.names[code - self.first_code]
+
+    def pay(self, ts: int, rupees: float, src: int, dst: int):
+        self.rows.append((ts, int(round(rupees * PAISE_PER_RUPEE)), src, dst))
+
+    def day_start(self, days_needed: int = 1) -> int:
+        """Midnight of a random day leaving room for days_needed days"""
+        days = max(self.span // MICROS_PER_DAY - days_needed, 1)
+        return self.start + int(self.rng.integers(0, days)) * MICROS_PER_DAY
+
+    def fund(self, code: int, ts: int, rupees: float):
+        """A background account pays into the pattern (never the reverse)"""
+        if self.background:
+            self.pay(ts - int(self.rng.integers(1, 48)) * MICROS_PER_HOUR, rupees,
+                     int(self.rng.integers(0, self.background)), code)
+
+    def ring(self, k: int):
+        size = int(self.rng.integers(3, 7))
+        codes = [self.account(f"RING{k:05d}-{i}") for i in range(size)]
+        ts = self.day_start(3) + 9 * MICROS_PER_HOUR
+        amount = float(self.rng.uniform(60000, 79000))
+        self.fund(codes[0], ts, amount)
+        total = 0.0
+        for i in range(size):
+            hop = round(amount * float(self.rng.uniform(0.97, 1.0)), 2)
+            self.pay(ts, hop, codes[i], codes[(i + 1) % size])
+            total += hop
+            ts += int(self.rng.integers(30, 600)) * _MICROS_PER_MINUTE
+        self.patterns.append(PlantedPattern(RING, [self.name(c) for c in codes], total))
+
+    def layering(self, k: int):
+        chain = [self.account(f"LAYER{k:05d}-{i}") for i in range(5)]
+        width = int(self.rng.integers(3, 5))
+        leaves = [self.account(f"LAYER{k:05d}-X{i}") for i in range(width)]
+        leaf_amounts = [round(float(self.rng.uniform(101000, 120000)), 2) for _ in leaves]
+        carried = sum(leaf_amounts) * 1.02
+        ts = self.day_start(5) + 10 * MICROS_PER_HOUR
+        self.fund(chain[0], ts, carried)
+        for u, v in zip(chain, chain[1:]):
+            self.pay(ts, round(carried, 2), u, v)
+            ts += int(self.rng.integers(2, 20)) * MICROS_PER_HOUR
+        for leaf, amount in zip(leaves, leaf_amounts):
+            self.pay(ts, amount, chain[-1], leaf)
+            ts += int(self.rng.integers(5, 90)) * _MICROS_PER_MINUTE
+        names = [self.name(c) for c in [chain[0]] + leaves]
+        self.patterns.append(PlantedPattern(LAYERING, names, sum(leaf_amounts)))
+
+    def smurfing(self, k: int):
+        sender = self.account(f"SMURF{k:05d}-S")
+        receiver = self.account(f"SMURF{k:05d}-R")
+        count = int(self.rng.integers(4, 9))
+        ts = self.day_start() + 9 * MICROS_PER_HOUR
+        self.fund(sender, ts, 100000.0 * count)
+        total = 0.0
+        for _ in range(count):
+            amount = round(float(self.rng.uniform(85000, 99900)), 2)
+            self.pay(ts, amount, sender, receiver)
+            total += amount
+            ts += int(self.rng.integers(61, 90)) * _MICROS_PER_MINUTE  # never 5 in one hour
+        self.patterns.append(PlantedPattern(
+            SMURFING, [self.name(sender), self.name(receiver)], total
+        ))
+
+    def shell(self, k: int):
+        hub = self.account(f"SHELL{k:05d}-H")
+        fan = int(self.rng.integers(12, 20))
+        payers = [self.account(f"SHELL{k:05d}-P{i}") for i in range(fan)]
+        payees = [self.account(f"SHELL{k:05d}-Q{i}") for i in range(fan)]
+        back = self.account(f"SHELL{k:05d}-B")
+        ts = self.day_start(10)
+        total = 0.0
+        for payer in payers:
+            amount = round(float(self.rng.uniform(10000, 40000)), 2)
+            t = ts + int(self.rng.integers(0, 5 * 24 * 60)) * _MICROS_PER_MINUTE
+            self.fund(payer, t, amount)
+            self.pay(t, amount, payer, hub)
+            total += amount
+        for payee in payees:
+            amount = round(float(self.rng.uniform(10000, 40000)), 2)
+            self.pay(ts + int(self.rng.integers(5 * 24 * 60, 9 * 24 * 60)) * _MICROS_PER_MINUTE,
+                     amount, hub, payee)
+            total += amount
+        # Round-trip hub -> payee -> back -> hub puts the hub on a cycle
+        returned = round(float(self.rng.uniform(5000, 9000)), 2)
+        t = ts + 9 * MICROS_PER_DAY + 12 * MICROS_PER_HOUR
+        self.pay(t, returned, payees[0], back)
+        self.pay(t + MICROS_PER_HOUR, returned, back, hub)
+        self.patterns.append(PlantedPattern(SHELL, [self.name(hub)], total))
+
+
+def generate_ledger(num_transactions: int, seed: int = 42, patterns_per_kind: int = None,
+                    days: int = 90, accounts_per_transaction: float = 0.25,
+                    back_edge_rate: float = 0.0,
+                    start: datetime = datetime(2024, 1, 1)) -> SyntheticLedger:
+    """
+    Generate about num_transactions rows (planted rows included).
+    patterns_per_kind defaults to one per 20k rows (at least 2).
+    back_edge_rate > 0 reverses that share of background payments, which
+    adds background cycles (useful to stress cycle detection).
+    """
+    rng = np.random.default_rng(seed)
+    if patterns_per_kind is None:
+        patterns_per_kind = max(2, num_transactions // 20_000)
+    span = days * MICROS_PER_DAY
+    start_micros = to_micros(start)
+
+    # Planted patterns first: their row count decides the background size
+    n_background_accounts = max(int(num_transactions * accounts_per_transaction), 50)
+    planter = _PatternPlanter(rng, n_background_accounts, span, start_micros, n_background_accounts)
+    for k in range(patterns_per_kind):
+        planter.ring(k)
+        planter.layering(k)
+        planter.smurfing(k)
+        planter.shell(k)
+    n_background = max(num_transactions - len(planter.rows), 0)
+
+    # Background: src uniform, dst a short geometric hop to a higher code
+    last = n_background_accounts - 1
+    src = rng.integers(0, last, size=n_background, dtype=np.int64)
+    dst = np.minimum(src + rng.geometric(0.002, size=n_background), last)
+    if back_edge_rate > 0:
+        flip = rng.random(n_background) < back_edge_rate
+        src[flip], dst[flip] = dst[flip], src[flip].copy()
+    ts = start_micros + rng.integers(0, span, size=n_background, dtype=np.int64)
+    rupees = np.minimum(rng.lognormal(np.log(5000), 1.0, size=n_background), 79999.0)
+    amount = np.maximum(np.round(rupees * PAISE_PER_RUPEE), PAISE_PER_RUPEE).astype(np.int64)
+
+    planted = np.array(planter.rows, dtype=np.int64).reshape(-1, 4)
+    ts = np.concatenate([ts, planted[:, 0]])
+    amount = np.concatenate([amount, planted[:, 1]])
+    src = np.concatenate([src, planted[:, 2]])
+    dst = np.concatenate([dst, planted[:, 3]])
+
+    order = np.argsort(ts, kind="stable")
+    n = len(order)
+    frame = TransactionFrame(
+        ts=ts[order],
+        amount=amount[order],
+        src=src[order].astype(np.int32),
+        dst=dst[order].astype(np.int32),
+        channel=rng.integers(0, len(CHANNELS), size=n).astype(np.int16),
+        ids=SyntheticIds(n),
+        accounts=[f"ACC{code:08d}" for code in range(n_background_accounts)] + planter.names,
+        channels=list(CHANNELS),
+    )
+    return SyntheticLedger(seed=seed, frame=frame, patterns=planter.patterns)
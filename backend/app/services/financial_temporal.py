@@ -0,0 +1,239 @@
+"""
+Temporal Cycle Engine - Skill 02
+Time-respecting circular trading detection over time-sorted payments
+
+A temporal cycle is a chain of payments p1..pk where each payment leaves
+the account the previous one arrived at, strictly later, and pk returns
+to the sender of p1 no later than `window` after p1. Static loops whose
+payments could never have carried money forward in time are not reported.
+
+Each loop instance is found once, from its earliest payment. Pruning per
+starting payment:
+- the start account must receive a payment inside the window at all
+- a hop-bounded backward sweep from the start account gives, for every
+  account, the latest departure that can still close the loop and the
+  fewest payments needed; the forward search only enters accounts that
+  pass both checks
+- towards each next account only the earliest feasible payment is
+  followed (arriving earlier can never close fewer loops)
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.financial_frame import TransactionFrame, MICROS_PER_HOUR, PAISE_PER_RUPEE, from_micros
+from app.services.financial_pipeline import WorkBudget
+
+DEFAULT_WINDOW_HOURS = 72.0
+DEFAULT_MAX_ACCOUNTS = 6
+MAX_LOOPS_IN_EVIDENCE = 10
+
+
+@dataclass
+class TemporalCycle:
+    """One loop instance: accounts in payment order, starting with the first sender"""
+    accounts: List[str]
+    rows: List[int]
+    transaction_ids: List[str]
+    amounts: List[float]
+    started_at: datetime
+    closed_at: datetime
+
+    @property
+    def total_amount(self) -> float:
+        return round(sum(self.amounts), 2)
+
+    @property
+    def key(self) -> Tuple[str, ...]:
+        """Rotation-independent identity of the account loop"""
+        i = self.accounts.index(min(self.accounts))
+        return tuple(self.accounts[i:] + self.accounts[:i])
+
+
+class TemporalIndex:
+    """
+    Per-account payment lists sorted by time (out by sender, in by receiver),
+    kept in compact arrays so lookups are plain bisects.
+    """
+
+    def __init__(self, frame: TransactionFrame):
+        self.frame = frame
+        n = len(frame.accounts)
+        out_order = np.lexsort((frame.ts, frame.src))
+        in_order = np.lexsort((frame.ts, frame.dst))
+        self.out_offsets = array('q', self._offsets(frame.src, n).tobytes())
+        self.out_ts = array('q', frame.ts[out_order].tobytes())
+        self.out_dst = array('q', frame.dst[out_order].astype(np.int64).tobytes())
+        self.out_row = array('q', out_order.astype(np.int64).tobytes())
+        self.in_offsets = array('q', self._offsets(frame.dst, n).tobytes())
+        self.in_ts = array('q', frame.ts[in_order].tobytes())
+        self.in_src = array('q', frame.src[in_order].astype(np.int64).tobytes())
+
+    @staticmethod
+    def _offsets(codes: np.ndarray, n: int) -> np.ndarray:
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=n), out=offsets[1:])
+        return offsets
+
+    def receives_between(self, account: int, after: int, until: int) -> bool:
+        """Any incoming payment with after < ts <= until"""
+        lo, hi = self.in_offsets[account], self.in_offsets[account + 1]
+        i = bisect_right(self.in_ts, after, lo, hi)
+        return i < hi and self.in_ts[i] <= until
+
+    def closing_times(self, start: int, after: int, until: int,
+                      max_payments: int) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Backward sweep from `start`: for each account, the latest departure
+        time (exclusive bound for arrivals) and the fewest payments that can
+        still reach `start` by `until`, using payments after `after`.
+        """
+        INF = until + 1  # any arrival at the start account up to `until` closes
+        latest = {start: INF}
+        hops = {start: 0}
+        frontier = [start]
+        for depth in range(1, max_payments + 1):
+            improved = {}
+            for x in frontier:
+                lo, hi = self.in_offsets[x], self.in_offsets[x + 1]
+                first = bisect_right(self.in_ts, after, lo, hi)
+                last = bisect_left(self.in_ts, min(latest[x], INF), first, hi)  # ts < latest[x]
+                for i in range(first, last):
+                    u = self.in_src[i]
+                    if u == start:
+                        continue
+                    t = self.in_ts[i]
+                    if t > latest.get(u, -1):
+                        latest[u] = t
+                        improved[u] = None
+                    if u not in hops:
+                        hops[u] = depth
+            frontier = list(improved)
+            if not frontier:
+                break
+        return latest, hops
+
+
+def find_temporal_cycles(frame: TransactionFrame, window_micros: int = int(DEFAULT_WINDOW_HOURS * MICROS_PER_HOUR),
+                         min_accounts: int = 3, max_accounts: int = DEFAULT_MAX_ACCOUNTS,
+                         start_rows: Optional[Iterable[int]] = None,
+                         index: Optional[TemporalIndex] = None,
+                         limit: Optional[int] = None,
+                         budget: Optional[WorkBudget] = None) -> List[TemporalCycle]:
+    """
+    Time-respecting simple cycles of min_accounts..max_accounts accounts
+    that close within window_micros of their first payment.
+    start_rows restricts which payments may open a loop (default: all).
+    Stops early, returning the loops found so far, once budget runs out.
+    """
+    if len(frame) == 0:
+        return []
+    index = index or TemporalIndex(frame)
+    out_offsets, out_ts, out_dst, out_row = index.out_offsets, index.out_ts, index.out_dst, index.out_row
+    src, dst, ts = frame.src, frame.dst, frame.ts
+    found: List[TemporalCycle] = []
+
+    if start_rows is None:
+        candidates = np.argsort(ts, kind="stable")
+    else:
+        candidates = np.asarray(list(start_rows), dtype=np.int64)
+        candidates = candidates[np.argsort(ts[candidates], kind="stable")]
+
+    for r in candidates.tolist():
+        s, v, t0 = int(src[r]), int(dst[r]), int(ts[r])
+        if s == v:
+            continue
+        deadline = t0 + window_micros
+        if budget is not None and not budget.charge(edges=1):
+            break
+        if not index.receives_between(s, t0, deadline):
+            continue
+        latest, hops = index.closing_times(s, t0, deadline, max_accounts - 1)
+        if budget is not None and not budget.charge(nodes=len(latest)):
+            break
+        if v not in latest or hops[v] + 1 > max_accounts:
+            continue
+
+        path = [s, v]
+        rows = [r]
+        on_path = {s, v}
+
+        def extend(x: int, arrived: int) -> bool:
+            lo, hi = bisect_right(out_ts, arrived, out_offsets[x], out_offsets[x + 1]), out_offsets[x + 1]
+            if budget is not None and not budget.charge(nodes=1, edges=hi - lo):
+                return False
+            followed = set()
+            for i in range(lo, hi):
+                t = out_ts[i]
+                if t > deadline:
+                    break
+                w = out_dst[i]
+                if w in followed:
+                    continue
+                followed.add(w)  # earliest payment towards w dominates later ones
+                if w == s:
+                    if len(path) >= min_accounts:
+                        found.append(_make_cycle(frame, path, rows + [out_row[i]]))
+                        if limit is not None and len(found) >= limit:
+                            return False
+                    continue
+                if w in on_path or t >= latest.get(w, -1) or len(path) + hops[w] > max_accounts:
+                    continue
+                path.append(w)
+                rows.append(out_row[i])
+                on_path.add(w)
+                keep_going = extend(w, t)
+                path.pop()
+                rows.pop()
+                on_path.remove(w)
+                if not keep_going:
+                    return False
+            return True
+
+        if not extend(v, t0):
+            break
+    return found
+
+
+def _make_cycle(frame: TransactionFrame, path: List[int], rows: List[int]) -> TemporalCycle:
+    return TemporalCycle(
+        accounts=[frame.accounts[c] for c in path],
+        rows=list(rows),
+        transaction_ids=[frame.ids[row] for row in rows],
+        amounts=[int(frame.amount[row]) / PAISE_PER_RUPEE for row in rows],
+        started_at=from_micros(frame.ts[rows[0]]),
+        closed_at=from_micros(frame.ts[rows[-1]]),
+    )
+
+
+def group_by_loop(cycles: List[TemporalCycle]) -> Dict[Tuple[str, ...], List[TemporalCycle]]:
+    """Loop instances grouped by account loop, in order of first occurrence"""
+    groups: Dict[Tuple[str, ...], List[TemporalCycle]] = {}
+    for cycle in cycles:
+        groups.setdefault(cycle.key, []).append(cycle)
+    return groups
+
+
+def loop_evidence(instances: List[TemporalCycle], window_hours: float) -> Dict:
+    """Alert evidence for one account loop: the transactions closing each instance"""
+    first = instances[0]
+    return {
+        "cycle_length": len(first.accounts),
+        "cycle_path": first.accounts,
+        "transaction_ids": first.transaction_ids,
+        "loop_count": len(instances),
+        "loops": [
+            {
+                "transaction_ids": c.transaction_ids,
+                "started_at": c.started_at.isoformat(),
+                "closed_at": c.closed_at.isoformat(),
+                "amount": c.total_amount
+            }
+            for c in instances[:MAX_LOOPS_IN_EVIDENCE]
+        ],
+        "window_hours": window_hours
+    }
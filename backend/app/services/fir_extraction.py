@@ -0,0 +1,137 @@
+"""
+FIR Extraction Engine - Skill 01
+Precompiled scanners for Smart-FIR entity, BNS section and key-fact extraction
+
+Built once per process from the pattern tables in smart_fir.py and
+BNS_SECTIONS_DB:
+
+- BNS keywords go into one Aho-Corasick automaton. A single pass over the
+  lower-cased complaint finds every keyword of every section, so the cost
+  is the length of the text plus the number of hits, not the size of the
+  section table.
+- Entity and key-fact patterns are compiled once, in table order. Their
+  tables are small and fixed, and separate compiled scans keep each
+  pattern's literal-prefix search; one combined regex measured about three
+  times slower in CPython.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+
+
+class AhoCorasick:
+    """Finds every occurrence of any of a set of keywords in one pass over the text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        ids: Dict[str, int] = {}
+        for keyword in keywords:
+            if keyword and keyword not in ids:
+                ids[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+                self._insert(keyword, ids[keyword])
+        self._link()
+
+    def _insert(self, keyword: str, keyword_id: int):
+        state = 0
+        for char in keyword:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = following
+        self._out[state] += (keyword_id,)
+
+    def _link(self):
+        """Failure links by BFS; each state also reports the keywords of its failure chain"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._out[following] += self._out[self._fail[following]]
+
+    def matches(self, text: str) -> Set[int]:
+        """Ids (positions in self.keywords) of the keywords occurring in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+@dataclass(frozen=True)
+class EntityMatch:
+    entity_type: str
+    value: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class SectionMatch:
+    section_code: str
+    keywords: List[str]  # in the section's own keyword order
+
+
+class ExtractionEngine:
+    def __init__(self, entity_patterns: Mapping[str, Sequence[str]],
+                 sections: Mapping[str, Mapping[str, Any]],
+                 fact_patterns: Sequence[Tuple[str, str]]):
+        self._entities = [(entity_type, re.compile(pattern, re.IGNORECASE))
+                          for entity_type, patterns in entity_patterns.items() for pattern in patterns]
+
+        # BNS keywords: one automaton; a keyword may belong to several sections
+        self._sections = list(sections.items())
+        self._keyword_owners: Dict[str, List[Tuple[int, int]]] = {}
+        for section_index, (_, data) in enumerate(self._sections):
+            for keyword_index, keyword in enumerate(data["keywords"]):
+                self._keyword_owners.setdefault(keyword.lower(), []).append((section_index, keyword_index))
+        self._keywords = AhoCorasick(self._keyword_owners)
+
+        self._facts = [(re.compile(pattern, re.IGNORECASE), template) for pattern, template in fact_patterns]
+
+    def entities(self, text: str) -> List[EntityMatch]:
+        """Every match of every entity pattern, in pattern-table order"""
+        return [EntityMatch(entity_type, match.group(1) if regex.groups else match.group(0), match.start(), match.end())
+                for entity_type, regex in self._entities for match in regex.finditer(text)]
+
+    def sections(self, text: str) -> List[SectionMatch]:
+        """Sections with at least one keyword in the text, in table order"""
+        hits: Dict[int, Set[int]] = {}
+        for keyword_id in self._keywords.matches(text.lower()):
+            for section_index, keyword_index in self._keyword_owners[self._keywords.keywords[keyword_id]]:
+                hits.setdefault(section_index, set()).add(keyword_index)
+        matched = []
+        for section_index in sorted(hits):
+            code, data = self._sections[section_index]
+            matched.append(SectionMatch(code, [data["keywords"][i] for i in sorted(hits[section_index])]))
+        return matched
+
+    def facts(self, text: str, limit: int = 5) -> List[str]:
+        """The first occurrence of each fact pattern, formatted, in pattern order"""
+        facts = []
+        for regex, template in self._facts:
+            match = regex.search(text)
+            if match:
+                facts.append(template.format(match.group(0)))
+                if len(facts) == limit:
+                    break
+        return facts
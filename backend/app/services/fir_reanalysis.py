@@ -0,0 +1,155 @@
+"""
+FIR Re-analysis - Skill 01
+Offline re-analysis of stored FIRs with the regex Smart-FIR engine
+
+Stored Case.analysis_data goes stale whenever the BNS keyword table or the
+extraction patterns change. This job brings every row up to date without
+going through generate_fir one case at a time:
+
+- Cases are read in id order by keyset pagination, one batch per query.
+  Cases whose stored analysis came from the LLM (enrichment_status
+  enriched) are left alone.
+- Batches are analysed in a process pool; each worker builds its own
+  extraction engine once and returns analysis_data already JSON-encoded,
+  so the parent only reads, hands out and writes.
+- Results are written back in submission order, one executemany UPDATE
+  and commit per batch, so `last_id` is always a safe point to resume from.
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, init_db
+from app.models.case import Case
+from app.schemas.fir import EnrichmentStatus
+
+logger = logging.getLogger("LegalOS.FIRReanalysis")
+
+_worker_service = None
+
+
+def _analyze_batch(rows: Sequence[Tuple[str, str]]) -> List[Tuple[str, Optional[str], float]]:
+    """(case id, analysis JSON, confidence) per row; None JSON if the text could not be analysed"""
+    global _worker_service
+    if _worker_service is None:
+        from app.services.smart_fir import SmartFIRService
+        _worker_service = SmartFIRService()
+    results = []
+    for case_id, text in rows:
+        try:
+            analysis, confidence = _worker_service.analyze(text or "")
+            results.append((case_id, json.dumps(analysis.model_dump(mode="json")), confidence))
+        except Exception:
+            results.append((case_id, None, 0.0))
+    return results
+
+
+@dataclass
+class ReanalysisProgress:
+    scanned: int = 0
+    updated: int = 0
+    failed: int = 0
+    last_id: str = ""  # every case up to here has been written
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.scanned / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class FIRReanalysisJob:
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 2000,
+                 session_factory: Callable[[], Session] = SessionLocal):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _not_enriched(c):
+        return or_(c.c.enrichment_status.is_(None), c.c.enrichment_status != EnrichmentStatus.ENRICHED.value)
+
+    def _batches(self, after: str, limit: Optional[int]):
+        c = Case.__table__
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = self.batch_size if remaining is None else min(self.batch_size, remaining)
+            db = self.session_factory()
+            try:
+                batch = db.execute(select(c.c.id, c.c.complaint_text)
+                                   .where(c.c.id > after, self._not_enriched(c))
+                                   .order_by(c.c.id).limit(size)).all()
+            finally:
+                db.close()
+            if not batch:
+                return
+            yield [tuple(row) for row in batch]
+            after = batch[-1].id
+            if remaining is not None:
+                remaining -= len(batch)
+
+    def _write(self, results: List[Tuple[str, Optional[str], float]]) -> int:
+        """Bulk UPDATE of the analysed rows; returns rows written. Rows enriched meanwhile are skipped."""
+        now = datetime.utcnow()
+        params = [{"_id": case_id, "analysis": analysis, "confidence": confidence, "now": now}
+                  for case_id, analysis, confidence in results if analysis is not None]
+        if not params:
+            return 0
+        c = Case.__table__
+        # analysis_data is stored as JSON text; the workers already encoded it
+        stmt = (update(c).where(c.c.id == bindparam("_id"), self._not_enriched(c))
+                .values(analysis_data=bindparam("analysis", type_=String()),
+                        confidence_score=bindparam("confidence"),
+                        updated_at=bindparam("now")))
+        db = self.session_factory()
+        try:
+            written = db.execute(stmt, params).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return written if written is not None and written >= 0 else len(params)
+
+    def run(self, after: str = "", limit: Optional[int] = None,
+            progress: Optional[Callable[[ReanalysisProgress], None]] = None) -> ReanalysisProgress:
+        """Re-analyse every case with id > after (at most `limit`); progress is called after each batch"""
+        init_db()  # tables and columns this job reads may predate the app's last start
+        state = ReanalysisProgress(last_id=after)
+        started = time.perf_counter()
+        pending: Deque[Tuple[str, int, Future]] = deque()
+
+        def drain_one():
+            last_id, scanned, future = pending.popleft()
+            results = future.result()
+            written = self._write(results)
+            state.scanned += scanned
+            state.updated += written
+            state.failed += sum(1 for _, analysis, _ in results if analysis is None)
+            state.last_id = last_id
+            state.elapsed = time.perf_counter() - started
+            if progress:
+                progress(state)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for batch in self._batches(after, limit):
+                # Keep every worker busy without reading the whole table ahead
+                while len(pending) >= 2 * self.workers:
+                    drain_one()
+                pending.append((batch[-1][0], len(batch), pool.submit(_analyze_batch, batch)))
+            while pending:
+                drain_one()
+
+        state.elapsed = time.perf_counter() - started
+        logger.info("Re-analysed %d cases (%d failed) in %.1f s, %.0f rows/s",
+                    state.updated, state.failed, state.elapsed, state.rows_per_second)
+        return state
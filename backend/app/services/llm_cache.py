@@ -0,0 +1,185 @@
+"""
+LLM Response Cache - Shared
+Disk-backed cache of LLM completions for the LLM gateway
+
+Officers regenerate the same FIR draft or charge sheet often. Each stored
+completion is keyed by the sha256 of:
+- the model,
+- the purpose and its prompt template version, bumped whenever a prompt
+  changes,
+- the system prompt and the input, each Unicode-normalised (NFKC) with
+  runs of whitespace collapsed, so reformatting alone still hits.
+
+Entries expire after a TTL. Once the stored content passes a size budget,
+the least recently used entries are evicted. Expired rows are swept
+together with eviction, every EVICT_EVERY writes. The table lives in the
+main database, so every worker shares it and it survives restarts.
+"""
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal, dialect_insert
+from app.models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger("LegalOS.LLMCache")
+
+EVICT_EVERY = 100  # writes between TTL / size sweeps
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_prompt(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def cache_key(model: str, purpose: str, prompt_version: str, system_prompt: str, user_prompt: str) -> str:
+    parts = [model, purpose, prompt_version, normalise_prompt(system_prompt), normalise_prompt(user_prompt)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedCompletion:
+    content: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LLMResponseCache:
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 ttl_seconds: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds or settings.LLM_CACHE_TTL_SECONDS)
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self._tables_ready = False
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _session(self) -> Session:
+        db = self.session_factory()
+        if not self._tables_ready:
+            # Also usable from scripts that never ran init_db()
+            LLMCacheEntry.__table__.create(bind=db.get_bind(), checkfirst=True)
+            self._tables_ready = True
+        return db
+
+    def get(self, key: str) -> Optional[CachedCompletion]:
+        """Unexpired entry for key, marked as used; None on a miss"""
+        t = LLMCacheEntry.__table__
+        now = datetime.utcnow()
+        db = self._session()
+        try:
+            row = db.execute(select(t.c.content, t.c.prompt_tokens, t.c.completion_tokens)
+                             .where(t.c.key == key, t.c.expires_at > now)).first()
+            if row is not None:
+                db.execute(update(t).where(t.c.key == key).values(hits=t.c.hits + 1, last_used_at=now))
+                db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedCompletion(row.content, row.prompt_tokens, row.completion_tokens)
+
+    def put(self, key: str, purpose: str, model: str, prompt_version: str, content: str,
+            prompt_tokens: int = 0, completion_tokens: int = 0):
+        t = LLMCacheEntry.__table__
+        now = datetime.utcnow()
+        values = {
+            "key": key, "purpose": purpose, "model": model, "prompt_version": prompt_version,
+            "content": content, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "size": len(content.encode("utf-8")), "hits": 0,
+            "created_at": now, "expires_at": now + self.ttl, "last_used_at": now,
+        }
+        db = self._session()
+        try:
+            stmt = dialect_insert(db.get_bind())(t).values(**values)
+            db.execute(stmt.on_conflict_do_update(index_elements=[t.c.key], set_={
+                name: stmt.excluded[name] for name in values if name not in ("key", "hits")}))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_bytes; returns rows removed"""
+        t = LLMCacheEntry.__table__
+        db = self._session()
+        try:
+            removed = db.execute(delete(t).where(t.c.expires_at <= datetime.utcnow())).rowcount or 0
+            excess = (db.execute(select(func.coalesce(func.sum(t.c.size), 0))).scalar() or 0) - self.max_bytes
+            if excess > 0:
+                # Oldest first until the running total of sizes covers the excess
+                cutoff, freed = None, 0
+                for last_used_at, size in db.execute(select(t.c.last_used_at, t.c.size)
+                                                     .order_by(t.c.last_used_at)).yield_per(1000):
+                    freed += size
+                    cutoff = last_used_at
+                    if freed >= excess:
+                        break
+                removed += db.execute(delete(t).where(t.c.last_used_at <= cutoff)).rowcount or 0
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if removed:
+            with self._lock:
+                self.evicted += removed
+            logger.info("LLM cache evicted %d entries", removed)
+        return removed
+
+    def clear(self):
+        db = self._session()
+        try:
+            db.execute(delete(LLMCacheEntry.__table__))
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        t = LLMCacheEntry.__table__
+        db = self._session()
+        try:
+            entries, size = db.execute(select(func.count(), func.coalesce(func.sum(t.c.size), 0))).one()
+        finally:
+            db.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries, "bytes": size, "max_bytes": self.max_bytes,
+                "ttl_seconds": int(self.ttl.total_seconds()),
+                "hits": self.hits, "misses": self.misses, "evicted": self.evicted,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+_cache_instance = None
+
+def get_llm_response_cache() -> LLMResponseCache:
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = LLMResponseCache()
+    return _cache_instance
@@ -0,0 +1,306 @@
+"""
+LLM Gateway - Shared
+One async OpenAI client for every LLM-backed service (Smart-FIR, Charge Sheet)
+
+- A single openai.AsyncOpenAI client, so completions never block the
+  event loop.
+- A semaphore bounds concurrent completions per worker. Callers beyond
+  that limit queue instead of piling onto the API.
+- Each attempt has a timeout. Timeouts, connection errors, 429s and 5xx
+  are retried with full-jitter exponential backoff. Other errors are not.
+- A circuit breaker stops calling the API after repeated failures. While
+  it is open, calls fail fast with LLMUnavailableError. After a cool-down,
+  one trial call decides whether to close it again.
+- Per-purpose metrics: calls, failures, retries, cache hits, tokens and
+  latency percentiles.
+- JSON completions that name a prompt template version are served from
+  the persistent response cache (llm_cache.py) when the same prompt was
+  answered before.
+
+Point OPENAI_BASE_URL at scripts/llm_stub_server.py to run everything
+offline.
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import openai
+
+from app.core.config import settings
+from app.services.llm_cache import LLMResponseCache, cache_key, get_llm_response_cache
+
+logger = logging.getLogger("LegalOS.LLMGateway")
+
+# Worth another attempt: the request may succeed if sent again
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """The circuit breaker is open; the LLM API is not being called"""
+
+
+@dataclass
+class LLMResult:
+    content: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float  # seconds from leaving the queue, all attempts and backoff included
+    attempts: int
+    cached: bool = False  # served from the response cache; no API call was made
+
+    def json(self) -> Dict[str, Any]:
+        return json.loads(self.content)
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_timeout`"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one trial call at a time"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def abandon(self):
+        """A call was cancelled before it could tell whether the API is up"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+@dataclass
+class _PurposeMetrics:
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    rejected: int = 0  # failed fast on an open circuit
+    cache_hits: int = 0  # answered from the response cache, not counted in calls
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3) if ordered else None
+
+        return {
+            "calls": self.calls, "failures": self.failures, "retries": self.retries, "rejected": self.rejected,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+            "latency_p50": percentile(0.5), "latency_p95": percentile(0.95),
+        }
+
+
+class LLMGateway:
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 retry_base_delay: Optional[float] = None, cache: Optional[LLMResponseCache] = None):
+        self.api_key = api_key if api_key is not None else settings.OPENAI_API_KEY
+        self.base_url = base_url or settings.OPENAI_BASE_URL or None
+        self.model = model or settings.LLM_MODEL
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.timeout = timeout or settings.LLM_TIMEOUT
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_base_delay = settings.LLM_RETRY_BASE_DELAY if retry_base_delay is None else retry_base_delay
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET)
+        self.cache = cache if cache is not None else (get_llm_response_cache() if settings.LLM_CACHE_ENABLED else None)
+        if not self.api_key and not self.base_url:
+            logger.warning("OPENAI_API_KEY not set; LLM-backed generation will fail")
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._metrics: Dict[str, _PurposeMetrics] = {}
+        self._in_flight = 0
+
+    def _bind_loop(self):
+        """Client and semaphore belong to the running event loop; rebuilt if the loop changes"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            # Retries and timeouts are handled here, not by the SDK
+            self._client = openai.AsyncOpenAI(api_key=self.api_key or "unset", base_url=self.base_url,
+                                              timeout=self.timeout, max_retries=0)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, base * 2^attempt], capped at 30 s"""
+        return random.uniform(0, min(30.0, self.retry_base_delay * 2 ** attempt))
+
+    async def chat(self, messages: List[Dict[str, str]], purpose: str = "default",
+                   model: Optional[str] = None, json_mode: bool = False,
+                   temperature: float = 0.2) -> LLMResult:
+        """One chat completion with bounded concurrency, retries and the circuit breaker"""
+        self._bind_loop()
+        metrics = self._metrics.setdefault(purpose, _PurposeMetrics())
+        metrics.calls += 1
+        model = model or self.model
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        attempt = 0
+        async with self._semaphore:
+            started = time.perf_counter()
+            self._in_flight += 1
+            try:
+                while True:
+                    if not self.breaker.allow():
+                        metrics.rejected += 1
+                        metrics.failures += 1
+                        raise LLMUnavailableError("LLM circuit open; try again shortly")
+                    attempt += 1
+                    try:
+                        completion = await asyncio.wait_for(
+                            self._client.chat.completions.create(
+                                model=model, messages=messages, temperature=temperature, **extra),
+                            timeout=self.timeout)
+                    except (asyncio.TimeoutError, *RETRYABLE_ERRORS) as e:
+                        self.breaker.record_failure()
+                        if attempt > self.max_retries:
+                            metrics.failures += 1
+                            raise
+                        metrics.retries += 1
+                        delay = self._backoff(attempt - 1)
+                        logger.warning("LLM %s attempt %d failed (%s); retrying in %.2f s",
+                                       purpose, attempt, type(e).__name__, delay)
+                        await asyncio.sleep(delay)
+                        continue
+                    except asyncio.CancelledError:
+                        self.breaker.abandon()
+                        raise
+                    except Exception:
+                        # Not retryable (bad request, auth): the API itself answered
+                        self.breaker.record_success()
+                        metrics.failures += 1
+                        raise
+                    self.breaker.record_success()
+                    break
+            finally:
+                self._in_flight -= 1
+
+        latency = time.perf_counter() - started
+        usage = completion.usage
+        result = LLMResult(
+            content=completion.choices[0].message.content or "",
+            model=completion.model or model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            latency=latency,
+            attempts=attempt,
+        )
+        metrics.prompt_tokens += result.prompt_tokens
+        metrics.completion_tokens += result.completion_tokens
+        metrics.latencies.append(latency)
+        logger.info("LLM %s: %.2f s, %d+%d tokens, %d attempt(s)", purpose, latency,
+                    result.prompt_tokens, result.completion_tokens, attempt)
+        return result
+
+    async def complete_json(self, system_prompt: str, user_prompt: str, purpose: str = "default",
+                            temperature: float = 0.2, model: Optional[str] = None,
+                            prompt_version: Optional[str] = None) -> LLMResult:
+        """
+        System + user prompt in JSON mode; parse with result.json(). With a
+        prompt_version the response cache is consulted first, and valid
+        JSON answers are stored for the next identical prompt.
+        """
+        model = model or self.model
+        key = None
+        if self.cache is not None and prompt_version:
+            hit = await self.cached_json(system_prompt, user_prompt, purpose, prompt_version, model)
+            if hit is not None:
+                return hit
+            key = cache_key(model, purpose, prompt_version, system_prompt, user_prompt)
+
+        result = await self.chat([{"role": "system", "content": system_prompt},
+                                  {"role": "user", "content": user_prompt}],
+                                 purpose=purpose, model=model, json_mode=True, temperature=temperature)
+        if key is not None:
+            try:
+                result.json()  # only well-formed answers are worth replaying
+                await asyncio.to_thread(self.cache.put, key, purpose, model, prompt_version, result.content,
+                                        result.prompt_tokens, result.completion_tokens)
+            except Exception as e:
+                logger.warning("LLM cache store failed: %s", e)
+        return result
+
+    async def cached_json(self, system_prompt: str, user_prompt: str, purpose: str, prompt_version: str,
+                          model: Optional[str] = None) -> Optional[LLMResult]:
+        """The cached answer to this prompt, if any; never calls the API"""
+        if self.cache is None:
+            return None
+        model = model or self.model
+        started = time.perf_counter()
+        try:
+            hit = await asyncio.to_thread(self.cache.get,
+                                          cache_key(model, purpose, prompt_version, system_prompt, user_prompt))
+        except Exception as e:
+            logger.warning("LLM cache lookup failed: %s", e)
+            return None
+        if hit is None:
+            return None
+        self._metrics.setdefault(purpose, _PurposeMetrics()).cache_hits += 1
+        return LLMResult(content=hit.content, model=model, prompt_tokens=hit.prompt_tokens,
+                         completion_tokens=hit.completion_tokens,
+                         latency=time.perf_counter() - started, attempts=0, cached=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "purposes": {purpose: m.summary() for purpose, m in self._metrics.items()},
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+_gateway_instance = None
+
+def get_llm_gateway() -> LLMGateway:
+    global _gateway_instance
+    if _gateway_instance is None:
+        _gateway_instance = LLMGateway()
+    return _gateway_instance
@@ -0,0 +1,236 @@
+"""
+Cross-Case Account Index - Skill 02
+Persistent inverted index of financial identifiers across cases
+
+Every analysis records the account numbers, device ids and reference
+numbers it saw, one row per (identifier, case), so an account that turns
+up in ten FIRs' statements is one indexed lookup away from all ten
+instead of requiring the old statements to be uploaded again.
+"""
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, dialect_insert
+from app.models.financial_index import FinancialIdentifierSighting, IdentifierKind, normalise_identifier
+from app.schemas.financial import (
+    Account, IdentifierAppearance, IdentifierLookupResponse, RepeatIdentifier, Transaction
+)
+
+WRITE_CHUNK = 5000  # rows per executemany batch
+
+Key = Tuple[str, str]  # (kind, normalised value)
+
+
+class _Seen:
+    __slots__ = ("transactions", "first", "last")
+
+    def __init__(self):
+        self.transactions = 0
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    def add(self, when: datetime):
+        self.transactions += 1
+        if self.first is None or when < self.first:
+            self.first = when
+        if self.last is None or when > self.last:
+            self.last = when
+
+
+class IdentifierCollector:
+    """
+    Distinct identifiers of one ingest with per-identifier transaction
+    counts and date ranges. Memory grows with distinct identifiers, so
+    streamed statements can feed it batch by batch.
+    """
+
+    def __init__(self):
+        self.seen: Dict[Key, _Seen] = {}
+
+    def _add(self, kind: str, value: Optional[str], when: Optional[datetime] = None):
+        if not value:
+            return
+        key = (kind, normalise_identifier(value))
+        if not key[1]:
+            return
+        entry = self.seen.get(key)
+        if entry is None:
+            entry = self.seen[key] = _Seen()
+        if when is not None:
+            entry.add(when)
+
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        for txn in transactions:
+            self._add(IdentifierKind.ACCOUNT, txn.from_account, txn.date)
+            self._add(IdentifierKind.ACCOUNT, txn.to_account, txn.date)
+            self._add(IdentifierKind.DEVICE, txn.device_id, txn.date)
+            self._add(IdentifierKind.REFERENCE, txn.reference_no, txn.date)
+
+    def add_accounts(self, accounts: Optional[Iterable[Account]]):
+        for account in accounts or ():
+            self._add(IdentifierKind.ACCOUNT, account.account_number)
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+
+def _earliest(column, incoming):
+    return case((or_(column.is_(None), incoming < column), incoming), else_=column)
+
+
+def _latest(column, incoming):
+    return case((or_(column.is_(None), incoming > column), incoming), else_=column)
+
+
+def _appearance(row) -> IdentifierAppearance:
+    return IdentifierAppearance(
+        kind=row.kind,
+        value=row.value,
+        case_id=row.case_id,
+        analysis_id=row.analysis_id,
+        analyses=row.analyses,
+        transactions=row.transactions,
+        first_transaction=row.first_transaction,
+        last_transaction=row.last_transaction,
+        first_indexed=row.first_indexed,
+        last_indexed=row.last_indexed
+    )
+
+
+class AccountIndex:
+    """
+    Inverted index over FinancialIdentifierSighting. Writes are bulk
+    upserts on (kind, value, case_id); lookups hit the (value, kind) and
+    (kind, value, case_id) indexes and never touch transaction data.
+    Queries go through the table (Core), not ORM entities.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._table_ready = False
+
+    def _session(self) -> Session:
+        db = self.session_factory()
+        if not self._table_ready:
+            # Also usable from scripts that never ran init_db()
+            FinancialIdentifierSighting.__table__.create(bind=db.get_bind(), checkfirst=True)
+            self._table_ready = True
+        return db
+
+    def record(self, case_id: str, analysis_id: Optional[str], collector: IdentifierCollector,
+               replace: bool = True) -> int:
+        """
+        Upsert the collected identifiers for one analysis of case_id.
+        replace=True (a full analysis) resets the per-case transaction
+        counts; False (an appended tranche) adds to them. Returns rows written.
+        """
+        if not collector.seen:
+            return 0
+        db = self._session()
+        try:
+            insert = dialect_insert(db.get_bind())
+            now = datetime.utcnow()
+            rows = [{
+                "kind": kind,
+                "value": value,
+                "case_id": case_id,
+                "analysis_id": analysis_id,
+                "analyses": 1,
+                "transactions": seen.transactions,
+                "first_transaction": seen.first,
+                "last_transaction": seen.last,
+                "first_indexed": now,
+                "last_indexed": now,
+            } for (kind, value), seen in collector.seen.items()]
+            table = FinancialIdentifierSighting.__table__
+            stmt = insert(table)
+            incoming = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["kind", "value", "case_id"],
+                set_={
+                    "analysis_id": incoming.analysis_id,
+                    "analyses": table.c.analyses + 1,
+                    "transactions": incoming.transactions if replace
+                    else table.c.transactions + incoming.transactions,
+                    "first_transaction": _earliest(table.c.first_transaction, incoming.first_transaction),
+                    "last_transaction": _latest(table.c.last_transaction, incoming.last_transaction),
+                    "last_indexed": incoming.last_indexed,
+                }
+            )
+            # One compiled statement, executed many times by the driver
+            for lo in range(0, len(rows), WRITE_CHUNK):
+                db.execute(stmt, rows[lo:lo + WRITE_CHUNK])
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def lookup(self, value: str, kind: Optional[str] = None, exclude_case_id: Optional[str] = None,
+               limit: int = 100) -> IdentifierLookupResponse:
+        """Cases that saw an identifier, most recently indexed first"""
+        started = time.perf_counter()
+        value = normalise_identifier(value)
+        db = self._session()
+        try:
+            t = FinancialIdentifierSighting.__table__
+            where = [t.c.value == value]
+            if kind:
+                where.append(t.c.kind == kind)
+            if exclude_case_id:
+                where.append(t.c.case_id != exclude_case_id)
+            total_cases = db.execute(select(func.count(t.c.case_id.distinct())).where(*where)).scalar()
+            rows = db.execute(select(t).where(*where)
+                              .order_by(t.c.last_indexed.desc(), t.c.id.desc()).limit(limit))
+            appearances = [_appearance(row) for row in rows]
+        finally:
+            db.close()
+        return IdentifierLookupResponse(
+            value=value,
+            kind=kind,
+            appearances=appearances,
+            total_cases=total_cases,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+        )
+
+    def repeat_identifiers(self, case_id: str, kind: Optional[str] = None,
+                           limit: int = 500) -> List[RepeatIdentifier]:
+        """
+        Identifiers of case_id that were also seen in other cases (a self
+        join on the index), most widely shared first. limit bounds the
+        number of (identifier, other case) pairs returned.
+        """
+        mine = FinancialIdentifierSighting.__table__.alias("mine")
+        other = FinancialIdentifierSighting.__table__.alias("other")
+        db = self._session()
+        try:
+            query = (select(other)
+                     .join(mine, (mine.c.kind == other.c.kind) & (mine.c.value == other.c.value))
+                     .where(mine.c.case_id == case_id, other.c.case_id != case_id))
+            if kind:
+                query = query.where(mine.c.kind == kind)
+            rows = db.execute(query.order_by(other.c.last_indexed.desc(), other.c.id.desc()).limit(limit))
+            grouped: Dict[Key, List[IdentifierAppearance]] = {}
+            for row in rows:
+                grouped.setdefault((row.kind, row.value), []).append(_appearance(row))
+        finally:
+            db.close()
+        repeats = [RepeatIdentifier(kind=k, value=v, other_cases=cases) for (k, v), cases in grouped.items()]
+        repeats.sort(key=lambda r: (-len(r.other_cases), r.kind, r.value))
+        return repeats
+
+
+# Factory
+_index_instance = None
+
+def get_account_index() -> AccountIndex:
+    global _index_instance
+    if _index_instance is None:
+        _index_instance = AccountIndex()
+    return _index_instance
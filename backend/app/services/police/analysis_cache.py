@@ -0,0 +1,93 @@
+"""
+Financial Analysis Result Cache - Skill 02
+Content-addressed LRU cache bounded by (estimated) bytes
+"""
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Generic, Hashable, Iterable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+V = TypeVar("V")
+
+
+def canonical_digest(*collections: Iterable[BaseModel]) -> str:
+    """
+    SHA-256 over the canonical JSON of each collection.
+    Rows are sorted, so submission order does not change the digest.
+    """
+    digest = hashlib.sha256()
+    for collection in collections:
+        rows = sorted(item.model_dump_json().encode() for item in collection or ())
+        digest.update(len(rows).to_bytes(8, "little"))
+        for row in rows:
+            digest.update(row)
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+@dataclass
+class _Slot(Generic[V]):
+    value: V
+    nbytes: int
+
+
+class ByteLRUCache(Generic[V]):
+    """
+    LRU cache evicting least recently used entries once the summed entry
+    sizes exceed max_bytes. Sizes are supplied by the caller.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._slots: "OrderedDict[Hashable, _Slot[V]]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def get(self, key: Hashable) -> Optional[V]:
+        slot = self._slots.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        self._slots.move_to_end(key)
+        self.hits += 1
+        return slot.value
+
+    def put(self, key: Hashable, value: V, nbytes: int):
+        """Insert or replace an entry (also used to re-size a grown entry)"""
+        old = self._slots.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        if nbytes > self.max_bytes:
+            return  # would evict everything else and still not fit
+        self._slots[key] = _Slot(value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._slots.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self._slots.clear()
+        self.nbytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -1,162 +1,915 @@
 """
 Expert Implementation: Financial Trail Analyzer (Skill 02)
-Algorithm: Graph - DFS for Cycle Detection (Circular Trading), Adjacency List for Network Analysis.
+Algorithm: Graph - DFS for Cycle Detection (Circular Trading), CSR Arrays for Network Analysis.
 """
+import asyncio
+import logging
 import uuid
-from typing import List, Dict, Set, Optional, Tuple
+from typing import BinaryIO, List, Dict, Set, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
 
 from app.core.architecture import BaseService, InMemoryRepository
+from app.core.config import settings
 from app.schemas.financial import (
     FinancialAnalysisResponse, FinancialAnalysisRequest,
-    FinancialNetwork, NetworkNode, NetworkEdge,
+    FinancialNetwork, NetworkNode, NetworkEdge, NetworkPage, DetectorRun,
     AnomalyAlert, AnomalyType, RiskLevel,
-    Transaction, Account, InvestigationLead
+    Transaction, Account, InvestigationLead, FinancialAppendRequest
+)
+from app.services.financial_frame import (
+    TransactionFrame, TransactionFrameBuilder, PAISE_PER_RUPEE, MICROS_PER_HOUR, to_paise, to_micros
+)
+from app.services.financial_temporal import (
+    TemporalCycle, find_temporal_cycles, group_by_loop, loop_evidence, DEFAULT_WINDOW_HOURS
+)
+from app.services.police.statement_stream import StatementStats, iter_transaction_batches
+from app.services.police.analysis_cache import ByteLRUCache, canonical_digest
+from app.services.police.account_index import AccountIndex, IdentifierCollector, get_account_index
+from app.services.financial_network import NetworkView, RISK_RANK, BOTH
+from app.services.financial_pipeline import (
+    WorkBudget, Detector, DetectorPipeline, request_budget, is_complete
 )
 
+logger = logging.getLogger("LegalOS.Financial")
+
 class FinancialGraph:
     """
-    Lightweight Graph engine for financial network analysis.
+    Compact compressed-sparse-row (CSR) graph for financial network analysis.
     Optimized for cycle detection and flow analysis.
+    
+    Accounts are interned to int32 codes; parallel transactions between a
+    pair collapse into one edge. Out-edges of account c live in
+    [offsets[c], offsets[c + 1]) of the edge arrays:
+    - targets:  int32 receiver codes (sorted within each row)
+    - weights:  int64 total paise
+    - counts:   int32 transaction counts
+    - first_ts / last_ts: int64 wall-clock microseconds
+    No Transaction objects are retained.
     """
-    def __init__(self):
-        self.adj = defaultdict(list) # Adjacency list: u -> [(v, amount, txn)]
-        self.nodes = set()
+    def __init__(self, accounts: List[str], offsets: np.ndarray, targets: np.ndarray,
+                 weights: np.ndarray, counts: np.ndarray, first_ts: np.ndarray, last_ts: np.ndarray):
+        self.accounts = accounts
+        self.index = {acc: code for code, acc in enumerate(accounts)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.counts = counts
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+    
+    @classmethod
+    def from_frame(cls, frame: TransactionFrame) -> "FinancialGraph":
+        """Build from a columnar frame: one sort + grouped reductions (O(E log E))"""
+        n = len(frame.accounts)
+        keys = frame.src.astype(np.int64) * max(n, 1) + frame.dst
+        pairs, inverse = np.unique(keys, return_inverse=True)
+        m = len(pairs)
+        
+        weights = np.zeros(m, dtype=np.int64)
+        np.add.at(weights, inverse, frame.amount)
+        counts = np.bincount(inverse, minlength=m).astype(np.int32)
+        first_ts = np.full(m, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first_ts, inverse, frame.ts)
+        last_ts = np.full(m, np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(last_ts, inverse, frame.ts)
         
-    def add_transaction(self, txn: Transaction):
-        self.adj[txn.from_account].append((txn.to_account, txn.amount, txn))
-        self.nodes.add(txn.from_account)
-        self.nodes.add(txn.to_account)
+        src = pairs // max(n, 1)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+        targets = (pairs % max(n, 1)).astype(np.int32)
+        return cls(list(frame.accounts), offsets, targets, weights, counts, first_ts, last_ts)
+    
+    @classmethod
+    def from_transactions(cls, transactions: List[Transaction]) -> "FinancialGraph":
+        return cls.from_frame(TransactionFrame.from_transactions(transactions))
+    
+    @classmethod
+    def from_case_graph(cls, graph: "CaseTransactionGraph") -> "FinancialGraph":
+        """Compact snapshot of an incremental case graph"""
+        accounts = graph.nodes
+        index = {acc: code for code, acc in enumerate(accounts)}
+        rows = sorted((index[u], index[v], agg) for (u, v), agg in graph.edges.items()) if graph.edges else []
+        n, m = len(accounts), len(rows)
+        
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        targets = np.empty(m, dtype=np.int32)
+        weights = np.empty(m, dtype=np.int64)
+        counts = np.empty(m, dtype=np.int32)
+        first_ts = np.empty(m, dtype=np.int64)
+        last_ts = np.empty(m, dtype=np.int64)
+        for i, (u, v, agg) in enumerate(rows):
+            offsets[u + 1] += 1
+            targets[i] = v
+            weights[i] = to_paise(agg.total_amount)
+            counts[i] = agg.transactions
+            first_ts[i] = to_micros(agg.first_transaction)
+            last_ts[i] = to_micros(agg.last_transaction)
+        np.cumsum(offsets, out=offsets)
+        return cls(accounts, offsets, targets, weights, counts, first_ts, last_ts)
+    
+    @property
+    def nodes(self) -> List[str]:
+        return self.accounts
+    
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.offsets, self.targets, self.weights, self.counts, self.first_ts, self.last_ts
+        ))
+    
+    def successors(self, code: int) -> np.ndarray:
+        return self.targets[self.offsets[code]:self.offsets[code + 1]]
 
-    def find_cycles(self, min_length: int = 2, max_length: int = 5) -> List[List[str]]:
+    def find_cycles(self, min_length: int = 2, max_length: int = 5,
+                    budget: Optional[WorkBudget] = None) -> List[List[str]]:
         """
-        Detect circular trading patterns (A->B->C->A) using DFS.
-        Complexity: O(V+E) for each start node (limited depth).
+        Detect circular trading patterns (A->B->C->A) using DFS over the CSR arrays.
+        Each cycle is reported once, rooted at its lowest account code: the
+        search from `start` only enters codes greater than `start`.
+        Cycles have min_length+1 .. max_length+1 accounts.
+        Returns the cycles found so far once budget runs out.
         """
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        min_nodes = min_length + 1
+        max_nodes = max_length + 1
         cycles = []
-        visited = set()
         path = []
-        path_set = set()
+        on_path = set()
 
-        def dfs(u: str, start_node: str, depth: int):
-            visited.add(u)
+        def dfs(u: int, start: int) -> bool:
+            if budget is not None and not budget.charge(nodes=1, edges=offsets[u + 1] - offsets[u]):
+                return False
             path.append(u)
-            path_set.add(u)
-
-            if depth <= max_length:
-                for v, _, _ in self.adj[u]:
-                    if v == start_node and depth >= min_length:
-                        cycles.append(list(path)) # Found cycle back to start
-                    elif v not in path_set:
-                        dfs(v, start_node, depth + 1)
-            
+            on_path.add(u)
+            keep_going = True
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if v == start:
+                    if len(path) >= min_nodes:
+                        cycles.append([self.accounts[c] for c in path]) # Found cycle back to start
+                elif v > start and v not in on_path and len(path) < max_nodes:
+                    keep_going = dfs(v, start)
+                    if not keep_going:
+                        break
             path.pop()
-            path_set.remove(u)
-            # Don't remove from visited to avoid re-processing in global loop? 
-            # Actually for finding ALL cycles, we need careful backtracking.
-            # Simplified for demo: just find simple cycles.
-
-        # Run DFS from each node (limited depth makes this efficient enough for typical case sizes)
-        # For production, we'd use Johnson's algorithm or similar, but simplified DFS is fine here.
-        for node in self.nodes:
-            dfs(node, node, 0)
-            visited.clear() # Clear visited to find cycles starting elsewhere
-            
+            on_path.remove(u)
+            return keep_going
+
+        for start in range(len(self.accounts)):
+            if not dfs(start, start):
+                break
         return cycles
+    
+    def reach_levels(self, source: str, hops: int) -> List[np.ndarray]:
+        """BFS hop levels (arrays of codes) from source, capped at `hops`"""
+        n = len(self.accounts)
+        level = np.full(n, -1, dtype=np.int32)
+        src = self.index[source]
+        level[src] = 0
+        levels = [np.array([src], dtype=np.int32)]
+        for depth in range(1, hops + 1):
+            frontier = levels[-1]
+            if len(frontier) == 0:
+                break
+            starts, ends = self.offsets[frontier], self.offsets[frontier + 1]
+            nxt = np.concatenate([self.targets[s:e] for s, e in zip(starts, ends)]) if len(frontier) else frontier
+            nxt = np.unique(nxt[level[nxt] < 0])
+            if len(nxt) == 0:
+                break
+            level[nxt] = depth
+            levels.append(nxt)
+        return levels
+    
+    def bottleneck_flows(self, source: str, hops: int) -> Dict[str, float]:
+        """
+        Widest shortest-path value (rupees) from source to each account exactly
+        `hops` away, by DP over consecutive BFS levels.
+        """
+        levels = self.reach_levels(source, hops)
+        if len(levels) <= hops:
+            return {}
+        widest = np.zeros(len(self.accounts), dtype=np.int64)
+        widest[levels[0]] = np.iinfo(np.int64).max
+        for depth in range(1, hops + 1):
+            frontier = levels[depth - 1]
+            next_level = np.zeros(len(self.accounts), dtype=bool)
+            next_level[levels[depth]] = True
+            lengths = self.offsets[frontier + 1] - self.offsets[frontier]
+            edge_idx = np.concatenate([np.arange(s, e) for s, e in zip(self.offsets[frontier], self.offsets[frontier + 1])])
+            tails = np.repeat(frontier, lengths)
+            heads = self.targets[edge_idx]
+            keep = next_level[heads]
+            caps = np.minimum(widest[tails[keep]], self.weights[edge_idx[keep]])
+            np.maximum.at(widest, heads[keep], caps)
+        return {
+            self.accounts[c]: int(widest[c]) / PAISE_PER_RUPEE
+            for c in levels[hops]
+        }
 
-class FinancialService(BaseService[FinancialAnalysisResponse, str]):
+@dataclass
+class EdgeAggregate:
+    """Running totals for all transactions between one (src, dst) pair"""
+    transactions: int = 0
+    total_amount: float = 0.0
+    first_transaction: Optional[datetime] = None
+    last_transaction: Optional[datetime] = None
+
+    def add(self, txn: Transaction):
+        self.transactions += 1
+        self.total_amount += txn.amount
+        if self.first_transaction is None or txn.date < self.first_transaction:
+            self.first_transaction = txn.date
+        if self.last_transaction is None or txn.date > self.last_transaction:
+            self.last_transaction = txn.date
+
+
+class CaseTransactionGraph:
+    """
+    Persistent, append-only transaction graph for a single case.
+    Edge aggregates and strongly connected components are maintained
+    incrementally, so each new tranche only touches what it changes.
+    Tranches that add many new edges at once (bulk loads) rebuild the
+    SCCs with one linear pass instead of merging edge by edge.
+    A columnar log of the ingested payments feeds time-respecting cycle
+    detection (cycle_window_hours=None falls back to static cycles).
+    """
+    BULK_SCC_EDGES = 256
     
-    async def analyze(self, request: FinancialAnalysisRequest) -> FinancialAnalysisResponse:
-        graph = FinancialGraph()
-        total_volume = 0.0
+    def __init__(self, case_id: str, min_cycle_length: int = 2, max_cycle_length: int = 5,
+                 cycle_window_hours: Optional[float] = DEFAULT_WINDOW_HOURS):
+        self.case_id = case_id
+        self.min_cycle_length = min_cycle_length
+        self.max_cycle_length = max_cycle_length
+        self.cycle_window_hours = cycle_window_hours
+        self.log = TransactionFrameBuilder()
+        self.edges: Dict[Tuple[str, str], EdgeAggregate] = {}
+        self.succ: Dict[str, Set[str]] = defaultdict(set)
+        self.pred: Dict[str, Set[str]] = defaultdict(set)
+        self.accounts: Dict[str, Account] = {}
+        self.txn_ids: Set[str] = set()
+        self.total_volume = 0.0
+        self.threshold: Optional[float] = None
+        
+        # Incremental SCCs: node -> component id, component id -> members
+        self.scc_of: Dict[str, int] = {}
+        self.scc_members: Dict[int, Set[str]] = {}
+        self._next_scc = 0
+        self._sccs_stale = False
         
-        # 1. Build Graph (O(E))
-        for txn in request.transactions:
-            graph.add_transaction(txn)
-            total_volume += txn.amount
+        # Anomalies keyed so re-evaluation replaces rather than duplicates
+        self.cycles: Dict[Tuple[str, ...], AnomalyAlert] = {}
+        self.loops: Dict[Tuple[str, ...], List[TemporalCycle]] = {}
+        self.structuring: Dict[Tuple[str, str], AnomalyAlert] = {}
 
-        # 2. Detect Anomalies
-        anomalies = []
-        leads = []
+    @property
+    def nodes(self) -> List[str]:
+        return list(self.scc_of)
+
+    @property
+    def transaction_count(self) -> int:
+        return len(self.txn_ids)
+
+    def _add_node(self, node: str):
+        if node not in self.scc_of:
+            self.scc_of[node] = self._next_scc
+            self.scc_members[self._next_scc] = {node}
+            self._next_scc += 1
+
+    def _merge_sccs(self, u: str, v: str):
+        """
+        Edge u->v was added between different components. If v reaches u,
+        every node on a v~>u path joins a single component.
+        """
+        forward = self._reachable(v, self.succ)
+        if u not in forward:
+            return
+        backward = self._reachable(u, self.pred)
+        merged_ids = {self.scc_of[n] for n in forward & backward}
+        keep = self.scc_of[u]
+        for cid in merged_ids:
+            if cid == keep:
+                continue
+            for node in self.scc_members.pop(cid):
+                self.scc_of[node] = keep
+                self.scc_members[keep].add(node)
+
+    def rebuild_sccs(self):
+        """Recompute all SCCs from scratch (iterative Tarjan, O(V+E))"""
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        self.scc_of = {}
+        self.scc_members = {}
+        self._next_scc = 0
+        counter = 0
         
-        # 2.1 Circular Trading (Graph Cycle Detection)
-        cycles = graph.find_cycles() # Returns list of nodes in cycle
-        unique_cycles = set(tuple(sorted(c)) for c in cycles) # Deduplicate A-B-A vs B-A-B
+        for root in list(self.succ.keys() | self.pred.keys()):
+            if root in index:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.succ.get(root, ())))]
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.succ.get(child, ()))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    members = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        members.add(member)
+                        self.scc_of[member] = self._next_scc
+                        if member == node:
+                            break
+                    self.scc_members[self._next_scc] = members
+                    self._next_scc += 1
+        self._sccs_stale = False
+
+    def _ensure_sccs(self):
+        if self._sccs_stale:
+            self.rebuild_sccs()
+
+    @staticmethod
+    def _reachable(start: str, adjacency: Dict[str, Set[str]]) -> Set[str]:
+        seen = {start}
+        stack = [start]
+        while stack:
+            for nxt in adjacency.get(stack.pop(), ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def append(self, transactions: List[Transaction], accounts: Optional[List[Account]] = None,
+               update_sccs: bool = True) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """
+        Ingest a tranche. Transactions already seen (by id) are skipped.
+        Returns (touched pairs, newly created pairs) in first-seen order.
+        With update_sccs=False component upkeep is deferred until next needed.
+        """
+        for acc in accounts or []:
+            self.accounts[acc.account_number] = acc
         
-        for cycle in unique_cycles:
-            # Reconstruct cycle details
-            cycle_nodes = list(cycle)
-            amount_est = 0 
-            # (Simplified estimation logic)
+        touched: Dict[Tuple[str, str], None] = {}
+        created: List[Tuple[str, str]] = []
+        for txn in transactions:
+            if txn.id in self.txn_ids:
+                continue
+            self.txn_ids.add(txn.id)
+            self.total_volume += txn.amount
+            self.log.append(txn)
             
-            anomalies.append(AnomalyAlert(
-                id=str(uuid.uuid4()),
-                type=AnomalyType.CIRCULAR_TRADING,
-                risk_level=RiskLevel.CRITICAL,
-                title="Circular Trading Detected",
-                description=f"Funds moving in a circle between {len(cycle_nodes)} entities: {', '.join(cycle_nodes)}",
-                affected_accounts=cycle_nodes,
-                amount_involved=0.0, # Placeholder
-                evidence={"cycle_path": cycle_nodes},
-                detected_at=datetime.now(),
-                confidence_score=0.95
-            ))
+            pair = (txn.from_account, txn.to_account)
+            agg = self.edges.get(pair)
+            if agg is None:
+                agg = self.edges[pair] = EdgeAggregate()
+                created.append(pair)
+            agg.add(txn)
+            touched[pair] = None
+            
+            u, v = pair
+            self._add_node(u)
+            self._add_node(v)
+            self.succ[u].add(v)
+            self.pred[v].add(u)
+        
+        if not update_sccs or len(created) > self.BULK_SCC_EDGES:
+            self._sccs_stale = True
+        if update_sccs:
+            if self._sccs_stale:
+                self.rebuild_sccs()
+            else:
+                for u, v in created:
+                    if self.scc_of[u] != self.scc_of[v]:
+                        self._merge_sccs(u, v)
+        return list(touched), created
 
-        # 2.2 Structuring (Pattern Matching) - Multiple small txns
-        # Group by sender -> receiver
-        flows = defaultdict(list)
-        for txn in request.transactions:
-            flows[(txn.from_account, txn.to_account)].append(txn)
+    def cycles_through(self, u: str, v: str, budget: Optional[WorkBudget] = None) -> List[List[str]]:
+        """
+        Simple cycles using edge u->v, restricted to u's component.
+        Cycle sizes match FinancialGraph.find_cycles: min_length+1 .. max_length+1 nodes.
+        Returns the cycles found so far once budget runs out.
+        """
+        self._ensure_sccs()
+        if u == v or self.scc_of[u] != self.scc_of[v]:
+            return []
+        component = self.scc_members[self.scc_of[u]]
+        min_nodes = self.min_cycle_length + 1
+        max_nodes = self.max_cycle_length + 1
+        found = []
+        path = [u, v]
+        on_path = {u, v}
+
+        def dfs(node: str) -> bool:
+            if budget is not None and not budget.charge(nodes=1, edges=len(self.succ[node])):
+                return False
+            for nxt in self.succ[node]:
+                if nxt == u:
+                    if len(path) >= min_nodes:
+                        found.append(list(path))
+                elif nxt not in on_path and nxt in component and len(path) < max_nodes:
+                    path.append(nxt)
+                    on_path.add(nxt)
+                    keep_going = dfs(nxt)
+                    path.pop()
+                    on_path.remove(nxt)
+                    if not keep_going:
+                        return False
+            return True
+
+        dfs(v)
+        return found
+
+    @property
+    def cyclic_component_count(self) -> int:
+        self._ensure_sccs()
+        return sum(1 for members in self.scc_members.values() if len(members) > 1)
+
+    def copy(self, case_id: Optional[str] = None) -> "CaseTransactionGraph":
+        """Independent copy; appends to the copy never reach this graph"""
+        self._ensure_sccs()
+        clone = CaseTransactionGraph(case_id or self.case_id, self.min_cycle_length, self.max_cycle_length,
+                                     self.cycle_window_hours)
+        clone.log = self.log.copy()
+        clone.edges = {pair: replace(agg) for pair, agg in self.edges.items()}
+        clone.succ = defaultdict(set, {node: set(nbrs) for node, nbrs in self.succ.items()})
+        clone.pred = defaultdict(set, {node: set(nbrs) for node, nbrs in self.pred.items()})
+        clone.accounts = dict(self.accounts)
+        clone.txn_ids = set(self.txn_ids)
+        clone.total_volume = self.total_volume
+        clone.threshold = self.threshold
+        clone.scc_of = dict(self.scc_of)
+        clone.scc_members = {cid: set(members) for cid, members in self.scc_members.items()}
+        clone._next_scc = self._next_scc
+        clone.cycles = dict(self.cycles)
+        clone.loops = {key: list(instances) for key, instances in self.loops.items()}
+        clone.structuring = dict(self.structuring)
+        return clone
+
+    # Rough CPython footprints, used only to budget the result cache
+    EDGE_BYTES = 450      # pair tuple + EdgeAggregate + datetimes + adjacency slots
+    NODE_BYTES = 350      # SCC tables + adjacency sets
+    TXN_ID_BYTES = 160    # id string + set slot + columnar log row
+    ALERT_BYTES = 2000    # AnomalyAlert model with evidence
+
+    def estimated_nbytes(self) -> int:
+        return (len(self.edges) * self.EDGE_BYTES
+                + len(self.scc_of) * self.NODE_BYTES
+                + len(self.txn_ids) * self.TXN_ID_BYTES
+                + (len(self.cycles) + len(self.structuring) + len(self.accounts)) * self.ALERT_BYTES)
+
+
+@dataclass
+class CachedAnalysis:
+    """
+    Cache entry for one transaction/account set. The graph artefacts
+    (edge aggregates, SCCs, cycles) do not depend on the threshold;
+    structuring alerts and stored responses are kept per threshold.
+    """
+    graph: CaseTransactionGraph
+    alerts: Dict[float, Dict[Tuple[str, str], AnomalyAlert]] = field(default_factory=dict)
+    responses: Dict[Tuple[str, float], str] = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        alerts = sum(len(by_pair) for by_pair in self.alerts.values())
+        return self.graph.estimated_nbytes() + alerts * CaseTransactionGraph.ALERT_BYTES
+
+
+class FinancialService(BaseService[FinancialAnalysisResponse, str]):
+    
+    def __init__(self, repository, cache_max_bytes: int = settings.FINANCIAL_CACHE_MAX_BYTES,
+                 index: Optional[AccountIndex] = None):
+        super().__init__(repository)
+        # Cross-case identifier index, updated after every new analysis (None: not indexed)
+        self.index = index
+        self._case_graphs: Dict[str, CaseTransactionGraph] = {}
+        # Content-addressed results: digest -> CachedAnalysis
+        self.results = ByteLRUCache[CachedAnalysis](cache_max_bytes)
+        # Digest the live case graph was built from (dropped once it is appended to)
+        self._case_digests: Dict[str, str] = {}
+        # One writer per case graph: appends and detection run in threadpool threads
+        self._case_locks: Dict[str, asyncio.Lock] = {}
+    
+    def _case_lock(self, case_id: str) -> asyncio.Lock:
+        return self._case_locks.setdefault(case_id, asyncio.Lock())
+    
+    async def analyze(self, request: FinancialAnalysisRequest) -> FinancialAnalysisResponse:
+        """
+        Full analysis: replaces the case graph with the request's transactions.
+        Identical transaction/account sets are served from the result cache;
+        a new threshold only re-runs the structuring check.
+        """
+        case_id, threshold = request.case_id, request.threshold_amount
+        digest = canonical_digest(request.transactions, request.accounts)
+        cached = self.results.get(digest)
+        budget = request_budget(request.time_budget_seconds, request.work_budget)
+        reports = None
+        
+        async with self._case_lock(case_id):
+            if cached is None:
+                graph = CaseTransactionGraph(case_id)
+                graph.append(request.transactions, request.accounts)
+                reports = self._evaluate(graph, 0, [], [], threshold, budget)
+                template = graph.copy()
+                template.structuring, template.threshold = {}, None
+                cached = CachedAnalysis(template, alerts={threshold: dict(graph.structuring)})
+            else:
+                graph = self._case_graphs.get(case_id) if self._case_digests.get(case_id) == digest else None
+                if graph is None:
+                    graph = cached.graph.copy(case_id)
+                alerts = cached.alerts.get(threshold)
+                if alerts is None:
+                    # cycles reused, structuring re-run
+                    reports = self._evaluate(graph, None, [], [], threshold, budget)
+                    if is_complete(reports):
+                        cached.alerts[threshold] = dict(graph.structuring)
+                else:
+                    graph.structuring, graph.threshold = dict(alerts), threshold
             
-        for (src, dst), txns in flows.items():
-            # Check for multiple transactions within short window just below threshold
-            # Simplified: just count > 3 txns in period
-            if len(txns) >= 3:
-                total_flow = sum(t.amount for t in txns)
-                if total_flow > request.threshold_amount:
-                    anomalies.append(AnomalyAlert(
-                        id=str(uuid.uuid4()),
-                        type=AnomalyType.STRUCTURING,
-                        risk_level=RiskLevel.HIGH,
-                        title="Potential Structuring (Smurfing)",
-                        description=f"{len(txns)} transactions found between {src} and {dst} totaling {total_flow}, potentially splitting large amounts.",
-                        affected_accounts=[src, dst],
-                        amount_involved=total_flow,
-                        evidence={"transaction_count": len(txns)},
-                        detected_at=datetime.now(),
-                        confidence_score=0.85
-                    ))
-
-        # 3. Construct Network for Visualization
-        nodes = []
-        edges = []
-        
-        # Create Nodes
-        for acc_id in graph.nodes:
-            # Find account details if provided
-            acc_details = next((a for a in request.accounts if a.account_number == acc_id), None)
-            nodes.append(NetworkNode(
+            self._case_graphs[case_id] = graph
+            self._case_digests[case_id] = digest
+            
+            # Re-posts of the same analysis return the stored response
+            response_id = cached.responses.get((case_id, threshold))
+            response = await self.get(response_id) if response_id else None
+            fresh = response is None
+            if fresh:
+                response = self._build_response(graph, len(request.transactions), reports)
+        
+        if fresh:
+            response = await self.create(response)
+            collector = IdentifierCollector()
+            collector.add_transactions(request.transactions)
+            collector.add_accounts(request.accounts)
+            await self._index(case_id, response.id, collector, replace=True)
+            if not response.complete:
+                return response  # partial results are never cached
+            cached.responses[(case_id, threshold)] = response.id
+        self.results.put(digest, cached, cached.nbytes)
+        return response
+    
+    async def append_transactions(self, case_id: str, request: FinancialAppendRequest) -> FinancialAnalysisResponse:
+        """Append a tranche to the case graph and re-evaluate only what it touched"""
+        budget = request_budget(request.time_budget_seconds, request.work_budget)
+        async with self._case_lock(case_id):
+            graph = self._case_graphs.get(case_id)
+            if graph is None:
+                graph = self._case_graphs[case_id] = CaseTransactionGraph(case_id)
+            self._case_digests.pop(case_id, None)
+            response = await self._ingest(graph, request.transactions, request.accounts,
+                                          request.threshold_amount, budget)
+        collector = IdentifierCollector()
+        collector.add_transactions(request.transactions)
+        collector.add_accounts(request.accounts)
+        await self._index(case_id, response.id, collector, replace=False)
+        return response
+    
+    def get_case_graph(self, case_id: str) -> Optional[CaseTransactionGraph]:
+        return self._case_graphs.get(case_id)
+    
+    def network_view(self, graph: CaseTransactionGraph) -> NetworkView:
+        """Level-of-detail view of a case graph; alerted accounts are kept in focus"""
+        alerts = list(graph.cycles.values()) + list(graph.structuring.values())
+        alert_risk: Dict[str, RiskLevel] = {}
+        for alert in alerts:
+            for acc in alert.affected_accounts:
+                if RISK_RANK[alert.risk_level] > RISK_RANK[alert_risk.get(acc, RiskLevel.LOW)]:
+                    alert_risk[acc] = alert.risk_level
+        
+        def rating(acc_id: str) -> RiskLevel:
+            acc_details = graph.accounts.get(acc_id)
+            return acc_details.risk_rating if acc_details else RiskLevel.MEDIUM
+        
+        def risk(acc_id: str) -> RiskLevel:
+            return max(rating(acc_id), alert_risk.get(acc_id, RiskLevel.LOW), key=RISK_RANK.get)
+        
+        def make_node(acc_id: str) -> NetworkNode:
+            acc_details = graph.accounts.get(acc_id)
+            return NetworkNode(
                 id=acc_id,
                 label=acc_details.account_holder if acc_details else f"Unknown ({acc_id})",
                 type="account",
-                risk_level=acc_details.risk_rating if acc_details else RiskLevel.MEDIUM,
+                risk_level=rating(acc_id),
                 properties={"bank": acc_details.bank_name if acc_details else "Unknown"}
-            ))
-            
-        # Create Edges
-        for (src, dst), txns in flows.items():
-            total = sum(t.amount for t in txns)
-            edges.append(NetworkEdge(
+            )
+        
+        def make_edge(src: str, dst: str, agg) -> NetworkEdge:
+            return NetworkEdge(
                 source=src,
                 target=dst,
-                weight=total / 10000, # Visual weight
-                transactions=len(txns),
-                total_amount=total,
-                first_transaction=min(t.date for t in txns),
-                last_transaction=max(t.date for t in txns)
-            ))
+                weight=agg.total_amount / 10000, # Visual weight
+                transactions=agg.transactions,
+                total_amount=agg.total_amount,
+                first_transaction=agg.first_transaction,
+                last_transaction=agg.last_transaction
+            )
+        
+        return NetworkView(graph.nodes, graph.edges, make_node, make_edge, risk,
+                           focus=alert_risk, succ=graph.succ, pred=graph.pred)
+    
+    def network_overview(self, case_id: str, max_nodes: int = settings.FINANCIAL_NETWORK_MAX_NODES,
+                         max_edges: int = settings.FINANCIAL_NETWORK_MAX_EDGES,
+                         min_risk: RiskLevel = RiskLevel.HIGH,
+                         min_amount: float = 0.0) -> Optional[FinancialNetwork]:
+        """Bounded overview of the case graph (None if the case has no graph)"""
+        graph = self._case_graphs.get(case_id)
+        if graph is None:
+            return None
+        return self.network_view(graph).overview(max_nodes, max_edges, min_risk, min_amount)
+    
+    def network_page(self, case_id: str, node_id: str, direction: str = BOTH, offset: int = 0,
+                     limit: int = 50, min_amount: float = 0.0) -> Optional[NetworkPage]:
+        """
+        One page of an account's (or aggregate node's) counterparties.
+        None if the case has no graph; KeyError for unknown accounts.
+        """
+        graph = self._case_graphs.get(case_id)
+        if graph is None:
+            return None
+        return self.network_view(graph).page(node_id, direction, offset, limit, min_amount)
+    
+    def cache_stats(self) -> Dict:
+        return self.results.stats()
+    
+    async def ingest_statement(self, case_id: str, stream: BinaryIO, fmt: str,
+                               threshold: float, append: bool = False,
+                               batch_size: int = 5000, time_budget_seconds: Optional[float] = None,
+                               work_budget: Optional[int] = None) -> FinancialAnalysisResponse:
+        """
+        Stream a CSV/NDJSON statement into the case graph batch by batch.
+        Only one batch of parsed rows is alive at a time; detection runs once
+        after the last batch. A replacement graph is only installed once the
+        whole upload has been read, so a failed upload keeps the case graph.
+        """
+        stats = StatementStats()
+        collector = IdentifierCollector()
+        
+        async with self._case_lock(case_id):
+            graph = self._case_graphs.get(case_id) if append else None
+            if graph is None:
+                graph = CaseTransactionGraph(case_id)
+            else:
+                self._case_digests.pop(case_id, None)  # appended to in place from here on
             
+            def consume() -> List[DetectorRun]:
+                since_row = len(graph.log)
+                touched: Dict[Tuple[str, str], None] = {}
+                created: List[Tuple[str, str]] = []
+                for batch in iter_transaction_batches(stream, fmt, stats, batch_size):
+                    collector.add_transactions(batch)
+                    batch_touched, batch_created = graph.append(batch, update_sccs=False)
+                    touched.update(dict.fromkeys(batch_touched))
+                    created.extend(batch_created)
+                # The detection budget starts once the upload has been read
+                budget = request_budget(time_budget_seconds, work_budget)
+                return self._evaluate(graph, since_row, list(touched), created, threshold, budget)
+            
+            # Parsing and graph updates are CPU-bound; keep them off the event loop
+            reports = await run_in_threadpool(consume)
+            self._case_graphs[case_id] = graph
+            self._case_digests.pop(case_id, None)
+            response = self._build_response(graph, stats.rows_accepted, reports)
+        
+        response.metrics.update({
+            "rows_read": stats.rows_read,
+            "rows_rejected": stats.rows_rejected,
+            "rejected_samples": stats.errors
+        })
+        response = await self.create(response)
+        await self._index(case_id, response.id, collector, replace=not append)
+        return response
+    
+    async def _index(self, case_id: str, analysis_id: str, collector: IdentifierCollector, replace: bool):
+        """Record an analysis in the cross-case index; a failing index never fails the analysis"""
+        if self.index is None or not collector:
+            return
+        try:
+            await run_in_threadpool(self.index.record, case_id, analysis_id, collector, replace)
+        except Exception:
+            logger.exception("Cross-case index update failed for case %s", case_id)
+    
+    def prior_appearances(self, value: str, kind: Optional[str] = None,
+                          exclude_case_id: Optional[str] = None, limit: int = 100):
+        """Cases in which an account number, device id or reference number was seen"""
+        return self._require_index().lookup(value, kind, exclude_case_id, limit)
+    
+    def repeat_identifiers(self, case_id: str, kind: Optional[str] = None, limit: int = 500):
+        """Identifiers of a case that also appear in other cases"""
+        return self._require_index().repeat_identifiers(case_id, kind, limit)
+    
+    def _require_index(self) -> AccountIndex:
+        if self.index is None:
+            raise RuntimeError("Cross-case index is not configured")
+        return self.index
+    
+    async def _ingest(self, graph: CaseTransactionGraph, transactions: List[Transaction],
+                      accounts: Optional[List[Account]], threshold: float,
+                      budget: Optional[WorkBudget] = None) -> FinancialAnalysisResponse:
+        # 1. Update Graph (O(new E) + incremental SCC merges)
+        since_row = len(graph.log)
+        touched, created = graph.append(transactions, accounts)
+        
+        # 2. Re-evaluate Anomalies touched by the new edges
+        reports = self._evaluate(graph, since_row, touched, created, threshold, budget)
+        
+        return await self.create(self._build_response(graph, len(transactions), reports))
+    
+    def _evaluate(self, graph: CaseTransactionGraph, since_row: Optional[int], touched: List[Tuple[str, str]],
+                  created: List[Tuple[str, str]], threshold: float,
+                  budget: Optional[WorkBudget] = None) -> List[DetectorRun]:
+        """
+        Re-run detection after an ingest. Log rows from since_row on are new
+        (since_row=0: fresh graph, None: nothing new, structuring only).
+        Detectors run cheapest first within budget; see DetectorPipeline.
+        """
+        budget = budget or WorkBudget()
+        
+        # 2.1 Structuring: only touched pairs, unless the threshold moved
+        def structuring():
+            pairs = touched
+            if graph.threshold != threshold:
+                graph.threshold = threshold
+                pairs = list(graph.edges)
+            for pair in pairs:
+                if not budget.charge(edges=1):
+                    graph.threshold = None  # force a full pass next time
+                    return
+                agg = graph.edges[pair]
+                if agg.transactions >= 3 and agg.total_amount > threshold:
+                    graph.structuring[pair] = self._structuring_alert(pair, agg)
+                else:
+                    graph.structuring.pop(pair, None)
+        
+        # 2.2 Circular Trading
+        def circular_trading():
+            if since_row is None or since_row >= len(graph.log):
+                return
+            if graph.cycle_window_hours is None:
+                self._evaluate_static_cycles(graph, since_row == 0, created, budget)
+            else:
+                self._evaluate_temporal_loops(graph, since_row, budget)
+        
+        pipeline = DetectorPipeline([
+            Detector("structuring", structuring, cost=1),
+            Detector("circular_trading", circular_trading, cost=3),
+        ])
+        return pipeline.run(budget, lambda: len(graph.cycles) + len(graph.structuring))
+    
+    def _evaluate_static_cycles(self, graph: CaseTransactionGraph, fresh: bool,
+                                created: List[Tuple[str, str]], budget: Optional[WorkBudget] = None):
+        # On a fresh graph each cycle is found once on the CSR snapshot;
+        # afterwards new cycles must run through a newly created edge
+        if fresh:
+            found = FinancialGraph.from_case_graph(graph).find_cycles(
+                graph.min_cycle_length, graph.max_cycle_length, budget
+            )
+        else:
+            found = []
+            for u, v in created:
+                found.extend(graph.cycles_through(u, v, budget))
+                if budget is not None and budget.exhausted:
+                    break
+        for cycle in found:
+            key = tuple(sorted(cycle)) # Deduplicate A-B-A vs B-A-B
+            if key not in graph.cycles:
+                graph.cycles[key] = self._cycle_alert(list(key))
+    
+    def _evaluate_temporal_loops(self, graph: CaseTransactionGraph, since_row: int,
+                                 budget: Optional[WorkBudget] = None):
+        """
+        Time-ordered loops containing at least one new payment. Such a loop
+        opens at most one window before the earliest new payment, so only
+        log rows in [earliest new - window, latest new + window] are searched.
+        
+        New payments can also displace known instances (an earlier payment
+        on the same hop is followed instead), so for every loop touched by
+        them the instances opening in [earliest new - window, latest new]
+        are replaced by this search; instances opening outside it cannot
+        see a new payment and are kept.
+        """
+        window = int(graph.cycle_window_hours * MICROS_PER_HOUR)
+        if since_row > 0:
+            # Only the window is materialised, so a tranche costs in proportion to its time span
+            new_ts = graph.log.timestamps(since_row)
+            lo, hi = int(new_ts.min()) - window, int(new_ts.max())
+            sub_rows = graph.log.rows_between(lo, hi + window)
+            sub = graph.log.take(sub_rows)
+            opens = np.flatnonzero(sub.ts <= hi)
+            loops = find_temporal_cycles(sub, window, graph.min_cycle_length + 1,
+                                         graph.max_cycle_length + 1, start_rows=opens, budget=budget)
+            for loop in loops:
+                loop.rows = [int(sub_rows[r]) for r in loop.rows]
+        else:
+            loops = find_temporal_cycles(graph.log.build(), window, graph.min_cycle_length + 1,
+                                         graph.max_cycle_length + 1, budget=budget)
+        
+        found = group_by_loop(loops)
+        touched = [key for key, instances in found.items()
+                   if any(max(loop.rows) >= since_row for loop in instances)]
+        complete = budget is None or not budget.exhausted
+        for key in touched:
+            instances = found[key]
+            if since_row > 0:
+                seen = {tuple(loop.rows) for loop in instances}
+                # A search cut short by the budget replaces nothing it may have missed
+                instances = instances + [
+                    loop for loop in graph.loops.get(key, [])
+                    if tuple(loop.rows) not in seen
+                    and not (complete and lo <= to_micros(loop.started_at) <= hi)
+                ]
+            merged = sorted(instances, key=lambda loop: (loop.started_at, loop.rows))
+            graph.loops[key] = merged
+            previous = graph.cycles.get(key)
+            graph.cycles[key] = self._loop_alert(merged, graph.cycle_window_hours,
+                                                 previous.id if previous else None)
+    
+    def _loop_alert(self, instances: List[TemporalCycle], window_hours: float,
+                    alert_id: Optional[str] = None) -> AnomalyAlert:
+        cycle_nodes = instances[0].accounts
+        return AnomalyAlert(
+            id=alert_id or str(uuid.uuid4()),
+            type=AnomalyType.CIRCULAR_TRADING,
+            risk_level=RiskLevel.CRITICAL,
+            title="Circular Trading Detected",
+            description=f"Funds moving in a circle between {len(cycle_nodes)} entities: {', '.join(cycle_nodes)} "
+                        f"({len(instances)} time-ordered loop(s) within {window_hours:g}h)",
+            affected_accounts=cycle_nodes,
+            amount_involved=round(sum(loop.total_amount for loop in instances), 2),
+            evidence=loop_evidence(instances, window_hours),
+            detected_at=datetime.now(),
+            confidence_score=0.95
+        )
+    
+    def _cycle_alert(self, cycle_nodes: List[str]) -> AnomalyAlert:
+        return AnomalyAlert(
+            id=str(uuid.uuid4()),
+            type=AnomalyType.CIRCULAR_TRADING,
+            risk_level=RiskLevel.CRITICAL,
+            title="Circular Trading Detected",
+            description=f"Funds moving in a circle between {len(cycle_nodes)} entities: {', '.join(cycle_nodes)}",
+            affected_accounts=cycle_nodes,
+            amount_involved=0.0, # Placeholder
+            evidence={"cycle_path": cycle_nodes},
+            detected_at=datetime.now(),
+            confidence_score=0.95
+        )
+    
+    def _structuring_alert(self, pair: Tuple[str, str], agg: EdgeAggregate) -> AnomalyAlert:
+        src, dst = pair
+        return AnomalyAlert(
+            id=str(uuid.uuid4()),
+            type=AnomalyType.STRUCTURING,
+            risk_level=RiskLevel.HIGH,
+            title="Potential Structuring (Smurfing)",
+            description=f"{agg.transactions} transactions found between {src} and {dst} totaling {agg.total_amount}, potentially splitting large amounts.",
+            affected_accounts=[src, dst],
+            amount_involved=agg.total_amount,
+            evidence={"transaction_count": agg.transactions},
+            detected_at=datetime.now(),
+            confidence_score=0.85
+        )
+    
+    def _build_response(self, graph: CaseTransactionGraph, ingested: int,
+                        reports: Optional[List[DetectorRun]] = None) -> FinancialAnalysisResponse:
+        anomalies = list(graph.cycles.values()) + list(graph.structuring.values())
+        leads = []
+        
+        # 3. Construct Network for Visualization (summarised for large cases)
+        network = self.network_view(graph).bounded(
+            settings.FINANCIAL_NETWORK_MAX_NODES, settings.FINANCIAL_NETWORK_MAX_EDGES
+        )
+        
         # 4. Generate Leads
         if anomalies:
             leads.append(InvestigationLead(
@@ -169,23 +922,25 @@ class FinancialService(BaseService[FinancialAnalysisResponse, str]):
             ))
 
         analysis_uuid = str(uuid.uuid4())
-        response = FinancialAnalysisResponse(
+        return FinancialAnalysisResponse(
             id=analysis_uuid,
-            case_id=request.case_id,
+            case_id=graph.case_id,
             analysis_id=analysis_uuid,
-            network=FinancialNetwork(nodes=nodes, edges=edges),
+            network=network,
             anomalies=anomalies,
             leads=leads,
             metrics={
-                "total_volume": total_volume,
-                "transaction_count": len(request.transactions),
+                "total_volume": graph.total_volume,
+                "transaction_count": graph.transaction_count,
+                "ingested_transactions": ingested,
+                "cyclic_components": graph.cyclic_component_count,
                 "risk_score": len(anomalies) * 25
             },
             generated_at=datetime.now(),
-            summary=f"Analysis of {len(request.transactions)} transactions reveals {len(anomalies)} anomalies."
+            summary=f"Analysis of {graph.transaction_count} transactions reveals {len(anomalies)} anomalies.",
+            complete=is_complete(reports or []),
+            detectors=reports or []
         )
-        
-        return await self.create(response)
 
 # Factory
 _service_instance = None
@@ -194,5 +949,5 @@ def get_financial_service() -> FinancialService:
     global _service_instance
     if _service_instance is None:
         repo = InMemoryRepository[FinancialAnalysisResponse, str]()
-        _service_instance = FinancialService(repo)
+        _service_instance = FinancialService(repo, index=get_account_index())
     return _service_instance
@@ -1,167 +1,344 @@
 """
 Expert Implementation: Smart-FIR
 Optimization: Uses OpenAI GPT-4o for high-accuracy entity extraction and legal analysis.
+Completions go through the shared async LLM gateway. Intake returns a local
+regex-engine draft at once; the GPT-4o analysis is filled in in the background.
+A case is enriched by the worker that holds its claim (enrichment_status
+running); cases left pending are claimed with a conditional UPDATE, so each
+one is enriched once however many workers resume at startup.
 """
-import json
+import asyncio
 import uuid
-from typing import List, Optional
-from datetime import datetime
-import openai
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 
-from app.core.config import settings
 from app.core.architecture import BaseService
 from app.schemas.fir import (
     FIRResponse, FIRCreateRequest, FIRAnalysis, ExtractedEntity, 
-    BNSSection, FIRStatus, CrimeSeverity
+    BNSSection, FIRStatus, CrimeSeverity, EnrichmentStatus
 )
+from app.services.case_similarity import get_case_similarity_index
+from app.services.llm_gateway import get_llm_gateway
+from app.services.smart_fir import smart_fir_service as local_fir_engine
+
+# Bump whenever the prompts below change: cached answers are keyed by it
+FIR_PROMPT_VERSION = "fir-v1"
+
+# A running claim older than this is taken to belong to a worker that died;
+# well above the gateway's worst case (4 attempts of 60s plus backoff)
+ENRICHMENT_LEASE = timedelta(minutes=15)
 
 class SmartFIRService(BaseService[FIRResponse, str]):
     def __init__(self, db_session=None):
         self.db = db_session
-        # Initialize OpenAI client
-        # Note: In production, consider async client or handling rate limits
-        api_key = settings.OPENAI_API_KEY
-        if not api_key:
-            print("WARNING: OPENAI_API_KEY not set in backend. Smart FIR will fail.")
-        
-        self.client = openai.OpenAI(api_key=api_key)
+        # Shared async client: bounded concurrency, timeouts, retries, circuit breaker
+        self.llm = get_llm_gateway()
+        self._tasks: Dict[str, asyncio.Task] = {}  # fir id -> enrichment in flight
+        self._watchers: Dict[str, asyncio.Event] = {}  # fir id -> set when its enrichment lands
 
     async def generate_from_text(self, request: FIRCreateRequest) -> FIRResponse:
-        text = request.complaint_text
-        
-        try:
-            # Prepare prompt for OpenAI
-            system_prompt = """You are an expert Indian Police officer and legal analyst. 
-            Analyze the provided complaint text and extract structured information for a First Information Report (FIR).
-            
-            Output strictly valid JSON with the following structure:
-            {
-                "entities": [
-                    {"entity_type": "person/vehicle/location/date/time", "value": "extracted text", "confidence": 0.95}
-                ],
-                "bns_sections": [
-                    {
-                        "section_number": "BNS Section Code",
-                        "description": "Short description",
-                        "severity": "HEINOUS/SERIOUS/PETTY",
-                        "punishment_summary": "Summary of punishment",
-                        "cognizable": true/false,
-                        "bailable": true/false
-                    }
-                ],
-                "incident_summary": "Brief 1-line summary of the incident",
-                "priority_score": 1-10 (float),
-                "draft_content": "Full text of the FIR draft, formatted professionally."
-            }
-            """
-            
-            user_prompt = f"""Complaint Text: "{text}"
-            
-            Complainant: {request.complainant_name}
-            Contact: {request.complainant_contact}
-            Location: {request.incident_location}
-            """
-
-            # Call OpenAI
-            completion = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2
-            )
+        """
+        Tiered generation, so intake never waits on the LLM:
+        1. An LLM answer already in the response cache is used as is.
+        2. Otherwise the local regex engine drafts the FIR, it is stored
+           straight away, already claimed by this worker
+           (enrichment_status=running), and the LLM analysis runs in the
+           background and upgrades the stored case when it lands.
+        """
+        enriched = await self._llm_analysis(request, cache_only=True)
+        if enriched is not None:
+            analysis, draft = enriched
+            confidence, enrichment_status = 0.95, EnrichmentStatus.ENRICHED
+        else:
+            analysis, draft, confidence = local_fir_engine.local_draft(request)
+            enrichment_status = EnrichmentStatus.RUNNING
 
-            # Parse response
-            raw_content = completion.choices[0].message.content
-            data = json.loads(raw_content)
-            
-            # Map to internal schemas
-            entities = [ExtractedEntity(**e, position={"start": 0, "end": 0}) for e in data.get("entities", [])]
-            
-            sections = []
-            for s in data.get("bns_sections", []):
-                # Map string severity to Enum if needed, or handle loosely
-                sev = s.get("severity", "SERIOUS").upper()
-                if sev not in ["HEINOUS", "SERIOUS", "PETTY"]: sev = "SERIOUS"
-                
-                sections.append(BNSSection(
-                    section_number=s.get("section_number"),
-                    description=s.get("description"),
-                    severity=CrimeSeverity(sev),
-                    confidence=0.9,
-                    keywords_matched=[],
-                    punishment_summary=s.get("punishment_summary"),
-                    cognizable=s.get("cognizable", True),
-                    bailable=s.get("bailable", True)
-                ))
-
-            # Construct Draft
-            draft = data.get("draft_content", "")
-            if not draft:
-                # Fallback draft generation if LLM didn't provide it nicely
-                draft = f"FIRST INFORMATION REPORT (DRAFT)\nGenerated via AI\n\nScale of Offense: {data.get('priority_score')}/10\n\nSummary: {data.get('incident_summary')}\n\nDetails:\n{text}"
-
-            # Construct Analysis Object
-            analysis = FIRAnalysis(
-                entities=entities,
-                bns_sections=sections,
-                incident_summary=data.get("incident_summary", "Analysis completed."),
-                key_facts=[e.value for e in entities],
-                priority_score=float(data.get("priority_score", 5.0))
-            )
-            
-            fir_id = str(uuid.uuid4())
-            
-            # Use DB model here (same as before)
-            from app.models.case import Case
-            from app.db.database import SessionLocal
-
-            db_case = Case(
-                id=fir_id,
-                fir_number=f"FIR/{datetime.now().year}/{fir_id[:4].upper()}",
-                status=FIRStatus.DRAFT,
-                complaint_text=text,
-                complainant_name=request.complainant_name,
-                complainant_contact=request.complainant_contact,
-                incident_location=request.incident_location,
-                incident_datetime=datetime.now(), 
-                analysis_data=analysis.dict(),
-                confidence_score=0.95,
-                police_station_id=request.police_station_id
-            )
+        fir_id = str(uuid.uuid4())
+
+        from app.models.case import Case
+        from app.db.database import SessionLocal
+
+        db_case = Case(
+            id=fir_id,
+            fir_number=f"FIR/{datetime.now().year}/{fir_id[:4].upper()}",
+            status=FIRStatus.DRAFT,
+            complaint_text=request.complaint_text,
+            complainant_name=request.complainant_name,
+            complainant_contact=request.complainant_contact,
+            incident_location=request.incident_location,
+            incident_datetime=datetime.now(),
+            analysis_data=analysis.dict(),
+            draft_content=draft,
+            confidence_score=confidence,
+            enrichment_status=enrichment_status,
+            police_station_id=request.police_station_id
+        )
 
-            db = SessionLocal()
+        db = SessionLocal()
+        try:
+            db.add(db_case)
+            db.commit()
+            db.refresh(db_case)
             try:
-                db.add(db_case)
-                db.commit()
-                db.refresh(db_case)
+                # Keep the similar-case index current for the Case Linker
+                get_case_similarity_index().index_case(db_case)
             except Exception as e:
-                db.rollback()
-                print(f"DB Error: {e}")
-                # For demo purposes, return the object even if DB fails, or re-raise
-                # raise e
-            finally:
-                db.close()
+                print(f"Similarity index update failed: {e}")
+        except Exception as e:
+            db.rollback()
+            print(f"DB Error: {e}")
+            raise
+        finally:
+            db.close()
 
-            return FIRResponse(
-                fir_id=db_case.id,
-                fir_number=db_case.fir_number,
-                status=FIRStatus(db_case.status),
-                complaint_text=db_case.complaint_text,
-                analysis=analysis,
-                draft_content=draft,
-                generated_at=db_case.created_at,
-                confidence_score=db_case.confidence_score
-            )
+        if enriched is None:
+            self._schedule_enrichment(fir_id, request)
+
+        return FIRResponse(
+            fir_id=db_case.id,
+            fir_number=db_case.fir_number,
+            status=FIRStatus(db_case.status),
+            complaint_text=db_case.complaint_text,
+            analysis=analysis,
+            draft_content=draft,
+            generated_at=db_case.created_at,
+            confidence_score=db_case.confidence_score,
+            cached=enriched is not None,
+            enrichment_status=enrichment_status
+        )
+
+    # ── LLM enrichment (background) ──
+
+    def _schedule_enrichment(self, fir_id: str, request: FIRCreateRequest):
+        task = asyncio.get_running_loop().create_task(self._enrich(fir_id, request))
+        self._tasks[fir_id] = task  # keep a reference until it finishes
+        task.add_done_callback(lambda _: self._tasks.pop(fir_id, None))
+
+    async def _enrich(self, fir_id: str, request: FIRCreateRequest):
+        try:
+            analysis, draft = await self._llm_analysis(request)
+        except Exception as e:
+            print(f"OpenAI FIR enrichment failed for {fir_id}: {e}")
+            analysis, draft = None, None
+        # Blocking query, commit and index update: off the event loop
+        status = EnrichmentStatus.FAILED if analysis is None else EnrichmentStatus.ENRICHED
+        await asyncio.to_thread(self._store_enrichment, fir_id, status, analysis, draft)
+        self._notify(fir_id)
+
+    def _store_enrichment(self, fir_id: str, enrichment_status: EnrichmentStatus,
+                          analysis: Optional[FIRAnalysis] = None, draft: Optional[str] = None):
+        from app.models.case import Case
+        from app.db.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            c = db.query(Case).filter(Case.id == fir_id).first()
+            if c is not None:
+                c.enrichment_status = enrichment_status
+                if analysis is not None:
+                    c.analysis_data = analysis.dict()
+                    c.draft_content = draft
+                    c.confidence_score = 0.95
+                db.commit()
+                if analysis is not None:
+                    try:
+                        # Entities changed: refresh the similar-case signature
+                        get_case_similarity_index().index_case(c)
+                    except Exception as e:
+                        print(f"Similarity index update failed: {e}")
+        except Exception as e:
+            db.rollback()
+            print(f"DB Error: {e}")
+        finally:
+            db.close()
 
+    def _notify(self, fir_id: str):
+        event = self._watchers.pop(fir_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait_for_enrichment(self, fir_id: str, timeout: float = 25.0) -> Optional[FIRResponse]:
+        """
+        Long-poll: the FIR once it is no longer pending or running, or as it stands
+        after `timeout` seconds. Enrichment in this worker wakes the waiter
+        at once; the stored status is re-read every second as well, for
+        enrichment finished by another worker.
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            fir = await self.get_fir(fir_id)
+            remaining = deadline - asyncio.get_running_loop().time()
+            waiting = (EnrichmentStatus.PENDING, EnrichmentStatus.RUNNING)
+            if fir is None or fir.enrichment_status not in waiting or remaining <= 0:
+                return fir
+            event = self._watchers.setdefault(fir_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(1.0, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def resume_enrichment(self, limit: int = 500) -> int:
+        """
+        Re-schedule enrichment for cases left pending by a restart, or
+        running under a claim whose lease ran out; returns how many. Every
+        worker calls this at startup: a case is only scheduled by the
+        worker whose claim on it succeeded.
+        """
+        requests = await asyncio.to_thread(self._claim_pending, limit)
+        for fir_id, request in requests:
+            self._schedule_enrichment(fir_id, request)
+        return len(requests)
+
+    def _claim_pending(self, limit: int) -> List[Tuple[str, FIRCreateRequest]]:
+        from sqlalchemy import and_, or_, update
+        from app.models.case import Case
+        from app.db.database import SessionLocal
+
+        now = datetime.utcnow()
+        claimable = or_(
+            Case.enrichment_status == EnrichmentStatus.PENDING,
+            and_(Case.enrichment_status == EnrichmentStatus.RUNNING, Case.updated_at < now - ENRICHMENT_LEASE),
+        )
+        db = SessionLocal()
+        try:
+            candidates = db.query(Case).filter(claimable).limit(limit).all()
+            claimed = []
+            for c in candidates:
+                # Conditional on the row still being claimable: another worker
+                # may have claimed it since the read, then no row matches
+                result = db.execute(
+                    update(Case).where(Case.id == c.id, claimable)
+                    .values(enrichment_status=EnrichmentStatus.RUNNING, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    claimed.append((c.id, FIRCreateRequest.model_construct(
+                        complaint_text=c.complaint_text, complainant_name=c.complainant_name,
+                        complainant_contact=c.complainant_contact, police_station_id=c.police_station_id,
+                        incident_location=c.incident_location)))
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def release_enrichment(self):
+        """
+        Shutdown: cancel enrichment in flight and hand its cases back
+        (running -> pending), so the next worker to start resumes them
+        without waiting out the lease
+        """
+        if not self._tasks:
+            return
+        fir_ids = list(self._tasks)
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await asyncio.to_thread(self._release_claims, fir_ids)
+
+    def _release_claims(self, fir_ids: List[str]):
+        from sqlalchemy import update
+        from app.models.case import Case
+        from app.db.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Case)
+                .where(Case.id.in_(fir_ids), Case.enrichment_status == EnrichmentStatus.RUNNING)
+                .values(enrichment_status=EnrichmentStatus.PENDING)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
         except Exception as e:
-            print(f"OpenAI FIR Generation Failed: {e}")
-            # Fallback to empty or basic response? 
-            # Or re-raise to let the user know?
-            # Re-raising is better for debugging.
-            raise e
+            db.rollback()
+            print(f"DB Error: {e}")
+        finally:
+            db.close()
+
+    async def _llm_analysis(self, request: FIRCreateRequest,
+                            cache_only: bool = False) -> Optional[Tuple[FIRAnalysis, str]]:
+        """GPT-4o (analysis, draft) for the complaint; with cache_only, None unless already cached"""
+        text = request.complaint_text
+
+        system_prompt = """You are an expert Indian Police officer and legal analyst. 
+        Analyze the provided complaint text and extract structured information for a First Information Report (FIR).
+        
+        Output strictly valid JSON with the following structure:
+        {
+            "entities": [
+                {"entity_type": "person/vehicle/location/date/time", "value": "extracted text", "confidence": 0.95}
+            ],
+            "bns_sections": [
+                {
+                    "section_number": "BNS Section Code",
+                    "description": "Short description",
+                    "severity": "HEINOUS/SERIOUS/PETTY",
+                    "punishment_summary": "Summary of punishment",
+                    "cognizable": true/false,
+                    "bailable": true/false
+                }
+            ],
+            "incident_summary": "Brief 1-line summary of the incident",
+            "priority_score": 1-10 (float),
+            "draft_content": "Full text of the FIR draft, formatted professionally."
+        }
+        """
+        
+        user_prompt = f"""Complaint Text: "{text}"
+        
+        Complainant: {request.complainant_name}
+        Contact: {request.complainant_contact}
+        Location: {request.incident_location}
+        """
+
+        if cache_only:
+            result = await self.llm.cached_json(system_prompt, user_prompt, "smart_fir", FIR_PROMPT_VERSION)
+            if result is None:
+                return None
+        else:
+            # Call OpenAI via the gateway (JSON mode; repeated prompts come from the cache)
+            result = await self.llm.complete_json(system_prompt, user_prompt, purpose="smart_fir",
+                                                  temperature=0.2, prompt_version=FIR_PROMPT_VERSION)
+        data = result.json()
+
+        # Map to internal schemas
+        entities = [ExtractedEntity(**e, position={"start": 0, "end": 0}) for e in data.get("entities", [])]
+
+        sections = []
+        for s in data.get("bns_sections", []):
+            # Map string severity to Enum if needed, or handle loosely
+            sev = str(s.get("severity", "SERIOUS")).lower()
+            if sev == "petty": sev = "minor"
+            if sev not in [c.value for c in CrimeSeverity]: sev = "serious"
+
+            sections.append(BNSSection(
+                section_number=s.get("section_number"),
+                description=s.get("description"),
+                severity=CrimeSeverity(sev),
+                confidence=0.9,
+                keywords_matched=[],
+                punishment_summary=s.get("punishment_summary"),
+                cognizable=s.get("cognizable", True),
+                bailable=s.get("bailable", True)
+            ))
+
+        # Construct Draft
+        draft = data.get("draft_content", "")
+        if not draft:
+            # Fallback draft generation if LLM didn't provide it nicely
+            draft = f"FIRST INFORMATION REPORT (DRAFT)\nGenerated via AI\n\nScale of Offense: {data.get('priority_score')}/10\n\nSummary: {data.get('incident_summary')}\n\nDetails:\n{text}"
+
+        analysis = FIRAnalysis(
+            entities=entities,
+            bns_sections=sections,
+            incident_summary=data.get("incident_summary", "Analysis completed."),
+            key_facts=[e.value for e in entities],
+            priority_score=float(data.get("priority_score", 5.0))
+        )
+        return analysis, draft
 
     async def list_firs(self, police_station_id: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[FIRResponse]:
         from app.models.case import Case
@@ -184,9 +361,10 @@ class SmartFIRService(BaseService[FIRResponse, str]):
                     status=FIRStatus(c.status),
                     complaint_text=c.complaint_text,
                     analysis=FIRAnalysis(**c.analysis_data) if c.analysis_data else None,
-                    draft_content="", 
+                    draft_content=c.draft_content or "",
                     generated_at=c.created_at,
-                    confidence_score=c.confidence_score
+                    confidence_score=c.confidence_score,
+                    enrichment_status=c.enrichment_status
                 ) for c in cases
             ]
         finally:
@@ -207,9 +385,10 @@ class SmartFIRService(BaseService[FIRResponse, str]):
                 status=FIRStatus(c.status),
                 complaint_text=c.complaint_text,
                 analysis=FIRAnalysis(**c.analysis_data) if c.analysis_data else None,
-                draft_content="", 
+                draft_content=c.draft_content or "",
                 generated_at=c.created_at,
-                confidence_score=c.confidence_score
+                confidence_score=c.confidence_score,
+                enrichment_status=c.enrichment_status
             )
         finally:
             db.close()
@@ -0,0 +1,117 @@
+"""
+Bank Statement Streaming Parser - Skill 02
+Reads CSV / NDJSON statement exports row by row and yields validated
+Transaction batches, so the full statement is never held in memory.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas.financial import Transaction
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+_OPTIONAL_FIELDS = ("reference_no", "latitude", "longitude", "device_id")
+_MAX_ERRORS_KEPT = 20
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    """Resolve statement format from an explicit value or the file extension"""
+    fmt = (explicit or "").lower()
+    if not fmt and filename:
+        name = filename.lower()
+        if name.endswith((".ndjson", ".jsonl")):
+            fmt = NDJSON
+        elif name.endswith(".csv"):
+            fmt = CSV
+    if fmt in ("jsonl", "json"):
+        fmt = NDJSON
+    if fmt not in (CSV, NDJSON):
+        raise ValueError("Unsupported statement format; use csv or ndjson")
+    return fmt
+
+
+@dataclass
+class StatementStats:
+    """Running counters for one statement upload (errors are sampled, not all kept)"""
+    rows_read: int = 0
+    rows_accepted: int = 0
+    rows_rejected: int = 0
+    errors: List[Dict] = field(default_factory=list)
+
+    def reject(self, line: int, message: str):
+        self.rows_rejected += 1
+        if len(self.errors) < _MAX_ERRORS_KEPT:
+            self.errors.append({"line": line, "error": message})
+
+
+def _clean(row: Dict) -> Dict:
+    """Blank optional CSV cells become None"""
+    for name in _OPTIONAL_FIELDS:
+        if row.get(name) == "":
+            row[name] = None
+    return row
+
+
+def _iter_csv(text: io.TextIOBase) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    reader = csv.DictReader(text)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, None, f"Unparseable row: {e}"
+            continue
+        yield reader.line_num, _clean({
+            k.strip(): v.strip() if isinstance(v, str) else v for k, v in row.items() if k
+        }), None
+
+
+def _iter_ndjson(text: io.TextIOBase) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    for line_no, line in enumerate(text, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f"Unparseable row: {e}"
+
+
+def iter_transaction_batches(stream: BinaryIO, fmt: str, stats: StatementStats,
+                             batch_size: int = 5000) -> Iterator[List[Transaction]]:
+    """
+    Yield validated Transaction batches of at most batch_size rows.
+    Invalid rows are counted in stats and skipped.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="" if fmt == CSV else None)
+    rows = _iter_csv(text) if fmt == CSV else _iter_ndjson(text)
+    batch: List[Transaction] = []
+    try:
+        for line, row, error in rows:
+            stats.rows_read += 1
+            if error is not None:
+                stats.reject(line, error)
+                continue
+            try:
+                batch.append(Transaction.model_validate(row))
+            except ValidationError as e:
+                stats.reject(line, "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+
+            stats.rows_accepted += 1
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        text.detach()  # leave the underlying upload stream open for its owner
@@ -13,6 +13,52 @@ from app.schemas.fir import (
     FIRAnalysis, ExtractedEntity, BNSSection, CrimeSeverity,
     FIRStatus, BNS_SECTIONS_DB
 )
+from app.services.fir_extraction import ExtractionEngine
+
+
+# Entity extraction patterns
+ENTITY_PATTERNS = {
+    "time": [
+        r"(\d{1,2}:\d{2}\s*(?:AM|PM|am|pm))",
+        r"(\d{1,2}\s*(?:AM|PM|am|pm))",
+        r"(yesterday|today|last\s+night|this\s+morning|evening)",
+        r"(\d{1,2})\s*(?:th|st|nd|rd)?\s*(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
+    ],
+    "vehicle": [
+        r"(Honda\s+City|Toyota\s+Innova|Swift|Alto|BMW|Mercedes|Audi)",
+        r"(\w+\s+(?:car|bike|scooter|motorcycle|bus|truck))",
+        r"([A-Z]{2}\s*\d{2}\s*[A-Z]{1,2}\s*\d{4})"  # License plate
+    ],
+    "location": [
+        r"(MG\s+Road|Connaught\s+Place|Cyber\s+Hub|Sector\s+\d+)",
+        r"(?:at|near|from)\s+([A-Z][a-zA-Z\s]+(?:Road|Street|Market|Colony))",
+        r"([A-Z][a-z]+\s*(?:Metro|Station|Hospital|Mall))"
+    ],
+    "person": [
+        r"(\b[A-Z][a-z]+\s+[A-Z][a-z]+\b)"  # Full names
+    ],
+    "phone": [
+        r"(\+91[-\s]?\d{5}[-\s]?\d{5})",
+        r"(\d{10})"
+    ]
+}
+
+# Key-fact patterns and their templates
+KEY_FACT_PATTERNS = [
+    (r"(?:stolen|took|missing)\s+([^.]+)", "Property involved: {}"),
+    (r"(?:at|near|from)\s+([A-Z][^.]+)", "Location: {}"),
+    (r"(?:yesterday|today|last\s+night|[0-9]+\s*(?:AM|PM))", "Time: {}"),
+    (r"(?:Honda|Toyota|BMW|Maruti|Audi)\s+([^.]+)", "Vehicle: {}"),
+]
+
+_engine_instance = None
+
+def get_extraction_engine() -> ExtractionEngine:
+    """Compiled once per process and shared by every SmartFIRService"""
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = ExtractionEngine(ENTITY_PATTERNS, BNS_SECTIONS_DB, KEY_FACT_PATTERNS)
+    return _engine_instance
 
 
 class SmartFIRService:
@@ -26,31 +72,9 @@ class SmartFIRService:
         self._fir_counter = 0
         
         # Entity extraction patterns
-        self.entity_patterns = {
-            "time": [
-                r"(\d{1,2}:\d{2}\s*(?:AM|PM|am|pm))",
-                r"(\d{1,2}\s*(?:AM|PM|am|pm))",
-                r"(yesterday|today|last\s+night|this\s+morning|evening)",
-                r"(\d{1,2})\s*(?:th|st|nd|rd)?\s*(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
-            ],
-            "vehicle": [
-                r"(Honda\s+City|Toyota\s+Innova|Swift|Alto|BMW|Mercedes|Audi)",
-                r"(\w+\s+(?:car|bike|scooter|motorcycle|bus|truck))",
-                r"([A-Z]{2}\s*\d{2}\s*[A-Z]{1,2}\s*\d{4})"  # License plate
-            ],
-            "location": [
-                r"(MG\s+Road|Connaught\s+Place|Cyber\s+Hub|Sector\s+\d+)",
-                r"(?:at|near|from)\s+([A-Z][a-zA-Z\s]+(?:Road|Street|Market|Colony))",
-                r"([A-Z][a-z]+\s*(?:Metro|Station|Hospital|Mall))"
-            ],
-            "person": [
-                r"(\b[A-Z][a-z]+\s+[A-Z][a-z]+\b)"  # Full names
-            ],
-            "phone": [
-                r"(\+91[-\s]?\d{5}[-\s]?\d{5})",
-                r"(\d{10})"
-            ]
-        }
+        self.entity_patterns = ENTITY_PATTERNS
+        # Compiled pattern tables; BNS keywords are matched in one pass
+        self.engine = get_extraction_engine()
     
     def generate_fir(self, request: FIRCreateRequest) -> FIRResponse:
         """
@@ -62,28 +86,10 @@ class SmartFIRService:
         3. Generate structured FIR draft
         4. Calculate confidence scores
         """
-        # Step 1: Extract entities
-        entities = self._extract_entities(request.complaint_text)
-        
-        # Step 2: Map to BNS sections
-        bns_sections = self._map_to_bns_sections(request.complaint_text)
-        
-        # Step 3: Generate analysis
-        analysis = FIRAnalysis(
-            entities=entities,
-            bns_sections=bns_sections,
-            incident_summary=self._generate_summary(request.complaint_text),
-            key_facts=self._extract_key_facts(request.complaint_text),
-            priority_score=self._calculate_priority(bns_sections)
-        )
-        
-        # Step 4: Generate draft FIR
-        draft_content = self._generate_draft_fir(request, analysis)
-        
-        # Step 5: Calculate overall confidence
-        confidence = self._calculate_confidence(entities, bns_sections)
+        # Steps 1-4: entities, BNS sections, draft, confidence
+        analysis, draft_content, confidence = self.local_draft(request)
         
-        # Step 6: Create FIR record
+        # Step 5: Create FIR record
         self._fir_counter += 1
         fir_id = str(uuid.uuid4())
         fir_number = f"FIR/{datetime.now().year}/{self._fir_counter:05d}"
@@ -102,24 +108,45 @@ class SmartFIRService:
         self._firs[fir_id] = fir
         return fir
     
+    def analyze(self, text: str) -> Tuple[FIRAnalysis, float]:
+        """Analysis and overall confidence for a complaint, without creating an FIR"""
+        # Step 1: Extract entities
+        entities = self._extract_entities(text)
+        
+        # Step 2: Map to BNS sections
+        bns_sections = self._map_to_bns_sections(text)
+        
+        analysis = FIRAnalysis(
+            entities=entities,
+            bns_sections=bns_sections,
+            incident_summary=self._generate_summary(text),
+            key_facts=self._extract_key_facts(text),
+            priority_score=self._calculate_priority(bns_sections)
+        )
+        
+        # Overall confidence
+        return analysis, self._calculate_confidence(entities, bns_sections)
+    
+    def local_draft(self, request: FIRCreateRequest) -> Tuple[FIRAnalysis, str, float]:
+        """Analysis, draft FIR text and confidence from the regex engine alone; nothing is stored"""
+        analysis, confidence = self.analyze(request.complaint_text)
+        return analysis, self._generate_draft_fir(request, analysis), confidence
+    
     def _extract_entities(self, text: str) -> List[ExtractedEntity]:
         """Extract entities from complaint text using regex patterns"""
         entities = []
         
-        for entity_type, patterns in self.entity_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    # Calculate confidence based on pattern specificity
-                    confidence = random.uniform(0.75, 0.95)
-                    
-                    entity = ExtractedEntity(
-                        entity_type=entity_type,
-                        value=match.group(1) if match.groups() else match.group(0),
-                        confidence=confidence,
-                        position={"start": match.start(), "end": match.end()}
-                    )
-                    entities.append(entity)
+        for match in self.engine.entities(text):
+            # Calculate confidence based on pattern specificity
+            confidence = random.uniform(0.75, 0.95)
+            
+            entity = ExtractedEntity(
+                entity_type=match.entity_type,
+                value=match.value,
+                confidence=confidence,
+                position={"start": match.start, "end": match.end}
+            )
+            entities.append(entity)
         
         # Remove duplicates and sort by confidence
         seen = set()
@@ -134,15 +161,11 @@ class SmartFIRService:
     
     def _map_to_bns_sections(self, text: str) -> List[BNSSection]:
         """Map complaint text to BNS sections using keyword matching"""
-        text_lower = text.lower()
         matched_sections = []
         
-        for section_code, data in BNS_SECTIONS_DB.items():
-            matched_keywords = []
-            
-            for keyword in data["keywords"]:
-                if keyword.lower() in text_lower:
-                    matched_keywords.append(keyword)
+        for match in self.engine.sections(text):
+            section_code, matched_keywords = match.section_code, match.keywords
+            data = BNS_SECTIONS_DB[section_code]
             
             if matched_keywords:
                 # Calculate confidence based on keyword matches
@@ -183,22 +206,8 @@ class SmartFIRService:
     
     def _extract_key_facts(self, text: str) -> List[str]:
         """Extract key facts from complaint"""
-        facts = []
-        
-        # Look for patterns
-        patterns = [
-            (r"(?:stolen|took|missing)\s+([^.]+)", "Property involved: {}"),
-            (r"(?:at|near|from)\s+([A-Z][^.]+)", "Location: {}"),
-            (r"(?:yesterday|today|last\s+night|[0-9]+\s*(?:AM|PM))", "Time: {}"),
-            (r"(?:Honda|Toyota|BMW|Maruti|Audi)\s+([^.]+)", "Vehicle: {}"),
-        ]
-        
-        for pattern, template in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                facts.append(template.format(match.group(0)))
-        
-        return facts[:5]
+        # First match of each KEY_FACT_PATTERNS entry
+        return self.engine.facts(text, limit=5)
     
     def _calculate_priority(self, sections: List[BNSSection]) -> float:
         """Calculate case priority score (0-10)"""
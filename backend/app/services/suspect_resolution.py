@@ -0,0 +1,321 @@
+"""
+Suspect Entity Resolution - Skill 05
+Blocking-based matching of suspect mentions across FIRs
+
+The same person is written "Raju 'Blade'", "Raaju @ Blade" and "Raju
+Blade" in different FIRs. Comparing every mention with every other is
+quadratic, so mentions are first grouped into blocks that share a cheap
+key: the Soundex code of the name (first + last token, first token alone,
+each alias), a normalised phone number or a vehicle plate. Pairs are
+only scored inside a block, blocks larger than max_block (generic names,
+shared taxi plates) are skipped, and pairs that score above the
+threshold are merged with union-find, so A~B and B~C yield one identity.
+
+Phones and plates are parsed from the mention text with the smart-FIR
+entity extractor.
+"""
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.disjoint_set import DisjointSet
+from app.services.smart_fir import SmartFIRService
+
+# Quoted nicknames and "urf" / "alias" / "@" forms
+_QUOTED = re.compile(r"[\"'‘’“”]([^\"'‘’“”]+)[\"'‘’“”]")
+_ALIAS = re.compile(r"(?:\b(?:urf|alias|aka)\b|@)\s*(.+)$", re.IGNORECASE)
+_WORD = re.compile(r"[a-z]+")
+_DIGITS = re.compile(r"\D")
+_PLATE = re.compile(r"[A-Z]{2}\d{1,2}[A-Z]{0,3}\d{4}")
+
+HONORIFICS = {"mr", "mrs", "ms", "shri", "sh", "smt", "km", "kumari", "sri", "dr"}
+GENERIC = {
+    "unknown", "unidentified", "accused", "suspect", "person", "persons", "man", "men", "woman",
+    "male", "female", "boy", "boys", "girl", "biker", "bikers", "driver", "the", "a", "an", "and", "of",
+    "s", "o", "d", "w", "son", "daughter", "wife"
+}
+
+_SOUNDEX = {c: d for d, letters in {
+    "1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r"
+}.items() for c in letters}
+
+
+def soundex(word: str) -> str:
+    """Standard 4-character Soundex ("raju", "raaju", "rajoo" -> R200)"""
+    word = word.lower()
+    if not word:
+        return ""
+    code, last = [word[0].upper()], _SOUNDEX.get(word[0], "")
+    for c in word[1:]:
+        digit = _SOUNDEX.get(c, "")
+        if digit and digit != last:
+            code.append(digit)
+        if c not in "hw":
+            last = digit
+    return ("".join(code) + "000")[:4]
+
+
+@lru_cache(maxsize=1 << 16)
+def soundex_cached(word: str) -> str:
+    return soundex(word)
+
+
+@lru_cache(maxsize=1 << 18)
+def jaro_winkler(a: str, b: str) -> float:
+    """Jaro-Winkler similarity; name tokens repeat a lot, so results are memoised"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    matched_b = [False] * len(b)
+    a_matches = []
+    for i, c in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not matched_b[j] and b[j] == c:
+                matched_b[j] = True
+                a_matches.append(c)
+                break
+    m = len(a_matches)
+    if m == 0:
+        return 0.0
+    b_matches = [c for j, c in enumerate(b) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(a_matches, b_matches)) / 2
+    jaro = (m / len(a) + m / len(b) + (m - transpositions) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def normalise_phone(value: str) -> Optional[str]:
+    digits = _DIGITS.sub("", value)
+    return digits[-10:] if len(digits) >= 10 else None
+
+
+def normalise_plate(value: str) -> Optional[str]:
+    plate = re.sub(r"[^A-Z0-9]", "", value.upper())
+    return plate if _PLATE.fullmatch(plate) else None
+
+
+@dataclass
+class Mention:
+    """One way a suspect was written down in one case"""
+    id: str
+    name: str
+    case_ids: List[str] = field(default_factory=list)
+    tokens: List[str] = field(default_factory=list)
+    aliases: List[str] = field(default_factory=list)
+    phones: Set[str] = field(default_factory=set)
+    plates: Set[str] = field(default_factory=set)
+
+    @property
+    def pool(self) -> List[str]:
+        return self.tokens + self.aliases
+
+
+def _name_tokens(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in HONORIFICS and w not in GENERIC and len(w) > 1]
+
+
+class MentionParser:
+    """
+    Splits a free-text suspect label into name tokens, aliases, phones and
+    plates. Uses the smart-FIR extractor's phone and licence-plate patterns
+    directly: _extract_entities() caps and shuffles its output by a random
+    confidence, which would make the blocking keys unstable.
+    """
+
+    def __init__(self, extractor: Optional[SmartFIRService] = None):
+        patterns = (extractor or SmartFIRService()).entity_patterns
+        self.phone_patterns = [re.compile(p) for p in patterns["phone"]]
+        self.plate_patterns = [re.compile(p, re.IGNORECASE) for p in patterns["vehicle"] if r"\d{4}" in p]
+
+    def parse(self, mention_id: str, name: str, case_ids: Iterable[str] = (), description: str = "",
+              phones: Iterable[str] = (), plates: Iterable[str] = ()) -> Mention:
+        mention = Mention(id=mention_id, name=name, case_ids=list(case_ids))
+        label, found_phones, found_plates = name, list(phones), list(plates)
+        for text in (name, description):
+            for pattern in self.phone_patterns:
+                found_phones.extend(pattern.findall(text))
+            for pattern in self.plate_patterns:
+                found_plates.extend(pattern.findall(text))
+        for pattern in self.phone_patterns + self.plate_patterns:
+            label = pattern.sub(" ", label)
+        mention.phones = {p for p in map(normalise_phone, found_phones) if p}
+        mention.plates = {p for p in map(normalise_plate, found_plates) if p}
+
+        aliases = _QUOTED.findall(label)
+        label = _QUOTED.sub(" ", label)
+        alias_form = _ALIAS.search(label)
+        if alias_form:
+            aliases.append(alias_form.group(1))
+            label = label[:alias_form.start()]
+        mention.tokens = _name_tokens(label)
+        mention.aliases = [t for a in aliases for t in _name_tokens(a) if t not in mention.tokens]
+        return mention
+
+
+def blocking_keys(mention: Mention) -> Set[str]:
+    keys = {f"phone:{p}" for p in mention.phones} | {f"plate:{p}" for p in mention.plates}
+    if mention.tokens:
+        first, last = soundex_cached(mention.tokens[0]), soundex_cached(mention.tokens[-1])
+        keys.add(f"first:{first}")
+        if len(mention.tokens) > 1:
+            keys.add(f"name:{first}{last}")
+    keys.update(f"alias:{soundex_cached(a)}" for a in mention.aliases)
+    return keys
+
+
+def _directed_similarity(tokens: List[str], pool: List[str]) -> float:
+    return sum(max(jaro_winkler(t, p) for p in pool) for t in tokens) / len(tokens)
+
+
+def name_similarity(a: Mention, b: Mention) -> float:
+    """Symmetric best-match Jaro-Winkler over name tokens, aliases counted as names"""
+    a_tokens, b_tokens = a.tokens or a.aliases, b.tokens or b.aliases
+    if not a_tokens or not b_tokens:
+        return 0.0
+    return (_directed_similarity(a_tokens, b.pool) + _directed_similarity(b_tokens, a.pool)) / 2
+
+
+def score_pair(a: Mention, b: Mention) -> Tuple[float, List[str]]:
+    """
+    Probability-style combination of independent evidence:
+    1 - prod(1 - p_i). A close full-name match is enough on its own; a
+    single name token needs a phone, plate or alias to back it up. A known
+    phone mismatch lowers the result.
+    """
+    evidence: List[Tuple[float, str]] = []
+    if a.phones & b.phones:
+        evidence.append((0.95, "same phone number"))
+    if a.plates & b.plates:
+        evidence.append((0.6, "same vehicle"))
+    similarity = name_similarity(a, b)
+    if similarity >= 0.85:
+        p_name = min(0.95, 0.5 + (similarity - 0.85) * 5)
+        if len(a.tokens) < 2 or len(b.tokens) < 2:
+            p_name = min(p_name, 0.6)
+        evidence.append((p_name, f"similar name ({similarity:.2f})"))
+    if set(a.aliases) & set(b.pool) or set(b.aliases) & set(a.pool):
+        evidence.append((0.7, "shared alias"))
+    remaining = 1.0
+    for p, _ in evidence:
+        remaining *= 1 - p
+    score = 1 - remaining
+    if a.phones and b.phones and not a.phones & b.phones:
+        score *= 0.7
+    return score, [reason for _, reason in evidence]
+
+
+@dataclass
+class Identity:
+    """A resolved person: the mentions merged into one identity"""
+    id: str
+    label: str
+    mentions: List[Mention]
+    confidence: float  # weakest merge that joined the cluster
+    reasons: List[str]
+
+    @property
+    def case_ids(self) -> List[str]:
+        return sorted({case_id for m in self.mentions for case_id in m.case_ids})
+
+
+@dataclass
+class ResolutionStats:
+    mentions: int = 0
+    blocks: int = 0
+    skipped_blocks: int = 0
+    pairs_scored: int = 0
+    pairs_naive: int = 0
+    merges: int = 0
+
+
+class SuspectResolver:
+    def __init__(self, threshold: float = settings.SUSPECT_RESOLUTION_THRESHOLD,
+                 max_block: int = settings.SUSPECT_RESOLUTION_MAX_BLOCK):
+        self.threshold = threshold
+        self.max_block = max_block
+
+    def resolve(self, mentions: List[Mention]) -> Tuple[List[Identity], ResolutionStats]:
+        """Identities with two or more mentions, largest first"""
+        stats = ResolutionStats(mentions=len(mentions), pairs_naive=len(mentions) * (len(mentions) - 1) // 2)
+        blocks: Dict[str, List[int]] = defaultdict(list)
+        for i, mention in enumerate(mentions):
+            for key in blocking_keys(mention):
+                blocks[key].append(i)
+
+        sets = DisjointSet[int]()
+        scored: Set[Tuple[int, int]] = set()
+        weakest: Dict[int, float] = {}
+        reasons: Dict[int, Set[str]] = defaultdict(set)
+        for key, members in blocks.items():
+            if len(members) < 2:
+                continue
+            if len(members) > self.max_block:
+                stats.skipped_blocks += 1
+                continue
+            stats.blocks += 1
+            for pair in _block_pairs(key, members, mentions):
+                if pair in scored:
+                    continue  # already compared in another shared block
+                scored.add(pair)
+                if sets.find(pair[0]) == sets.find(pair[1]):
+                    continue
+                score, why = score_pair(mentions[pair[0]], mentions[pair[1]])
+                if score >= self.threshold:
+                    ra, rb = sets.find(pair[0]), sets.find(pair[1])
+                    merged_reasons = reasons.pop(ra, set()) | reasons.pop(rb, set()) | set(why)
+                    merged_weakest = min(weakest.pop(ra, 1.0), weakest.pop(rb, 1.0), score)
+                    root = sets.union(*pair)
+                    reasons[root], weakest[root] = merged_reasons, merged_weakest
+                    stats.merges += 1
+        stats.pairs_scored = len(scored)
+
+        identities = []
+        for root, members in sets.groups().items():
+            if len(members) < 2:
+                continue
+            group = [mentions[i] for i in sorted(members, key=lambda i: mentions[i].id)]
+            identities.append(Identity(
+                id=identity_id(group),
+                label=_label(group),
+                mentions=group,
+                confidence=round(weakest.get(root, 1.0), 3),
+                reasons=sorted(reasons.get(root, ()))
+            ))
+        identities.sort(key=lambda ident: (-len(ident.mentions), ident.id))
+        return identities, stats
+
+
+def _block_pairs(key: str, members: List[int], mentions: List[Mention]) -> Iterable[Tuple[int, int]]:
+    """
+    Candidate pairs of a block (smaller index first). Two full names are
+    compared in their name: block, so a first-name block only pairs the
+    mentions that have a single name token.
+    """
+    if key.startswith("first:"):
+        single = {i for i in members if len(mentions[i].tokens) < 2}
+        return ((min(i, j), max(i, j)) for i in single for j in members if j not in single or i < j)
+    return ((members[x], members[y]) for x in range(len(members)) for y in range(x + 1, len(members)))
+
+
+def identity_id(group: List[Mention]) -> str:
+    """Stable while the smallest mention id stays in the identity"""
+    anchor = min(m.id for m in group)
+    return "PER-" + hashlib.sha1(anchor.encode()).hexdigest()[:12].upper()
+
+
+def _label(group: List[Mention]) -> str:
+    """The most common spelling, ties to the longest"""
+    counts: Dict[str, int] = defaultdict(int)
+    for m in group:
+        counts[m.name.strip()] += 1
+    return max(counts, key=lambda name: (counts[name], len(name), name))
@@ -0,0 +1,289 @@
+"""
+Financial Trail Benchmark - Skill 02
+Runs the financial detectors over seeded synthetic ledgers and reports,
+per detector: wall time, peak RSS and recall/precision of planted patterns.
+
+Targets:
+  analyzer  FinancialAnalyzer (networkx), app/services/financial_service.py
+  service   FinancialService incremental case graph, app/services/police/financial.py
+  csr       FinancialGraph CSR arrays + columnar frame detectors (no pydantic rows)
+
+Each (size, target) runs in a fresh process so peak RSS is not shared
+between runs; a run that exceeds --timeout is killed and its remaining
+stages are reported as "timeout".
+
+Usage (from backend/):
+  python scripts/bench_financial.py --sizes 1k,10k,100k
+  python scripts/bench_financial.py --sizes 10m --targets csr --timeout 3600 --json bench.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TARGETS = ("analyzer", "service", "csr")
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def score(ledger, kind, found):
+    """Recall and precision of found account lists against planted patterns of `kind`"""
+    from app.services.financial_synth import RING
+
+    def key(accounts):
+        return frozenset(accounts) if kind == RING else accounts[0]
+
+    planted = {key(p.accounts) for p in ledger.planted(kind)}
+    found = {key(accounts) for accounts in found}
+    recall = len(planted & found) / len(planted) if planted else None
+    precision = len(planted & found) / len(found) if found else None
+    return recall, precision
+
+
+class StageRecorder:
+    def __init__(self, out, ledger):
+        self.out = out
+        self.ledger = ledger
+
+    def run(self, stage, fn, kind=None):
+        """Time fn(); fn returns found account lists (or None for setup stages)"""
+        start = time.perf_counter()
+        found = fn()
+        elapsed = time.perf_counter() - start
+        recall = precision = None
+        if kind is not None:
+            recall, precision = score(self.ledger, kind, found)
+        self.out.put({
+            "stage": stage,
+            "seconds": round(elapsed, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "alerts": None if found is None else len(found),
+            "kind": kind,
+            "recall": recall,
+            "precision": precision,
+        })
+
+
+def bench_analyzer(rec, ledger, args):
+    from app.schemas.financial import FinancialAnalysisRequest
+    from app.services.financial_service import FinancialAnalysisSession
+    from app.services.financial_pipeline import WorkBudget
+    from app.services.financial_synth import RING, LAYERING, SMURFING, SHELL
+
+    state = {}
+
+    def materialise():
+        state["request"] = FinancialAnalysisRequest(case_id="BENCH", transactions=ledger.transactions())
+
+    def build():
+        state["session"] = FinancialAnalysisSession(
+            state["request"], args.threshold, args.max_cycle_length, cycle_window_hours=args.window_hours
+        )
+        state["session"].budget = WorkBudget()  # unbounded: measure full detector cost
+        state["session"]._prepare()
+
+    def detector(method, key=lambda a: a.affected_accounts):
+        def run():
+            session = state["session"]
+            before = len(session.anomalies)
+            getattr(session, method)()
+            return [key(a) for a in session.anomalies[before:]]
+        return run
+
+    rec.run("materialise", materialise)
+    rec.run("build", build)
+    rec.run("circular_trading", detector("_detect_circular_trading"), RING)
+    rec.run("layering", detector("_detect_layering", lambda a: [a.evidence["source_account"]]), LAYERING)
+    rec.run("structuring", detector("_detect_structuring"), SMURFING)
+    rec.run("high_value", detector("_detect_high_value"))
+    rec.run("rapid_succession", detector("_detect_rapid_succession"))
+    rec.run("unusual_hours", detector("_detect_unusual_hours"))
+    rec.run("shell_companies", detector("_detect_shell_companies"), SHELL)
+
+
+def bench_service(rec, ledger, args):
+    from app.core.architecture import InMemoryRepository
+    from app.services.police.financial import FinancialService, CaseTransactionGraph
+    from app.services.financial_synth import RING, SMURFING
+
+    service = FinancialService(InMemoryRepository())
+    state = {}
+
+    def materialise():
+        state["transactions"] = ledger.transactions()
+
+    def ingest():
+        state["graph"] = CaseTransactionGraph("BENCH")
+        state["graph"].append(state["transactions"])
+
+    def cycles():
+        graph = state["graph"]
+        service._evaluate_temporal_loops(graph, 0)
+        return [alert.affected_accounts for alert in graph.cycles.values()]
+
+    def structuring():
+        graph = state["graph"]
+        service._evaluate(graph, None, [], [], args.threshold)  # no new rows: structuring only
+        return [alert.affected_accounts for alert in graph.structuring.values()]
+
+    def response():
+        service._build_response(state["graph"], ingested=len(state["transactions"]))
+
+    rec.run("materialise", materialise)
+    rec.run("ingest", ingest)
+    rec.run("circular_trading", cycles, RING)
+    rec.run("structuring", structuring, SMURFING)
+    rec.run("response", response)
+
+
+def bench_csr(rec, ledger, args):
+    from app.services.financial_frame import detect_structuring, detect_rapid_succession, to_paise, MICROS_PER_HOUR
+    from app.services.financial_temporal import find_temporal_cycles
+    from app.services.financial_anf import reach_counts, screen_at_distance
+    from app.services.police.financial import FinancialGraph
+    from app.services.financial_synth import RING, LAYERING, SMURFING
+
+    frame = ledger.frame
+    state = {}
+    hops = 5
+
+    def build():
+        state["graph"] = FinancialGraph.from_frame(frame)
+
+    def static_cycles():
+        return state["graph"].find_cycles(2, args.max_cycle_length - 1)
+
+    def temporal_cycles():
+        window = int(args.window_hours * MICROS_PER_HOUR)
+        return [c.accounts for c in find_temporal_cycles(frame, window, 3, args.max_cycle_length)]
+
+    def layering(sketch=False):
+        graph = state["graph"]
+        sources = graph.accounts
+        if sketch:
+            flagged = screen_at_distance(reach_counts(graph.offsets, graph.targets, hops), hops, 3)
+            sources = [graph.accounts[code] for code in flagged.nonzero()[0]]
+        found = []
+        for source in sources:
+            levels = graph.reach_levels(source, hops)
+            if len(levels) > hops and len(levels[hops]) >= 3:
+                if sum(graph.bottleneck_flows(source, hops).values()) > args.threshold * 2:
+                    found.append([source])
+        return found
+
+    def structuring():
+        hits = detect_structuring(frame, to_paise(80000), to_paise(100000), min_count=3)
+        return [[hit.account] for hit in hits]
+
+    def rapid():
+        return [[hit.account] for hit in detect_rapid_succession(frame, MICROS_PER_HOUR, min_count=5)]
+
+    rec.run("build", build)
+    rec.run("temporal_cycles", temporal_cycles, RING)
+    rec.run("static_cycles", static_cycles, RING)
+    rec.run("layering", layering, LAYERING)
+    rec.run("layering_sketch", lambda: layering(sketch=True), LAYERING)
+    rec.run("structuring", structuring, SMURFING)
+    rec.run("rapid_succession", rapid)
+
+
+def _child(target, size, args, out):
+    from app.services.financial_synth import generate_ledger
+
+    state = {}
+
+    def generate():
+        state["ledger"] = generate_ledger(size, seed=args.seed)
+
+    rec = StageRecorder(out, None)
+    rec.run("generate", generate)
+    rec.ledger = state["ledger"]
+    {"analyzer": bench_analyzer, "service": bench_service, "csr": bench_csr}[target](rec, state["ledger"], args)
+    out.put(None)
+
+
+def run_target(target, size, args):
+    """Run one target in a fresh process, collecting stage rows until done or timeout"""
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(target, size, args, out), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + args.timeout
+    rows = []
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            row = out.get(timeout=max(remaining, 0.01))
+        except queue.Empty:
+            if remaining <= 0 or not proc.is_alive():
+                status = "timeout" if remaining <= 0 else f"crashed (exit {proc.exitcode})"
+                proc.terminate()
+                rows.append({"stage": status})
+                break
+            continue
+        if row is None:
+            break
+        rows.append(row)
+    proc.join()
+    return rows
+
+
+def fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,10k,100k", help="comma-separated transaction counts (k/m suffixes)")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, default=100000.0)
+    parser.add_argument("--max-cycle-length", type=int, default=6, help="max accounts per cycle")
+    parser.add_argument("--window-hours", type=float, default=72.0, help="time-respecting cycle window")
+    parser.add_argument("--max-objects", type=parse_size, default=2_000_000,
+                        help="skip targets that need pydantic rows above this many transactions")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds per (size, target) run")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    results = []
+    print(f"{'size':>10} {'target':<9} {'stage':<18} {'seconds':>9} {'rss_mb':>8} {'alerts':>7} {'recall':>7} {'prec':>6}")
+    for size in (parse_size(s) for s in args.sizes.split(",")):
+        for target in targets:
+            if target != "csr" and size > args.max_objects:
+                rows = [{"stage": f"skipped (> {args.max_objects} rows)"}]
+            else:
+                rows = run_target(target, size, args)
+            for row in rows:
+                row.update(size=size, target=target)
+                results.append(row)
+                print(f"{size:>10} {target:<9} {row['stage']:<18} {fmt(row.get('seconds'), '.3f'):>9} "
+                      f"{fmt(row.get('peak_rss_mb'), '.0f'):>8} {fmt(row.get('alerts'), 'd'):>7} "
+                      f"{fmt(row.get('recall'), '.2f'):>7} {fmt(row.get('precision'), '.2f'):>6}", flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"seed": args.seed, "threshold": args.threshold, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
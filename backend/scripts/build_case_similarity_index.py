@@ -0,0 +1,34 @@
+"""
+Similar-Case Index Backfill - Skill 05
+Indexes every stored Case into the MinHash/LSH similar-case index.
+New FIRs are indexed as they are created; run this once for rows that
+existed before the index, or after changing the shingling.
+
+Usage (from backend/):
+  python scripts/build_case_similarity_index.py
+  python scripts/build_case_similarity_index.py --batch-size 5000 --after <case id>
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--after", default="", help="resume after this case id")
+    args = parser.parse_args()
+
+    from app.services.case_similarity import get_case_similarity_index
+
+    started = time.perf_counter()
+    indexed = get_case_similarity_index().backfill(args.batch_size, args.after)
+    elapsed = time.perf_counter() - started
+    print(f"indexed {indexed} cases in {elapsed:.1f} s ({indexed / max(elapsed, 1e-9):.0f} cases/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+LLM Stub Server - Shared
+A local stand-in for the OpenAI chat completions API, so the LLM gateway,
+Smart-FIR and Charge Sheet generation can be exercised offline. Replies are
+canned JSON in the shape each service's prompt asks for. Latency and
+failures can be injected to exercise timeouts, retries and the circuit
+breaker.
+
+Usage (from backend/):
+  python scripts/llm_stub_server.py --port 8808 --latency 0.5 --fail-rate 0.1
+  OPENAI_BASE_URL=http://127.0.0.1:8808/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FIR_REPLY = {
+    "entities": [
+        {"entity_type": "location", "value": "MG Road", "confidence": 0.9},
+        {"entity_type": "time", "value": "10:30 PM", "confidence": 0.85},
+    ],
+    "bns_sections": [{
+        "section_number": "BNS 303",
+        "description": "Theft",
+        "severity": "SERIOUS",
+        "punishment_summary": "Imprisonment up to 3 years, or fine, or both",
+        "cognizable": True,
+        "bailable": True,
+    }],
+    "incident_summary": "Theft of a mobile phone reported by the complainant.",
+    "priority_score": 6.0,
+    "draft_content": "FIRST INFORMATION REPORT (DRAFT)\nGenerated by the local LLM stub.",
+}
+
+CHARGESHEET_REPLY = {
+    "offenses": [{"act": "BNS", "section": "303", "description": "Theft", "is_bailable": True,
+                  "max_punishment": "3 years"}],
+    "brief_facts": "The accused stole the complainant's phone near MG Road.",
+    "investigation_details": "CCTV footage collected; two witnesses examined.",
+    "accused": [{"name": "Unknown", "parentage": "Unknown", "address": "Unknown", "is_arrested": False,
+                 "remand_status": "Not arrested"}],
+    "witnesses": [{"name": "Shopkeeper", "statement_summary": "Saw the accused run towards the metro.",
+                   "is_key_witness": True}],
+    "evidence_list": [{"description": "CCTV footage", "seizure_memo_ref": "SM-001"}],
+}
+
+
+def create_app(latency: float, fail_rate: float) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        # Exponential latency around the mean, like a real API's long tail
+        await asyncio.sleep(random.expovariate(1 / latency) if latency > 0 else 0)
+        if random.random() < fail_rate:
+            code = random.choice([429, 500, 503])
+            return JSONResponse(status_code=code, content={"error": {"message": "stub failure", "code": code}})
+
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        reply = CHARGESHEET_REPLY if "Charge Sheet" in prompt else FIR_REPLY
+        content = json.dumps(reply)
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per completion")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of calls answered with 429/5xx")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.fail_rate), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
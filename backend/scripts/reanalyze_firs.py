@@ -0,0 +1,44 @@
+"""
+FIR Re-analysis - Skill 01
+Re-runs the regex Smart-FIR analysis over every stored Case and writes the
+new analysis_data and confidence_score back. Run it after changing the BNS
+keyword table or the extraction patterns.
+
+Usage (from backend/):
+  python scripts/reanalyze_firs.py
+  python scripts/reanalyze_firs.py --workers 8 --batch-size 5000 --after <case id>
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="analysis processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--after", default="", help="resume after this case id")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many cases")
+    args = parser.parse_args()
+
+    from app.services.fir_reanalysis import FIRReanalysisJob
+
+    last_report = [0.0]
+
+    def report(state):
+        now = time.perf_counter()
+        if now - last_report[0] >= 2:
+            last_report[0] = now
+            print(f"  {state.scanned} cases, {state.rows_per_second:.0f} rows/s, last id {state.last_id}", flush=True)
+
+    job = FIRReanalysisJob(workers=args.workers, batch_size=args.batch_size)
+    state = job.run(after=args.after, limit=args.limit, progress=report)
+    print(f"re-analysed {state.updated} cases ({state.failed} failed) in {state.elapsed:.1f} s "
+          f"({state.rows_per_second:.0f} rows/s); last id {state.last_id or '-'}")
+
+
+if __name__ == "__main__":
+    main()
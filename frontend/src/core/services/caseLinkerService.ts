@@ -1,5 +1,7 @@
 import api from '../services/api';
-import { CaseLinkResponse } from '../types/caseLinker';
+import {
+    BatchCaseLinkResponse, CaseLinkResponse, CrimeCluster, CrimeClusterList, SuspectMention, SuspectResolutionResponse
+} from '../types/caseLinker';
 
 class CaseLinkerService {
     /**
@@ -13,6 +15,48 @@ class CaseLinkerService {
         });
         return response.data;
     }
+
+    /**
+     * Analyze many cases (e.g. a whole beat) in one request
+     */
+    async analyzeCases(caseIds: string[], includeSimilarCases = false): Promise<BatchCaseLinkResponse> {
+        const response = await api.post<BatchCaseLinkResponse>('/police/linker/analyze/batch', {
+            case_ids: caseIds,
+            include_similar_cases: includeSimilarCases,
+            min_confidence: 0.6
+        });
+        return response.data;
+    }
+
+    /**
+     * Merge spelling variants of the same suspect across FIRs
+     */
+    async resolveSuspects(mentions: SuspectMention[] = [], persist = true): Promise<SuspectResolutionResponse> {
+        const response = await api.post<SuspectResolutionResponse>('/police/linker/resolve-suspects', {
+            mentions,
+            include_graph: true,
+            persist
+        });
+        return response.data;
+    }
+
+    /**
+     * Largest live clusters of linked cases (serial offender dashboard)
+     */
+    async getTopClusters(limit = 10, minCases = 2): Promise<CrimeClusterList> {
+        const response = await api.get<CrimeClusterList>('/police/linker/clusters', {
+            params: { limit, min_cases: minCases }
+        });
+        return response.data;
+    }
+
+    /**
+     * Cluster containing a case, suspect or MO
+     */
+    async getCluster(nodeId: string): Promise<CrimeCluster> {
+        const response = await api.get<CrimeCluster>(`/police/linker/clusters/${encodeURIComponent(nodeId)}`);
+        return response.data;
+    }
 }
 
 export default new CaseLinkerService();
@@ -1,6 +1,10 @@
 import api from '../services/api';
 import { FIRCreateRequest, FIRResponse, BNSSection } from '../types/fir';
-import { FinancialAnalysisRequest, FinancialAnalysisResponse } from '../types/financial';
+import {
+    FinancialAnalysisRequest, FinancialAnalysisResponse, FinancialNetwork,
+    NetworkPage, NetworkOverviewParams, NetworkPageParams,
+    IdentifierKind, IdentifierLookupParams, IdentifierLookupResponse, RepeatIdentifier
+} from '../types/financial';
 
 class PoliceService {
     // ── Skill 01: Smart-FIR ──
@@ -14,6 +18,17 @@ class PoliceService {
         return response.data;
     }
 
+    /**
+     * Resolves when the FIR's AI analysis replaces the instant draft (or after timeout seconds)
+     */
+    async waitForEnrichment(firId: string, timeout = 25): Promise<FIRResponse> {
+        const response = await api.get<FIRResponse>(`/police/fir/${firId}/enrichment`, {
+            params: { timeout },
+            timeout: (timeout + 10) * 1000
+        });
+        return response.data;
+    }
+
     async listFIRs(params?: { status?: string; limit?: number }): Promise<FIRResponse[]> {
         const response = await api.get<FIRResponse[]>('/police/fir', { params });
         return response.data;
@@ -40,6 +55,34 @@ class PoliceService {
         return response.data;
     }
 
+    async getFinancialNetwork(caseId: string, params?: NetworkOverviewParams): Promise<FinancialNetwork> {
+        const response = await api.get<FinancialNetwork>(
+            `/police/analyze/${encodeURIComponent(caseId)}/network`, { params }
+        );
+        return response.data;
+    }
+
+    async expandFinancialNode(caseId: string, nodeId: string, params?: NetworkPageParams): Promise<NetworkPage> {
+        const response = await api.get<NetworkPage>(
+            `/police/analyze/${encodeURIComponent(caseId)}/network/${encodeURIComponent(nodeId)}`, { params }
+        );
+        return response.data;
+    }
+
+    async lookupIdentifier(value: string, params?: IdentifierLookupParams): Promise<IdentifierLookupResponse> {
+        const response = await api.get<IdentifierLookupResponse>('/police/index/lookup', {
+            params: { value, ...params }
+        });
+        return response.data;
+    }
+
+    async getRepeatIdentifiers(caseId: string, kind?: IdentifierKind): Promise<RepeatIdentifier[]> {
+        const response = await api.get<RepeatIdentifier[]>(
+            `/police/analyze/${encodeURIComponent(caseId)}/repeat-identifiers`, { params: { kind } }
+        );
+        return response.data;
+    }
+
     // ── Helpers ──
     getSeverityColor(severity: string): string {
         const colors: Record<string, string> = {
@@ -36,6 +36,7 @@ export interface CrimeLink {
 export interface CrimeGraph {
     nodes: CrimeNode[];
     links: CrimeLink[];
+    truncated?: boolean;
 }
 
 export interface PatternAlert {
@@ -56,3 +57,71 @@ export interface CaseLinkResponse {
     patterns: PatternAlert[];
     similar_cases: { id: string; similarity: number; reason: string }[];
 }
+
+export interface CaseLinkSummary {
+    case_id: string;
+    suspects: string[];
+    modus_operandi: string[];
+    linked_cases: string[];
+    pattern_ids: string[];
+    similar_cases: { id: string; similarity: number; reason: string }[];
+}
+
+export interface BatchCaseLinkResponse {
+    case_ids: string[];
+    graph: CrimeGraph;
+    patterns: PatternAlert[];
+    cases: CaseLinkSummary[];
+    elapsed_ms: number;
+}
+
+export interface SuspectMention {
+    id?: string;
+    name: string;
+    case_ids?: string[];
+    description?: string;
+    phones?: string[];
+    plates?: string[];
+}
+
+export interface ResolvedSuspect {
+    id: string;
+    label: string;
+    mention_ids: string[];
+    names: string[];
+    aliases: string[];
+    phones: string[];
+    plates: string[];
+    case_ids: string[];
+    confidence: number;
+    reasons: string[];
+}
+
+export interface SuspectResolutionResponse {
+    identities: ResolvedSuspect[];
+    mentions: number;
+    blocks: number;
+    skipped_blocks: number;
+    pairs_scored: number;
+    pairs_naive: number;
+    persisted: boolean;
+    elapsed_ms: number;
+}
+
+export interface CrimeCluster {
+    id: string;
+    size: number;
+    cases: number;
+    suspects: number;
+    mos: number;
+    type_counts: Record<string, number>;
+    sample_cases: string[];
+}
+
+export interface CrimeClusterList {
+    clusters: CrimeCluster[];
+    nodes: number;
+    multi_node_clusters: number;
+    graph_version: number;
+    elapsed_ms: number;
+}
@@ -50,6 +50,35 @@ export interface NetworkEdge {
 export interface FinancialNetwork {
     nodes: NetworkNode[];
     edges: NetworkEdge[];
+    truncated?: boolean;
+    hidden_nodes?: number;
+    hidden_edges?: number;
+    collapsed_nodes?: number;
+}
+
+export interface NetworkPage {
+    account: string;
+    direction: 'in' | 'out' | 'both';
+    nodes: NetworkNode[];
+    edges: NetworkEdge[];
+    total: number;
+    offset: number;
+    limit: number;
+    next_offset?: number | null;
+}
+
+export interface NetworkOverviewParams {
+    max_nodes?: number;
+    max_edges?: number;
+    min_risk?: 'critical' | 'high' | 'medium' | 'low';
+    min_amount?: number;
+}
+
+export interface NetworkPageParams {
+    direction?: 'in' | 'out' | 'both';
+    offset?: number;
+    limit?: number;
+    min_amount?: number;
 }
 
 export interface InvestigationLead {
@@ -70,6 +99,18 @@ export interface FinancialAnalysisResponse {
     metrics: Record<string, any>;
     generated_at: string;
     summary: string;
+    complete?: boolean;
+    detectors?: DetectorRun[];
+}
+
+export interface DetectorRun {
+    name: string;
+    status: 'complete' | 'incomplete' | 'skipped' | 'failed';
+    elapsed_ms: number;
+    alerts: number;
+    nodes_visited: number;
+    edges_visited: number;
+    error?: string | null;
 }
 
 export interface FinancialAnalysisRequest {
@@ -77,4 +118,41 @@ export interface FinancialAnalysisRequest {
     transactions: Transaction[];
     accounts?: Account[];
     threshold_amount?: number;
+    time_budget_seconds?: number;
+    work_budget?: number;
+}
+
+export type IdentifierKind = 'account' | 'device' | 'reference';
+
+export interface IdentifierAppearance {
+    kind: IdentifierKind;
+    value: string;
+    case_id: string;
+    analysis_id?: string | null;
+    analyses: number;
+    transactions: number;
+    first_transaction?: string | null;
+    last_transaction?: string | null;
+    first_indexed: string;
+    last_indexed: string;
+}
+
+export interface IdentifierLookupResponse {
+    value: string;
+    kind?: IdentifierKind | null;
+    appearances: IdentifierAppearance[];
+    total_cases: number;
+    elapsed_ms: number;
+}
+
+export interface IdentifierLookupParams {
+    kind?: IdentifierKind;
+    exclude_case_id?: string;
+    limit?: number;
+}
+
+export interface RepeatIdentifier {
+    kind: IdentifierKind;
+    value: string;
+    other_cases: IdentifierAppearance[];
 }
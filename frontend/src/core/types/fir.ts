@@ -61,4 +61,6 @@ export interface FIRResponse {
     reviewed_by?: string;
     reviewed_at?: string;
     confidence_score: number;
+    cached?: boolean;
+    enrichment_status?: 'pending' | 'enriched' | 'failed';
 }